@@ -13,13 +13,28 @@ from .agent_nodes import (
     generate_conceptual_graph_data,
     build_documentation_graph,  # Add this line
     update_documentation_queue,
+    document_ready_nodes,
+    document_current_node,
     should_continue
 )
 
-def create_agent_graph() -> StateGraph:
+def create_agent_graph(concurrency: int = 1, fused: bool = False) -> StateGraph:
     """
     Creates and configures the LangGraph agent for dual graph generation.
+
+    Args:
+        concurrency (int): 1 documents one node per loop iteration. Higher
+            values document every ready node per iteration, with up to this
+            many nodes in flight at once (see document_ready_nodes).
+        fused (bool): Document each node with one structured LLM call instead
+            of separate context, documentation and conceptual calls, falling
+            back to those for responses that fail validation.
     """
+    if concurrency > 1:
+        return _create_concurrent_agent_graph(concurrency, fused)
+    if fused:
+        return _create_fused_agent_graph()
+
     graph = StateGraph(AgentState)
 
     # Define the Nodes
@@ -76,3 +91,54 @@ def create_agent_graph() -> StateGraph:
 
     agent_app = graph.compile()
     return agent_app
+
+
+def _create_fused_agent_graph() -> StateGraph:
+    """The serial loop with one document_node step per node instead of three LLM steps."""
+    graph = StateGraph(AgentState)
+
+    graph.add_node("initialize_queue", initialize_documentation_queue)
+    graph.add_node("select_node", select_next_node)
+    graph.add_node("document_node", document_current_node)
+    graph.add_node("update_queue", update_documentation_queue)
+    graph.set_entry_point("initialize_queue")
+    graph.add_edge("initialize_queue", "select_node")
+
+    condition_runnable = RunnableLambda(lambda state: "end" if state.get("is_finished") else "continue")
+    condition_runnable.name = "condition_router"
+    graph.add_conditional_edges(
+        "select_node",
+        condition_runnable,
+        {
+            "continue": "document_node",
+            "end": END,
+        }
+    )
+    graph.add_edge("document_node", "update_queue")
+    graph.add_edge("update_queue", "select_node")
+    return graph.compile()
+
+
+def _create_concurrent_agent_graph(concurrency: int, fused: bool = False) -> StateGraph:
+    """Initialize the queue, then document waves of ready nodes until none remain."""
+    graph = StateGraph(AgentState)
+
+    def document_wave(state):
+        return document_ready_nodes(state, concurrency, fused)
+
+    graph.add_node("initialize_queue", initialize_documentation_queue)
+    graph.add_node("document_wave", document_wave)
+    graph.set_entry_point("initialize_queue")
+    graph.add_edge("initialize_queue", "document_wave")
+
+    condition_runnable = RunnableLambda(lambda state: "end" if state.get("is_finished") else "continue")
+    condition_runnable.name = "condition_router"
+    graph.add_conditional_edges(
+        "document_wave",
+        condition_runnable,
+        {
+            "continue": "document_wave",
+            "end": END,
+        }
+    )
+    return graph.compile()
@@ -3,31 +3,93 @@
 # This file implements the core logic for each step in the agent's workflow.
 # ENHANCED VERSION: Added advanced search, validation, and error handling
 
-import os
 import json
 import re
-from typing import Dict, List, Tuple, Any, Optional
-from difflib import SequenceMatcher
-from langchain_openai import AzureChatOpenAI
-from langchain_core.prompts import PromptTemplate
+import time
+import asyncio
+import threading
+from collections import ChainMap, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple, Any, Optional
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 import networkx as nx
+import jsonschema
 from .agent_state import AgentState
 from core.graph_searcher import RepoSearcher
+from core.llm_provider import get_chain
+from core.source_store import file_signature, get_file_source, get_node_source
+from core.fuzzy_index import FuzzyNameIndex
+from core.static_calls import BUILTIN_NAMES, EMPTY_SUMMARY, SourceSummary, summarize_module, summarize_source
+from core.topo_scheduler import TopologicalScheduler
+from core.token_budget import DEFAULT_CONTEXT_TOKEN_BUDGET, ContextItem, count_tokens, fit_to_budget
 
 # --- Import all necessary prompts from the centralized templates file ---
 from prompts.templates import (
     CODE_ANALYSIS_PROMPT_TEMPLATE,
     DOCUMENTATION_PROMPT_TEMPLATE,
-    CONCEPTUAL_GRAPH_PROMPT_TEMPLATE
+    CONCEPTUAL_GRAPH_PROMPT_TEMPLATE,
+    FUSED_NODE_PROMPT_TEMPLATE
 )
 
+# Nodes documented at once by document_ready_nodes when no limit is given
+DEFAULT_CONCURRENCY = 8
+
+# Context priority by the label of the edge from the node to a dependency, for
+# the labels the code graph uses (construct_graph emits 'invokes' and
+# 'contains'; 'inherits_from' as in graph_searcher and connection_strength).
+# Dependencies without an edge (found by search, external) come last
+EDGE_PRIORITY = {'invokes': 0, 'inherits_from': 1, 'contains': 2}
+
+# What a fused-mode response must look like; anything else falls back to the
+# separate analysis, documentation and conceptual calls
+FUSED_RESPONSE_SCHEMA = {
+    "type": "object",
+    "required": ["dependencies", "documentation", "semantic_metadata", "semantic_edges"],
+    "properties": {
+        "dependencies": {"type": "array", "items": {"type": "string"}},
+        "documentation": {"type": "string", "minLength": 1},
+        "semantic_metadata": {
+            "type": "object",
+            "required": ["label", "type", "summary"],
+            "properties": {
+                "label": {"type": "string"},
+                "type": {"type": "string"},
+                "summary": {"type": "string"},
+            },
+        },
+        "semantic_edges": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["target", "label"],
+                "properties": {
+                    "target": {"type": "string"},
+                    "label": {"type": "string"},
+                },
+            },
+        },
+    },
+}
+
+
+def validate_fused_response(response: Any):
+    """Raises jsonschema.ValidationError unless `response` matches FUSED_RESPONSE_SCHEMA."""
+    jsonschema.validate(response, FUSED_RESPONSE_SCHEMA)
+
 
 class EnhancedDependencySearcher:
-    """Advanced searcher for finding dependencies in the code graph"""
+    """
+    Advanced searcher for finding dependencies in the code graph.
+
+    Build one per run and share it (initialize_documentation_queue puts it in
+    the agent state): the indices cover the whole graph, and `sync` keeps them
+    current when the graph changes instead of rebuilding them. Wave workers
+    share it across threads, so `sync` and the lazily built caches take a lock.
+    """
     
     def __init__(self, graph: nx.MultiDiGraph):
         self.graph = graph
+        self._lock = threading.RLock()
         self.searcher = RepoSearcher(graph)
         # Build search indices for faster lookups
         self._build_search_indices()
@@ -60,26 +122,265 @@ class EnhancedDependencySearcher:
         self.name_index = {}  # Maps lowercase names to actual node names
         self.file_index = {}  # Maps file paths to nodes
         self.method_index = {}  # Maps method names to their full qualified names
+        # Every node with a given lowercase name, in graph order; the last one is in name_index
+        self._same_lowercase = {}
+        # Node -> the fname it is filed under in file_index
+        self._indexed = {}
+        # Bigram index for fuzzy matching, built on the first fuzzy lookup
+        self._fuzzy_index = None
+        # Source file -> its imports and module-level names; class -> its self.<attr> classes
+        self._file_summaries = {}
+        self._class_summaries = {}
 
         for node, data in self.graph.nodes(data=True):
-            # Name index
-            self.name_index[node.lower()] = node
-
-            # File index
-            fname = data.get('fname', '')
-            if fname:
-                if fname not in self.file_index:
-                    self.file_index[fname] = []
-                self.file_index[fname].append(node)
-
-            # Method index for class.method patterns
-            if '.' in node:
-                parts = node.split('.')
-                method_name = parts[-1]
-                if method_name not in self.method_index:
-                    self.method_index[method_name] = []
-                self.method_index[method_name].append(node)
+            self._index_node(node, data)
+
+    def _index_node(self, node: str, data: Dict[str, Any]):
+        # Name index
+        self._same_lowercase.setdefault(node.lower(), []).append(node)
+        self.name_index[node.lower()] = node
+
+        # File index
+        fname = data.get('fname', '')
+        if fname:
+            if fname not in self.file_index:
+                self.file_index[fname] = []
+            self.file_index[fname].append(node)
+        self._indexed[node] = fname
+
+        # Method index for class.method patterns
+        if '.' in node:
+            parts = node.split('.')
+            method_name = parts[-1]
+            if method_name not in self.method_index:
+                self.method_index[method_name] = []
+            self.method_index[method_name].append(node)
+
+    def _unindex_node(self, node: str):
+        fname = self._indexed.pop(node)
+        lower = node.lower()
+        variants = self._same_lowercase[lower]
+        variants.remove(node)
+        if variants:
+            self.name_index[lower] = variants[-1]
+        else:
+            del self._same_lowercase[lower]
+            del self.name_index[lower]
+        if fname:
+            self._remove_from(self.file_index, fname, node)
+        if '.' in node:
+            self._remove_from(self.method_index, node.split('.')[-1], node)
+
+    @staticmethod
+    def _remove_from(index: Dict[str, List[str]], key: str, node: str):
+        nodes = index[key]
+        nodes.remove(node)
+        if not nodes:
+            del index[key]
+
+    def sync(self, changed_nodes: Optional[Iterable[str]] = None) -> bool:
+        """
+        Brings the indices up to date with the graph without rebuilding them.
+
+        Added and removed nodes are found by comparing node counts, so this is
+        O(1) while the graph is unchanged. Nodes whose attributes changed in
+        place (e.g. after CodeGraph.update_graph) must be passed explicitly.
+
+        Args:
+            changed_nodes (Iterable[str]): Nodes whose 'fname' may have changed.
+
+        Returns:
+            bool: True if any index entry changed.
+        """
+        with self._lock:
+            return self._sync(changed_nodes)
+
+    def _sync(self, changed_nodes: Optional[Iterable[str]]) -> bool:
+        changed = False
+        if self.graph.number_of_nodes() != len(self._indexed):
+            removed = [node for node in self._indexed if not self.graph.has_node(node)]
+            for node in removed:
+                self._unindex_node(node)
+            for node, data in self.graph.nodes(data=True):
+                if node not in self._indexed:
+                    self._index_node(node, data)
+                    changed = True
+            changed = changed or bool(removed)
+            if changed:
+                self._fuzzy_index = None
+        for node in changed_nodes or ():
+            if node in self._indexed and self.graph.has_node(node):
+                fname = self.graph.nodes[node].get('fname', '')
+                if self._indexed[node] != fname:
+                    if self._indexed[node]:
+                        self._remove_from(self.file_index, self._indexed[node], node)
+                    if fname:
+                        self.file_index.setdefault(fname, []).append(node)
+                    self._indexed[node] = fname
+                    changed = True
+        return changed
     
+    def _fuzzy_name_index(self) -> FuzzyNameIndex:
+        """The bigram index over node names, rebuilt after `sync` added or removed nodes."""
+        with self._lock:
+            if self._fuzzy_index is None or len(self._fuzzy_index.names) != self.graph.number_of_nodes():
+                self._fuzzy_index = FuzzyNameIndex(list(self.graph.nodes()))
+            return self._fuzzy_index
+
+    def _file_summary(self, data: Dict[str, Any]) -> SourceSummary:
+        """Imports and module-level names of the file a node's spans point into."""
+        spans = data.get('spans')
+        if not spans:
+            return EMPTY_SUMMARY
+        file_path = spans[0][0]
+        try:
+            version = file_signature(file_path)
+        except OSError:
+            return EMPTY_SUMMARY
+        # Keyed on (size, mtime) like _class_summary on spans, so edited imports are re-read
+        cached = self._file_summaries.get(file_path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        source = get_file_source(file_path, default=None)
+        if source is None:
+            # A failed read is not the file's summary; try again next time
+            return EMPTY_SUMMARY
+        summary = summarize_module(source) or EMPTY_SUMMARY
+        with self._lock:
+            self._file_summaries[file_path] = (version, summary)
+        return summary
+
+    def _class_summary(self, class_name: Optional[str]) -> SourceSummary:
+        """Summary of a class node's source, for the classes of its `self` attributes."""
+        if not class_name or not self.graph.has_node(class_name):
+            return EMPTY_SUMMARY
+        data = self.graph.nodes[class_name]
+        version = data.get('spans', data.get('info'))
+        cached = self._class_summaries.get(class_name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        source = get_node_source(data, default=None)
+        if source is None:
+            return EMPTY_SUMMARY
+        summary = summarize_source(source) or EMPTY_SUMMARY
+        with self._lock:
+            self._class_summaries[class_name] = (version, summary)
+        return summary
+
+    def resolve_static_dependencies(self, node_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolves a node's dependencies without the LLM, from its edges in the
+        code graph and an AST walk of its source.
+
+        Every successor of the node is a dependency. Each call site in the
+        source is then classified:
+        - internal: a graph node by name, through `self`/`cls` on the
+          enclosing class, through a local variable of a known repo class,
+          or as the only method in the repository with that name on `self`;
+        - external: rooted at an imported name (kept with its import path);
+        - ignored: builtins, the code's own parameters and variables, and
+          attribute calls no repository method could answer (`items.append`),
+          counting only methods of classes the file defines or imports;
+        - unresolved: anything else, e.g. `obj.save()` when a class in scope
+          defines `save` and nothing tells what `obj` is.
+
+        Args:
+            node_name (str): The node to analyze.
+
+        Returns:
+            Optional[Dict[str, Any]]: {'dependencies': internal then external
+            names, 'external': name -> import path, 'unresolved': names left
+            for the LLM}, or None if the node's source does not parse.
+        """
+        data = self.graph.nodes[node_name]
+        summary = summarize_source(get_node_source(data))
+        if summary is None:
+            return None
+        file_summary = self._file_summary(data)
+        imports = {**file_summary.imports, **summary.imports}
+        bound = summary.bound | file_summary.bound
+        if data.get('category') == 'class':
+            owner = node_name
+        elif '.' in node_name and '::' not in node_name:
+            owner = node_name.rsplit('.', 1)[0]
+        else:
+            owner = None
+        attribute_types = self._class_summary(owner).attribute_types
+        file_nodes = set(self.file_index.get(data.get('fname', ''), ()))
+
+        internal = [dep for dep in self.searcher.get_dependencies(node_name) if dep != node_name]
+        seen = set(internal)
+        external = {}
+        unresolved = []
+        for call in summary.calls:
+            kind, target = self._classify_call(call, owner, imports, bound, summary.local_types,
+                                               attribute_types, seen, file_nodes)
+            if kind == 'internal' and target != node_name and target not in seen:
+                seen.add(target)
+                internal.append(target)
+            elif kind == 'external':
+                external[call.name] = target
+            elif kind == 'unresolved':
+                unresolved.append(call.name)
+        return {
+            'dependencies': internal + [name for name in external if name not in seen],
+            'external': external,
+            'unresolved': unresolved,
+        }
+
+    def _classify_call(self, call, owner: Optional[str], imports: Dict[str, str], bound: set,
+                       local_types: Dict[str, str], attribute_types: Dict[str, str],
+                       successors: set, file_nodes: set) -> Tuple[str, Optional[str]]:
+        """(kind, target) for one CallSite; see resolve_static_dependencies."""
+        parts = call.name.split('.')
+        attribute = parts[-1]
+        if attribute.startswith('__') and attribute.endswith('__'):
+            return 'ignored', None
+        if not call.chained and len(parts) == 1:
+            if self.graph.has_node(attribute):
+                return 'internal', attribute
+            if attribute in imports:
+                imported = imports[attribute].rsplit('.', 1)[-1]
+                if self.graph.has_node(imported):
+                    return 'internal', imported
+                return 'external', imports[attribute]
+            if attribute in bound or attribute in BUILTIN_NAMES:
+                return 'ignored', None
+            return 'unresolved', None
+
+        root = None if call.chained else parts[0]
+        if root is not None:
+            if self.graph.has_node(call.name):
+                return 'internal', call.name
+            if root in ('self', 'cls') and owner and len(parts) == 2 and self.graph.has_node(f"{owner}.{attribute}"):
+                return 'internal', f"{owner}.{attribute}"
+            if root in imports and root not in local_types:
+                if attribute in successors:
+                    return 'internal', attribute
+                return 'external', '.'.join([imports[root]] + parts[1:])
+            if root == 'self' and len(parts) == 3 and parts[1] in attribute_types:
+                class_name = attribute_types[parts[1]]
+                if self.graph.has_node(f"{class_name}.{attribute}"):
+                    return 'internal', f"{class_name}.{attribute}"
+                if not self.graph.has_node(class_name):
+                    return 'ignored', None
+            if len(parts) == 2 and root in local_types:
+                class_name = local_types[root]
+                if self.graph.has_node(f"{class_name}.{attribute}"):
+                    return 'internal', f"{class_name}.{attribute}"
+                if not self.graph.has_node(class_name):
+                    return 'ignored', None
+
+        # Only classes the file defines or imports can be the receiver's class
+        in_scope = {imported.rsplit('.', 1)[-1] for imported in imports.values()}
+        candidates = [method for method in self.method_index.get(attribute, [])
+                      if method.rsplit('.', 1)[0] in in_scope or method.rsplit('.', 1)[0] in file_nodes]
+        if not candidates:
+            return 'ignored', None
+        if root in ('self', 'cls') and len(parts) == 2 and len(candidates) == 1:
+            return 'internal', candidates[0]
+        return 'unresolved', None
+
     def search_dependency(self, dep_name: str) -> List[Dict[str, Any]]:
         """
         Searches for a dependency node in the graph using multiple strategies and returns a list of potential matches with confidence scores.
@@ -87,7 +388,8 @@ class EnhancedDependencySearcher:
         The search is performed in the following order:
         1. Exact match: Checks if the dependency name exactly matches a node in the graph.
         2. Case-insensitive match: Looks for a node name that matches the dependency name, ignoring case.
-        3. Fuzzy match: Uses SequenceMatcher to find nodes with high similarity to the dependency name.
+        3. Fuzzy match: Uses SequenceMatcher to find nodes with high similarity to the dependency name,
+           scoring only the nodes a bigram index (FuzzyNameIndex) shortlists as able to pass the threshold.
         4. Method name search: Finds nodes that match the dependency as a method name (for unqualified method calls).
         5. Import alias resolution: Recognizes common import aliases (e.g., 'np' for 'numpy') and maps them to their actual package names.
 
@@ -128,16 +430,17 @@ class EnhancedDependencySearcher:
                 'data': self.graph.nodes[actual_name]
             })
         
-        # Strategy 3: Partial match with fuzzy matching
-        for node in self.graph.nodes():
-            similarity = SequenceMatcher(None, dep_name.lower(), node.lower()).ratio()
-            if similarity > 0.8:  # High similarity threshold
-                results.append({
-                    'node': node,
-                    'confidence': similarity,
-                    'strategy': 'fuzzy_match',
-                    'data': self.graph.nodes[node]
-                })
+        # Strategy 3: Partial match with fuzzy matching; the bigram index
+        # shortlists the nodes that can reach the threshold before scoring them
+        fuzzy_index = self._fuzzy_name_index()
+        for position, similarity in fuzzy_index.matches(dep_name, 0.8):  # High similarity threshold
+            node = fuzzy_index.names[position]
+            results.append({
+                'node': node,
+                'confidence': similarity,
+                'strategy': 'fuzzy_match',
+                'data': self.graph.nodes[node]
+            })
         
         # Strategy 4: Method name search (for unqualified method calls)
         if dep_name in self.method_index:
@@ -172,21 +475,34 @@ class EnhancedDependencySearcher:
 
 def initialize_documentation_queue(state: AgentState) -> dict:
     """
-    Initializes the agent's state by identifying all "leaf" nodes and
-    setting up the master tracking set.
+    Initializes the agent's state: schedules every node once up front and
+    queues the first wave of ready nodes (the leaves, plus one node of every
+    dependency cycle with nothing outside it left to document).
     """
     print("--- Initializing Documentation Queue ---")
     repo_graph = state['repo_graph']
     all_nodes = set(repo_graph.nodes())
-    
-    leaf_nodes = [node for node in repo_graph.nodes() if repo_graph.out_degree(node) == 0]
 
-    print(f"Found {len(leaf_nodes)} leaf nodes to start with across all components.")
+    start = time.perf_counter()
+    scheduler = TopologicalScheduler(RepoSearcher(graph=repo_graph).get_statistics_engine())
+    summary = scheduler.summary()
+    print(f"Scheduled {summary['nodes']} nodes in {time.perf_counter() - start:.2f}s: "
+          f"{summary['initially_ready']} leaf nodes, {summary['cycles']} dependency cycles covering "
+          f"{summary['nodes_in_cycles']} nodes (largest {summary['largest_cycle']}), "
+          f"{summary['self_loops']} self-references ignored.")
+    nodes_to_document = deque(scheduler.next_wave())
+
+    # Indexed once here and shared by every gather_documentation_context call
+    start = time.perf_counter()
+    dependency_searcher = EnhancedDependencySearcher(repo_graph)
+    print(f"Built dependency search indices in {time.perf_counter() - start:.2f}s.")
     
     return {
         "nodes_to_process": all_nodes,
         "documented_nodes": {},
-        "nodes_to_document": leaf_nodes,
+        "nodes_to_document": nodes_to_document,
+        "scheduler": scheduler,
+        "dependency_searcher": dependency_searcher,
         "is_finished": False,
     }
 
@@ -195,18 +511,17 @@ def select_next_node(state: AgentState) -> dict:
     Selects the next node to document from the queue or remaining nodes.
 
     This function manages the process of determining which code node should be documented next.
-    It first checks the primary queue (`nodes_to_document`). If the queue is empty, it looks for
-    any remaining undocumented nodes in the repository graph and selects one to break cycles or
-    start a new component. The function prints informative messages about its decision process.
+    It first checks the primary queue (`nodes_to_document`). If the queue is empty, it asks the
+    run's scheduler for the next wave of ready nodes, which also breaks dependency cycles. The
+    function prints informative messages about its decision process.
 
     Steps:
     1. Prints a header indicating the selection process has started.
     2. Retrieves the current queue of nodes to document from the agent state.
     3. If the queue is empty:
-        a. Prints a message and computes the set of remaining undocumented nodes.
-        b. If there are no remaining nodes, prints a message and returns a flag indicating completion.
-        c. Otherwise, selects the first remaining node to continue processing and prints its name.
-    4. If the queue is not empty, pops the next node from the queue.
+        a. Prints a message and fills the queue with the scheduler's next wave.
+        b. If the wave is empty, prints a message and returns a flag indicating completion.
+    4. Pops the next node from the front of the queue.
     5. Retrieves information about the selected node from the repository graph.
     6. Prints the selected node and its category.
     7. Returns a dictionary containing the selected node's name, its info, and the updated queue.
@@ -226,16 +541,13 @@ def select_next_node(state: AgentState) -> dict:
     nodes_to_document = state['nodes_to_document']
     
     if not nodes_to_document:
-        print("Primary queue is empty. Checking for remaining undocumented nodes...")
-        remaining_nodes = state['nodes_to_process'] - set(state['documented_nodes'].keys())
-        if not remaining_nodes:
+        print("Primary queue is empty. Releasing the next wave of ready nodes...")
+        nodes_to_document.extend(state['scheduler'].next_wave())
+        if not nodes_to_document:
             print("No remaining nodes to document.")
             return {"is_finished": True}
-        
-        next_node_name = list(remaining_nodes)[0]
-        print(f"Force-selecting '{next_node_name}' to break a cycle or start a new component.")
-    else:
-        next_node_name = nodes_to_document.pop(0)
+
+    next_node_name = nodes_to_document.popleft()
 
     node_info = state['repo_graph'].nodes[next_node_name]
     print(f"Selected: '{next_node_name}' (Category: {node_info.get('category')})")
@@ -246,104 +558,110 @@ def select_next_node(state: AgentState) -> dict:
         "nodes_to_document": nodes_to_document,
     }
 
-def gather_documentation_context(state: AgentState) -> dict:
+def _edge_priority(repo_graph: nx.MultiDiGraph, node_name: Optional[str], dep_name: str) -> int:
+    """EDGE_PRIORITY of the strongest edge from node_name to dep_name; len(EDGE_PRIORITY) without one."""
+    no_edge = len(EDGE_PRIORITY)
+    if node_name is None or not repo_graph.has_edge(node_name, dep_name):
+        return no_edge
+    return min(EDGE_PRIORITY.get(data.get('label'), no_edge - 1)
+               for data in repo_graph.get_edge_data(node_name, dep_name).values())
+
+def _summary_line(text: str, skip_prefixes: Tuple[str, ...] = ('#', '```', '---', '@')) -> str:
+    """The first line of `text` that says something: not a heading, fence, rule or decorator."""
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith(skip_prefixes):
+            return line[:300]
+    return ""
+
+def _context_item(dep_name: str, dep_info: Dict[str, Any], documented_nodes: Dict[str, str]) -> ContextItem:
+    """The full and one-line context blocks for one resolved dependency."""
+    source = dep_info['source']
+    actual_name = dep_info.get('actual_name', dep_name)
+    documentation = dep_info['content'] if source == 'documented' else documented_nodes.get(actual_name)
+    if source == 'external':
+        actual_name = dep_info.get('content', {}).get('actual_name', dep_name) if dep_info.get('content') else dep_name
+        context_block = f"### Dependency: `{dep_name}` [External Library]\n\n"
+        context_block += f"This appears to be an external library"
+        if actual_name != dep_name:
+            context_block += f" (likely `{actual_name}`)"
+        context_block += ".\n\n---\n\n"
+        return ContextItem(dep_name, context_block, context_block)
+
+    if source.startswith('search_'):
+        strategy = source.replace('search_', '').replace('_', ' ').title()
+        heading = (f"### Dependency: `{dep_name}` → `{actual_name}` [Found via {strategy}] "
+                   f"(Confidence: {dep_info.get('confidence', 1.0):.0%})")
+    else:
+        heading = f"### Dependency: `{dep_name}`"
+
+    if documentation is not None:
+        label = " [Documented]" if source == 'documented' else ""
+        context_block = f"{heading}{label}\n\n{documentation}\n\n---\n\n"
+        summary = _summary_line(documentation)
+    else:
+        dep_data = dep_info['content']
+        dep_code = get_node_source(dep_data, '# Source code not available')
+        dep_docstring = dep_data.get('docstring', 'No docstring available.')
+        label = " [From Source]" if source == 'graph' else ""
+        context_block = (
+            f"{heading}{label}\n\n"
+            f"**Docstring:**\n```\n{dep_docstring}\n```\n\n"
+            f"**Source Code:**\n```python\n{dep_code}\n```\n\n---\n\n"
+        )
+        summary = _summary_line(dep_docstring or '') or _summary_line(dep_code)
+    return ContextItem(dep_name, context_block, f"{heading} [Summary]\n\n{summary}\n\n---\n\n")
+
+def _describe_budget_use(context_metadata: dict) -> str:
+    """'1234 / 6000 (5 full, 1 truncated, 2 summarized, 0 omitted)' for the log."""
+    budget_use = context_metadata.get('context_budget')
+    if budget_use is None:
+        return str(context_metadata.get('context_tokens', 0))
+    return (f"{budget_use['tokens']} / {budget_use['budget']} ({len(budget_use['full'])} full, "
+            f"{len(budget_use['truncated'])} truncated, {len(budget_use['minimal'])} summarized, "
+            f"{len(budget_use['omitted'])} omitted)")
+
+def log_prompt_size(context_metadata: dict, step: str, template: str, variables: Dict[str, Any]) -> int:
+    """Counts the tokens of a prompt about to be sent, prints them and records them under context_metadata['prompt_tokens']."""
+    tokens = count_tokens(template) + sum(count_tokens(str(value)) for value in variables.values())
+    context_metadata.setdefault('prompt_tokens', {})[step] = tokens
+    print(f"  Prompt size ({step}): {tokens} tokens")
+    return tokens
+
+def compile_dependency_context(dependencies: List[str], repo_graph: nx.MultiDiGraph, documented_nodes: Dict[str, str],
+                               enhanced_searcher: "EnhancedDependencySearcher",
+                               external: Optional[Dict[str, str]] = None, node_name: Optional[str] = None,
+                               token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET) -> Tuple[str, Dict[str, Any]]:
     """
-    Gathers and compiles context for documenting the current code node, including advanced dependency analysis and confidence scoring.
+    Resolves dependency names to documentation, graph nodes, search matches or
+    external libraries, and compiles them into the LLM context string.
 
-    Steps:
-    1. Checks if the documentation process is finished; if so, returns an empty dictionary.
-    2. Retrieves the current node's name, info, the repository graph, and already documented nodes from the state.
-    3. Initializes an EnhancedDependencySearcher for advanced dependency lookups.
-    4. Uses an LLM (or a regex fallback) to analyze the current node's code and identify dependencies.
-        - If the LLM fails, falls back to regex-based extraction.
-        - Filters out common Python keywords from dependencies.
-    5. For each dependency:
-        - If already documented, adds its content to the context.
-        - If present in the repo graph, adds its node data to the context.
-        - Otherwise, marks it for enhanced search.
-    6. For dependencies not found, uses EnhancedDependencySearcher to find the best match and adds the result to the context, including confidence and strategy.
-    7. Compiles a context string for the LLM, including docstrings, code, or external library notes for each dependency.
-    8. Calculates and records confidence scores and metadata about the context gathering process.
-    9. Prints a summary of the context gathering results, including counts and average confidence.
-    10. Returns a dictionary containing:
-        - "context_for_llm": The compiled context string for use in documentation generation.
-        - "context_metadata": Metadata including dependency counts, sources, and confidence scores.
+    The context is kept within `token_budget` tokens: dependencies are ranked
+    by the edge from `node_name` to them (EDGE_PRIORITY), then by confidence.
+    Documented dependencies contribute their generated documentation rather
+    than their source. Lower-ranked ones are truncated or reduced to a
+    one-line summary, and left out entirely if even those do not fit.
 
     Args:
-        state (AgentState): The current agent state, including the node to document, the repo graph, and documented nodes.
+        dependencies (List[str]): Names the current node uses.
+        repo_graph (nx.MultiDiGraph): The AST code graph.
+        documented_nodes (Dict[str, str]): Documentation written so far.
+        enhanced_searcher (EnhancedDependencySearcher): Resolves names not in the graph.
+        external (Dict[str, str]): Names already known to be imported from
+            outside the repository, with their import paths; these skip the search.
+        node_name (str): The node being documented, for ranking by edge type.
+        token_budget (int): Maximum tokens for the context string.
 
     Returns:
-        dict: {
-            "context_for_llm": str,  # Markdown-formatted context for the LLM
-            "context_metadata": dict # Metadata about dependencies and confidence
-        }
+        Tuple[str, Dict[str, Any]]: The Markdown context and its metadata
+        (dependency counts by source, confidence scores and the token budget use).
     """
-    if state.get("is_finished"):
-        return {}
-    
-    current_node_name = state['current_node_name']
-    current_node_info = state['current_node_info']
-    repo_graph = state['repo_graph']
-    documented_nodes = state['documented_nodes']
-    
-    print(f"\n{'='*60}")
-    print(f"ENHANCED CONTEXT GATHERING FOR: '{current_node_name}'")
-    print(f"{'='*60}")
-    
-    # Initialize enhanced searcher
-    enhanced_searcher = EnhancedDependencySearcher(repo_graph)
-    
-    # Step A: Use an LLM to find out what functions/classes are being called.
-    print("\n[STEP A] Analyzing code to identify dependencies...")
-    llm = AzureChatOpenAI(deployment_name=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"), 
-                          temperature=0.0, max_tokens=1024)
-    prompt = PromptTemplate.from_template(CODE_ANALYSIS_PROMPT_TEMPLATE)
-    chain = prompt | llm | JsonOutputParser()
-    
-    dependencies = []
-    try:
-        analysis_result = chain.invoke({
-            "source_code": current_node_info.get('info', '')
-        })
-        
-        # Handle different response formats
-        if isinstance(analysis_result, list):
-            dependencies = analysis_result
-        elif isinstance(analysis_result, dict) and 'dependencies' in analysis_result:
-            dependencies = analysis_result['dependencies']
-        else:
-            dependencies = []
-            
-        print(f"✓ Identified {len(dependencies)} dependencies: {dependencies}")
-        
-    except Exception as e:
-        print(f"✗ Error in dependency analysis: {str(e)}")
-        print("  Attempting fallback regex-based extraction...")
-        
-        # Fallback: Simple regex-based extraction
-        source_code = current_node_info.get('info', '')
-        patterns = [
-            r'(\w+)\s*\(',  # Function calls
-            r'(\w+\.\w+)\s*\(',  # Method calls
-            r'(\w+)\s*=\s*(\w+)\(',  # Assignments with calls
-            r'from\s+\w+\s+import\s+(\w+)',  # Imports
-            r'import\s+(\w+)'  # Direct imports
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, source_code)
-            dependencies.extend([m if isinstance(m, str) else m[-1] for m in matches])
-        
-        # Remove duplicates and filter out common keywords
-        keywords = {'self', 'def', 'class', 'return', 'if', 'else', 'for', 'while', 'in', 'and', 'or', 'not'}
-        dependencies = list(set(dep for dep in dependencies if dep not in keywords))
-        print(f"✓ Fallback extraction found {len(dependencies)} potential dependencies")
-
     # Step B & C: Check for existing documentation and fetch missing info using enhanced search
     print("\n[STEP B & C] Verifying context and fetching missing information...")
     context_str = ""
     available_context = {}
     search_required = []
+    external = external or {}
     
     # First check what's immediately available
     for dep_name in dependencies:
@@ -361,6 +679,13 @@ def gather_documentation_context(state: AgentState) -> dict:
                 'content': repo_graph.nodes[dep_name],
                 'confidence': 1.0
             }
+        elif dep_name in external:
+            print(f"  ✓ '{dep_name}' - Imported from '{external[dep_name]}'")
+            available_context[dep_name] = {
+                'source': 'external',
+                'content': {'external': True, 'actual_name': external[dep_name]},
+                'confidence': 0.9
+            }
         else:
             print(f"  ✗ '{dep_name}' - Not found, search required")
             search_required.append(dep_name)
@@ -418,52 +743,177 @@ def gather_documentation_context(state: AgentState) -> dict:
             'external': sum(1 for v in available_context.values() if v['source'] == 'external')
         },
         'confidence_scores': [],
-        'average_confidence': 1.0
+        'average_confidence': 1.0,
     }
     
-    # Build context string
+    # Build context string, most relevant dependencies first, within the token budget
     if not dependencies:
         context_str = "This node has no identified internal dependencies."
     else:
-        for dep_name, dep_info in available_context.items():
+        ranked = []
+        for position, (dep_name, dep_info) in enumerate(available_context.items()):
             confidence = dep_info.get('confidence', 1.0)
             context_metadata['confidence_scores'].append(confidence)
-            context_block = ""
-            
-            if dep_info['source'] == 'documented':
-                context_block = f"### Dependency: `{dep_name}` [Documented]\n\n{dep_info['content']}\n\n---\n\n"
-            elif dep_info['source'] == 'graph':
-                dep_data = dep_info['content']
-                dep_code = dep_data.get('info', '# Source code not available')
-                dep_docstring = dep_data.get('docstring', 'No docstring available.')
-                context_block = (
-                    f"### Dependency: `{dep_name}` [From Source]\n\n"
-                    f"**Docstring:**\n```\n{dep_docstring}\n```\n\n"
-                    f"**Source Code:**\n```python\n{dep_code}\n```\n\n---\n\n"
-                )
-            elif dep_info['source'].startswith('search_'):
-                actual_name = dep_info.get('actual_name', dep_name)
-                dep_data = dep_info['content']
-                strategy = dep_info['source'].replace('search_', '').replace('_', ' ').title()
-                context_block = (
-                    f"### Dependency: `{dep_name}` → `{actual_name}` [Found via {strategy}] (Confidence: {confidence:.0%})\n\n"
-                    f"**Docstring:**\n```\n{dep_data.get('docstring', 'No docstring available.')}\n```\n\n"
-                    f"**Source Code:**\n```python\n{dep_data.get('info', '# Source code not available')}\n```\n\n---\n\n"
-                )
-            else:  # external
-                actual_name = dep_info.get('content', {}).get('actual_name', dep_name) if dep_info.get('content') else dep_name
-                context_block = f"### Dependency: `{dep_name}` [External Library]\n\n"
-                context_block += f"This appears to be an external library"
-                if actual_name != dep_name:
-                    context_block += f" (likely `{actual_name}`)"
-                context_block += ".\n\n---\n\n"
-            
-            context_str += context_block
+            rank = (_edge_priority(repo_graph, node_name, dep_info.get('actual_name', dep_name)), -confidence, position)
+            ranked.append((rank, _context_item(dep_name, dep_info, documented_nodes)))
+        ranked.sort(key=lambda entry: entry[0])
+        context_str, budget_use = fit_to_budget([item for _, item in ranked], token_budget)
+        context_metadata['context_budget'] = budget_use
+    context_metadata['context_tokens'] = count_tokens(context_str)
     
     # Calculate average confidence
     if context_metadata['confidence_scores']:
         context_metadata['average_confidence'] = sum(context_metadata['confidence_scores']) / len(context_metadata['confidence_scores'])
     
+    return context_str, context_metadata
+
+
+def _analyze_dependencies_with_llm(node_info: Dict[str, Any], static: Optional[Dict[str, Any]],
+                                   prompt_log: dict) -> List[str]:
+    """
+    Asks the LLM for the calls in a node's source. If that fails, falls back
+    to the names static resolution left unresolved, or, without a static
+    result, to regex extraction. The prompt size goes into `prompt_log`.
+    """
+    chain = get_chain(CODE_ANALYSIS_PROMPT_TEMPLATE, JsonOutputParser, temperature=0.0, max_tokens=1024)
+    
+    dependencies = []
+    try:
+        variables = {"source_code": get_node_source(node_info)}
+        log_prompt_size(prompt_log, 'dependency_analysis', CODE_ANALYSIS_PROMPT_TEMPLATE, variables)
+        analysis_result = chain.invoke(variables)
+        
+        # Handle different response formats
+        if isinstance(analysis_result, list):
+            dependencies = analysis_result
+        elif isinstance(analysis_result, dict) and 'dependencies' in analysis_result:
+            dependencies = analysis_result['dependencies']
+        else:
+            dependencies = []
+            
+        print(f"✓ Identified {len(dependencies)} dependencies: {dependencies}")
+        
+    except Exception as e:
+        print(f"✗ Error in dependency analysis: {str(e)}")
+        if static is not None:
+            print("  Keeping the unresolved names as written for the enhanced search.")
+            return list(static['unresolved'])
+        print("  Attempting fallback regex-based extraction...")
+        
+        # Fallback: Simple regex-based extraction
+        source_code = get_node_source(node_info)
+        patterns = [
+            r'(\w+)\s*\(',  # Function calls
+            r'(\w+\.\w+)\s*\(',  # Method calls
+            r'(\w+)\s*=\s*(\w+)\(',  # Assignments with calls
+            r'from\s+\w+\s+import\s+(\w+)',  # Imports
+            r'import\s+(\w+)'  # Direct imports
+        ]
+        
+        for pattern in patterns:
+            matches = re.findall(pattern, source_code)
+            dependencies.extend([m if isinstance(m, str) else m[-1] for m in matches])
+        
+        # Remove duplicates and filter out common keywords
+        keywords = {'self', 'def', 'class', 'return', 'if', 'else', 'for', 'while', 'in', 'and', 'or', 'not'}
+        dependencies = list(set(dep for dep in dependencies if dep not in keywords))
+        print(f"✓ Fallback extraction found {len(dependencies)} potential dependencies")
+    return dependencies
+
+def gather_documentation_context(state: AgentState) -> dict:
+    """
+    Gathers and compiles context for documenting the current code node, including advanced dependency analysis and confidence scoring.
+
+    Steps:
+    1. Checks if the documentation process is finished; if so, returns an empty dictionary.
+    2. Retrieves the current node's name, info, the repository graph, and already documented nodes from the state.
+    3. Reuses the run's EnhancedDependencySearcher (synced with the graph), building one only if the state has none.
+    4. Resolves dependencies statically from the node's graph successors and an AST walk of its code
+       (EnhancedDependencySearcher.resolve_static_dependencies).
+        - Only if names stay unresolved (or the code does not parse) is the LLM asked, and its answer is
+          added to the static result.
+        - If the LLM fails, keeps the unresolved names, or without a static result falls back to regex extraction.
+    5. For each dependency:
+        - If already documented, adds its content to the context.
+        - If present in the repo graph, adds its node data to the context.
+        - Otherwise, marks it for enhanced search.
+    6. For dependencies not found, uses EnhancedDependencySearcher to find the best match and adds the result to the context, including confidence and strategy.
+    7. Compiles a context string for the LLM, including docstrings, code, or external library notes for each dependency.
+    8. Calculates and records confidence scores and metadata about the context gathering process.
+    9. Prints a summary of the context gathering results, including counts and average confidence.
+    10. Returns a dictionary containing:
+        - "context_for_llm": The compiled context string for use in documentation generation.
+        - "context_metadata": Metadata including dependency counts, sources, confidence scores, how
+          dependencies were resolved ('static', 'static+llm' or 'llm') and timings.
+
+    Args:
+        state (AgentState): The current agent state, including the node to document, the repo graph, and documented nodes.
+
+    Returns:
+        dict: {
+            "context_for_llm": str,  # Markdown-formatted context for the LLM
+            "context_metadata": dict # Metadata about dependencies and confidence
+        }
+    """
+    if state.get("is_finished"):
+        return {}
+    
+    current_node_name = state['current_node_name']
+    current_node_info = state['current_node_info']
+    repo_graph = state['repo_graph']
+    documented_nodes = state['documented_nodes']
+    
+    print(f"\n{'='*60}")
+    print(f"ENHANCED CONTEXT GATHERING FOR: '{current_node_name}'")
+    print(f"{'='*60}")
+    
+    # Reuse the run's enhanced searcher; its indices cover the whole graph
+    gather_start = time.perf_counter()
+    enhanced_searcher = state.get('dependency_searcher')
+    searcher_built = enhanced_searcher is None or enhanced_searcher.graph is not repo_graph
+    if searcher_built:
+        enhanced_searcher = EnhancedDependencySearcher(repo_graph)
+    else:
+        enhanced_searcher.sync()
+    setup_seconds = time.perf_counter() - gather_start
+    
+    # Step A: Resolve dependencies from the graph and an AST walk; only names
+    # that stay ambiguous are worth an LLM call.
+    print("\n[STEP A] Resolving dependencies from the code graph and source...")
+    static = enhanced_searcher.resolve_static_dependencies(current_node_name)
+    prompt_log = {}
+    if static is not None and not static['unresolved']:
+        dependencies = static['dependencies']
+        dependency_analysis = 'static'
+        print(f"✓ Resolved {len(dependencies)} dependencies statically: {dependencies}")
+    else:
+        if static is None:
+            dependency_analysis = 'llm'
+            print("  Source could not be parsed; asking the LLM.")
+        else:
+            dependency_analysis = 'static+llm'
+            print(f"  {len(static['unresolved'])} unresolved names, asking the LLM: {static['unresolved']}")
+        dependencies = _analyze_dependencies_with_llm(current_node_info, static, prompt_log)
+        if static is not None:
+            resolved = set(static['dependencies'])
+            dependencies = static['dependencies'] + [dep for dep in dependencies if dep not in resolved]
+
+    analysis_seconds = time.perf_counter() - gather_start - setup_seconds
+
+    search_start = time.perf_counter()
+    context_str, context_metadata = compile_dependency_context(
+        dependencies, repo_graph, documented_nodes, enhanced_searcher, static['external'] if static else None,
+        current_node_name, state.get('context_token_budget', DEFAULT_CONTEXT_TOKEN_BUDGET))
+    context_metadata.update(prompt_log)
+    context_metadata['dependency_analysis'] = dependency_analysis
+    context_metadata['unresolved_names'] = static['unresolved'] if static else []
+    context_metadata['timing'] = {
+        'searcher_setup_seconds': setup_seconds,
+        'analysis_seconds': analysis_seconds,
+        'search_seconds': time.perf_counter() - search_start,
+    }
+    context_metadata['timing']['total_seconds'] = time.perf_counter() - gather_start
+
     # Print summary
     print(f"\n📊 Context Gathering Summary:")
     print(f"  - Total Dependencies: {context_metadata['total_dependencies']}")
@@ -472,14 +922,33 @@ def gather_documentation_context(state: AgentState) -> dict:
     print(f"  - Via Search: {context_metadata['found']['search']}")
     print(f"  - External: {context_metadata['found']['external']}")
     print(f"  - Average Confidence: {context_metadata['average_confidence']:.1%}")
+    print(f"  - Context Tokens: {_describe_budget_use(context_metadata)}")
+    timing = context_metadata['timing']
+    print(f"  - Time: {timing['total_seconds']:.2f}s (searcher {timing['searcher_setup_seconds']:.3f}s"
+          f"{', built' if searcher_built else ''}, analysis {timing['analysis_seconds']:.2f}s, "
+          f"search {timing['search_seconds']:.3f}s)")
     print(f"{'='*60}\n")
     
-    return {
+    result = {
         "context_for_llm": context_str,
         "context_metadata": context_metadata
     }
+    if searcher_built:
+        result["dependency_searcher"] = enhanced_searcher
+    return result
 
 
+def annotate_documentation(generated_doc: str, context_metadata: dict) -> str:
+    """Prepends a quality note (and the dependency list, if known) when the context confidence is low."""
+    if context_metadata.get('average_confidence', 1.0) >= 0.7:
+        return generated_doc
+    quality_note = "\n> ⚠️ **Note**: Some dependencies could not be fully resolved. Documentation may be incomplete.\n"
+    dependencies = context_metadata.get('dependencies', [])
+    dependencies_section = ""
+    if dependencies:
+        dependencies_section = "\n**Dependencies:**\n" + "\n".join(f"- `{dep}`" for dep in dependencies) + "\n"
+    return quality_note + dependencies_section + generated_doc
+
 def generate_documentation(state: AgentState) -> dict:
     """
     Invokes the LLM to generate documentation for the current node.
@@ -489,29 +958,10 @@ def generate_documentation(state: AgentState) -> dict:
     print(f"--- Generating Documentation for '{state['current_node_name']}' ---")
     
     node_info = state['current_node_info']
-    context_metadata = state.get('context_metadata', {})
-    
-    # Add quality warning if confidence is low
-    quality_note = ""
-    if context_metadata.get('average_confidence', 1.0) < 0.7:
-        quality_note = "\n> ⚠️ **Note**: Some dependencies could not be fully resolved. Documentation may be incomplete.\n"
-    
-    llm = AzureChatOpenAI(deployment_name=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"), temperature=0.2, max_tokens=1024)
-    prompt = PromptTemplate.from_template(DOCUMENTATION_PROMPT_TEMPLATE)
-    chain = prompt | llm | StrOutputParser()
-    ### Dependency Adding
-    dependencies = context_metadata.get('dependencies', [])
-    if not dependencies and 'context_for_llm' in state:
-        # Optionally, extract dependency names from the context string if not present in metadata
-        # (You may want to explicitly pass the dependency list in gather_documentation_context)
-        dependencies = []  # fallback: leave empty or parse from context string if needed
+    chain = get_chain(DOCUMENTATION_PROMPT_TEMPLATE, StrOutputParser, temperature=0.2, max_tokens=1024)
 
-    dependencies_section = ""
-    if dependencies:
-        dependencies_section = "\n**Dependencies:**\n" + "\n".join(f"- `{dep}`" for dep in dependencies) + "\n"
-        
     print("Invoking LLM for documentation...")
-    generated_doc = chain.invoke({
+    variables = {
         "node_name": state['current_node_name'],
         "node_category": node_info.get('category', 'N/A'),
         "node_fname": node_info.get('fname', 'N/A'),
@@ -519,12 +969,12 @@ def generate_documentation(state: AgentState) -> dict:
         "node_line_end": node_info.get('line', [0, 0])[1],
         "node_docstring": node_info.get('docstring', 'Not available.'),
         "dependencies_context": state['context_for_llm'],
-        "source_code": node_info.get('info', '# Source code not available')
-    })
-    
-    # Prepend quality note if needed
-    if quality_note:
-        generated_doc = quality_note + dependencies_section + generated_doc
+        "source_code": get_node_source(node_info, '# Source code not available')
+    }
+    context_metadata = state.get('context_metadata', {})
+    log_prompt_size(context_metadata, 'documentation', DOCUMENTATION_PROMPT_TEMPLATE, variables)
+    generated_doc = chain.invoke(variables)
+    generated_doc = annotate_documentation(generated_doc, context_metadata)
     
     documented_nodes = state['documented_nodes']
     documented_nodes[state['current_node_name']] = generated_doc
@@ -539,7 +989,7 @@ def generate_conceptual_graph_data(state: AgentState) -> dict:
     1. Checks if the documentation process is finished; if so, returns an empty dictionary.
     2. Retrieves the current node's name and prints a header for conceptual graph generation.
     3. Gets context metadata from the state for use in confidence scoring.
-    4. Initializes an AzureChatOpenAI LLM and prepares a prompt for conceptual graph analysis.
+    4. Takes the shared conceptual graph analysis chain (LLM and prompt) from core.llm_provider.
     5. Invokes the LLM to generate semantic metadata and conceptual relationships for the current node.
     6. Retrieves the conceptual graph and base metadata for the current node from the repository graph.
     7. Merges LLM-generated semantic metadata with AST metadata, including context confidence.
@@ -563,26 +1013,50 @@ def generate_conceptual_graph_data(state: AgentState) -> dict:
     current_node = state['current_node_name']
     print(f"--- Generating Conceptual Graph Data for '{current_node}' ---")
 
-    context_metadata = state.get('context_metadata', {})
-    
-    llm = AzureChatOpenAI(deployment_name=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"), temperature=0.0, max_tokens=1024)
-    prompt = PromptTemplate.from_template(CONCEPTUAL_GRAPH_PROMPT_TEMPLATE)
-    chain = prompt | llm | JsonOutputParser()
+    response_data, error = request_conceptual_data(state)
+    return merge_conceptual_data(state, current_node, state['documented_nodes'][current_node],
+                                 state.get('context_metadata', {}), response_data, error,
+                                 state['conceptual_graph'], state['final_output_data'])
+
+def request_conceptual_data(state: AgentState) -> Tuple[Optional[dict], Optional[Exception]]:
+    """
+    Invokes the LLM for the current node's semantic metadata and conceptual edges.
+
+    Returns:
+        Tuple[Optional[dict], Optional[Exception]]: The parsed response, or the error that prevented it.
+    """
+    current_node = state['current_node_name']
+    chain = get_chain(CONCEPTUAL_GRAPH_PROMPT_TEMPLATE, JsonOutputParser, temperature=0.0, max_tokens=1024)
 
     print("Invoking LLM for conceptual analysis...")
-    
-    final_output_data = state['final_output_data']
-    
     try:
-        response_data = chain.invoke({
+        variables = {
             "node_name": current_node,
             "documentation": state['documented_nodes'][current_node],
             "dependencies_context": state['context_for_llm'],
-            "source_code": state['current_node_info'].get('info', '# Source code not available')
-        })
+            "source_code": get_node_source(state['current_node_info'], '# Source code not available')
+        }
+        log_prompt_size(state.get('context_metadata', {}), 'conceptual', CONCEPTUAL_GRAPH_PROMPT_TEMPLATE, variables)
+        return chain.invoke(variables), None
+    except Exception as e:
+        return None, e
+
+def merge_conceptual_data(state: AgentState, current_node: str, documentation: str, context_metadata: dict,
+                          response_data: Optional[dict], error: Optional[Exception],
+                          conceptual_graph: nx.MultiDiGraph, final_output_data: Dict[str, Any]) -> dict:
+    """
+    Adds one node's conceptual analysis to the conceptual graph and its outputs to final_output_data.
+
+    Edges are only added to nodes already in the conceptual graph, so the
+    order in which nodes are merged decides which edges appear.
+
+    Returns:
+        dict: {"conceptual_graph": ..., "final_output_data": ...}
+    """
+    try:
+        if error is not None:
+            raise error
 
-        conceptual_graph = state['conceptual_graph']
-        
         base_metadata = state['repo_graph'].nodes[current_node]
         semantic_metadata = response_data.get('semantic_metadata', {})
         
@@ -600,14 +1074,14 @@ def generate_conceptual_graph_data(state: AgentState) -> dict:
                 conceptual_graph.add_edge(current_node, target_node, label=edge.get('label', 'RELATED_TO'))
 
         final_output_data[current_node] = {
-            'documentation': state['documented_nodes'][current_node],
+            'documentation': documentation,
             'conceptual_data': response_data,
             'context_metadata': context_metadata
         }
     except Exception as e:
         print(f"Warning: Failed to process conceptual data for node '{current_node}': {e}")
         final_output_data[current_node] = {
-            'documentation': state['documented_nodes'][current_node],
+            'documentation': documentation,
             'conceptual_data': {"error": str(e)},
             'context_metadata': context_metadata
         }
@@ -619,28 +1093,206 @@ def generate_conceptual_graph_data(state: AgentState) -> dict:
 
 def update_documentation_queue(state: AgentState) -> dict:
     """
-    Updates the documentation queue with new nodes that are now ready.
+    Marks the current node as documented in the scheduler, which releases the
+    nodes depending on it once all their dependencies are documented.
     """
     if state.get("is_finished"): return {}
     current_node = state['current_node_name']
     print(f"--- Updating Queue after processing '{current_node}' ---")
+    state['scheduler'].mark_documented(current_node)
+    return {"nodes_to_document": state['nodes_to_document']}
 
-    searcher = RepoSearcher(graph=state['repo_graph'])
-    potential_new_nodes = searcher.get_references(current_node)
+def request_fused_node_data(state: AgentState) -> Tuple[Optional[dict], Optional[Exception]]:
+    """
+    Invokes the LLM once for the current node's dependencies, documentation and
+    conceptual data, and validates the response against FUSED_RESPONSE_SCHEMA.
 
-    nodes_to_document = state['nodes_to_document']
+    Returns:
+        Tuple[Optional[dict], Optional[Exception]]: The validated response, or
+        the error (unparsable JSON or a schema violation) that prevented it.
+    """
+    node_info = state['current_node_info']
+    # Validated inside the chain, so an answer that fails the schema is never cached
+    chain = get_chain(FUSED_NODE_PROMPT_TEMPLATE, JsonOutputParser, validate=validate_fused_response,
+                      temperature=0.0, max_tokens=2048)
+
+    print("Invoking LLM for dependencies, documentation and conceptual analysis in one call...")
+    try:
+        variables = {
+            "node_name": state['current_node_name'],
+            "node_category": node_info.get('category', 'N/A'),
+            "node_fname": node_info.get('fname', 'N/A'),
+            "node_line_start": node_info.get('line', [0, 0])[0],
+            "node_line_end": node_info.get('line', [0, 0])[1],
+            "node_docstring": node_info.get('docstring', 'Not available.'),
+            "dependencies_context": state['context_for_llm'],
+            "source_code": get_node_source(node_info, '# Source code not available')
+        }
+        log_prompt_size(state.get('context_metadata', {}), 'fused', FUSED_NODE_PROMPT_TEMPLATE, variables)
+        return chain.invoke(variables), None
+    except Exception as e:
+        return None, e
+
+def _document_node_fused(state: AgentState) -> Tuple[Optional[Dict[str, Any]], Optional[Exception]]:
+    """
+    Documents the current node with one LLM call. The context comes from
+    static resolution (graph successors, which the scheduler has documented
+    already, plus the AST call walk) instead of from an LLM dependency analysis.
+
+    Returns:
+        Tuple[Optional[Dict[str, Any]], Optional[Exception]]: A result as
+        returned by _document_node, or the error that calls for the fallback.
+    """
+    start = time.perf_counter()
+    node_name = state['current_node_name']
+    repo_graph = state['repo_graph']
+    enhanced_searcher = state.get('dependency_searcher')
+    if enhanced_searcher is None or enhanced_searcher.graph is not repo_graph:
+        enhanced_searcher = EnhancedDependencySearcher(repo_graph)
+    else:
+        enhanced_searcher.sync()
+    static = enhanced_searcher.resolve_static_dependencies(node_name)
+    if static is None:
+        static = {'dependencies': [dep for dep in enhanced_searcher.searcher.get_dependencies(node_name)
+                                   if dep != node_name], 'external': {}}
+    context_str, context_metadata = compile_dependency_context(
+        static['dependencies'], repo_graph, state['documented_nodes'], enhanced_searcher, static['external'],
+        node_name, state.get('context_token_budget', DEFAULT_CONTEXT_TOKEN_BUDGET))
+    context_seconds = time.perf_counter() - start
+
+    response, error = request_fused_node_data({**state, 'context_for_llm': context_str,
+                                               'context_metadata': context_metadata})
+    if error is not None:
+        return None, error
+    context_metadata['mode'] = 'fused'
+    context_metadata['reported_dependencies'] = response['dependencies']
+    context_metadata['timing'] = {
+        'context_seconds': context_seconds,
+        'llm_seconds': time.perf_counter() - start - context_seconds,
+        'total_seconds': time.perf_counter() - start,
+    }
+    return {
+        'node': node_name,
+        'documentation': annotate_documentation(response['documentation'], context_metadata),
+        'context_metadata': context_metadata,
+        'response_data': {key: response[key] for key in ('semantic_metadata', 'semantic_edges')},
+        'error': None,
+    }, None
+
+def _document_node(state: AgentState, node_name: str, fused: bool = False) -> Dict[str, Any]:
+    """
+    Runs gather_documentation_context, generate_documentation and the conceptual
+    LLM request for one node, without touching the shared state: the node's
+    documentation goes into a private layer over `documented_nodes`. With
+    `fused`, a single structured call is tried first, and these three steps
+    only run if its response fails validation.
+    """
+    local_state = dict(state)
+    local_state['documented_nodes'] = ChainMap({}, state['documented_nodes'])
+    local_state['current_node_name'] = node_name
+    local_state['current_node_info'] = state['repo_graph'].nodes[node_name]
+    fused_error = None
+    if fused:
+        result, fused_error = _document_node_fused(local_state)
+        if result is not None:
+            return result
+        print(f"✗ Fused response for '{node_name}' rejected ({fused_error}); falling back to separate calls.")
+    local_state.update(gather_documentation_context(local_state))
+    generate_documentation(local_state)
+    response_data, error = request_conceptual_data(local_state)
+    context_metadata = local_state.get('context_metadata', {})
+    if fused_error is not None:
+        context_metadata['mode'] = 'fused_fallback'
+        context_metadata['fused_error'] = str(fused_error)
+    return {
+        'node': node_name,
+        'documentation': local_state['documented_nodes'][node_name],
+        'context_metadata': context_metadata,
+        'response_data': response_data,
+        'error': error,
+    }
+
+def document_current_node(state: AgentState) -> dict:
+    """
+    Fused-mode replacement for the gather_context -> generate_doc ->
+    generate_conceptual_data steps of the serial loop: documents the current
+    node with one structured LLM call, falling back to the separate calls.
+    """
+    if state.get("is_finished"): return {}
+    current_node = state['current_node_name']
+    print(f"--- Documenting '{current_node}' (fused) ---")
+    result = _document_node(state, current_node, fused=True)
     documented_nodes = state['documented_nodes']
-    
-    for node in potential_new_nodes:
-        if node in documented_nodes or node in nodes_to_document:
-            continue 
-
-        dependencies = searcher.get_dependencies(node)
-        if all(dep in documented_nodes for dep in dependencies):
-            print(f"New node ready for documentation: '{node}'")
-            nodes_to_document.append(node)
-            
-    return {"nodes_to_document": nodes_to_document}
+    documented_nodes[current_node] = result['documentation']
+    merged = merge_conceptual_data(state, current_node, result['documentation'], result['context_metadata'],
+                                   result['response_data'], result['error'], state['conceptual_graph'],
+                                   state['final_output_data'])
+    return {"documented_nodes": documented_nodes, "context_metadata": result['context_metadata'], **merged}
+
+async def _document_wave(state: AgentState, wave: List[str], concurrency: int,
+                         fused: bool = False) -> List[Dict[str, Any]]:
+    """Documents `wave` with at most `concurrency` nodes in flight; results are in wave order."""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def worker(node_name: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await loop.run_in_executor(executor, _document_node, state, node_name, fused)
+        return await asyncio.gather(*(worker(node_name) for node_name in wave))
+
+def document_ready_nodes(state: AgentState, concurrency: int = DEFAULT_CONCURRENCY, fused: bool = False) -> dict:
+    """
+    Documents every node that is ready (its dependencies are documented) at once.
+
+    The concurrent counterpart of one select_node -> gather_context ->
+    generate_doc -> generate_conceptual_data -> update_queue pass. Each ready
+    node runs those steps in its own worker against a snapshot of the state,
+    with up to `concurrency` LLM pipelines in flight. Results are merged into
+    documented_nodes, the conceptual graph and final_output_data in queue
+    order once the whole wave is done, so the outcome does not depend on
+    which request finished first. Waves come from the run's scheduler, which
+    also breaks dependency cycles.
+
+    Args:
+        state (AgentState): The current agent state.
+        concurrency (int): Maximum number of nodes documented at the same time.
+        fused (bool): Document each node with one structured LLM call (see _document_node).
+
+    Returns:
+        dict: The updated "documented_nodes", "conceptual_graph",
+        "final_output_data" and "nodes_to_document", or {"is_finished": True}.
+    """
+    if state.get("is_finished"): return {}
+    documented_nodes = state['documented_nodes']
+    scheduler = state['scheduler']
+    wave = list(state['nodes_to_document']) or scheduler.next_wave()
+    if not wave:
+        print("No remaining nodes to document.")
+        return {"is_finished": True}
+
+    print(f"\n--- Documenting {len(wave)} ready nodes with up to {concurrency} concurrent workers ---")
+    start = time.perf_counter()
+    results = asyncio.run(_document_wave(state, wave, max(1, concurrency), fused))
+
+    # Merge in wave order, independent of completion order
+    conceptual_graph = state['conceptual_graph']
+    final_output_data = state['final_output_data']
+    for result in results:
+        documented_nodes[result['node']] = result['documentation']
+        merge_conceptual_data(state, result['node'], result['documentation'], result['context_metadata'],
+                              result['response_data'], result['error'], conceptual_graph, final_output_data)
+
+    for result in results:
+        scheduler.mark_documented(result['node'])
+
+    print(f"--- Wave done: {len(wave)} nodes in {time.perf_counter() - start:.1f}s; "
+          f"{len(documented_nodes)} / {len(state['nodes_to_process'])} documented ---")
+    return {
+        "documented_nodes": documented_nodes,
+        "conceptual_graph": conceptual_graph,
+        "final_output_data": final_output_data,
+        "nodes_to_document": deque(),
+    }
 
 def should_continue(state: AgentState) -> str:
     """
@@ -3,7 +3,7 @@
 # This file defines the structure of the state object for our LangGraph agent.
 # ENHANCED VERSION: Added context metadata and quality tracking fields
 
-from typing import TypedDict, List, Dict, Set, Any, Optional
+from typing import TypedDict, Deque, List, Dict, Set, Any, Optional
 import networkx as nx
 
 class AgentState(TypedDict):
@@ -17,8 +17,14 @@ class AgentState(TypedDict):
         conceptual_graph: (nx.MultiDiGraph): The new, LLM-generated conceptual graph.
         
         nodes_to_process (Set[str]): A master set of all nodes that need processing.
-        nodes_to_document (List[str]): A queue of node names that are ready to be documented.
+        nodes_to_document (Deque[str]): A queue of node names that are ready to be documented.
+        scheduler (TopologicalScheduler): Dependency counters over repo_graph that release
+            the next wave of ready nodes whenever the queue runs empty.
         documented_nodes (Dict[str, str]): A cache mapping a node's name to its documentation.
+        dependency_searcher (EnhancedDependencySearcher): Dependency lookup indices over
+            repo_graph, built once per run and shared by every context-gathering step.
+        context_token_budget (int): Optional limit on the tokens of each node's dependency
+            context; core.token_budget.DEFAULT_CONTEXT_TOKEN_BUDGET if unset.
         
         # A dictionary to hold all final outputs before saving.
         final_output_data: Dict[str, Any]
@@ -34,6 +40,8 @@ class AgentState(TypedDict):
             - found: breakdown by source (documented, graph, search, external)
             - confidence_scores: list of confidence scores for each dependency
             - average_confidence: overall confidence in the context
+            - context_tokens / context_budget: size of the context and how the budget was spent
+            - prompt_tokens: size of each LLM prompt sent for the node
             - validation: results from context validation if performed
         
         # A flag to signal the end of the process.
@@ -43,8 +51,11 @@ class AgentState(TypedDict):
     conceptual_graph: nx.MultiDiGraph
     
     nodes_to_process: Set[str]
-    nodes_to_document: List[str]
+    nodes_to_document: Deque[str]
+    scheduler: Any  # core.topo_scheduler.TopologicalScheduler
     documented_nodes: Dict[str, str]
+    dependency_searcher: Any  # agent_nodes.EnhancedDependencySearcher
+    context_token_budget: int
     
     final_output_data: Dict[str, Any]
     
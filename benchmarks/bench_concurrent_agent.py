@@ -0,0 +1,83 @@
+# File: benchmarks/bench_concurrent_agent.py
+#
+# Runs the documentation agent serially and with concurrent waves on a
+# synthetic call graph, against a stand-in LLM that answers after a fixed
+# latency (no network, response cache off). Shows how wall-clock time scales
+# with the concurrency limit, and checks that the concurrent run documents
+# every node exactly as the serial one does.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_concurrent_agent [num_nodes] [latency_ms] [concurrency ...]
+
+import io
+import re
+import sys
+import json
+import time
+import random
+import contextlib
+import networkx as nx
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import core.llm_provider as llm_provider
+from agent.agent_graph import create_agent_graph
+
+
+def make_call_graph(num_nodes: int, seed: int = 0) -> nx.MultiDiGraph:
+    """A DAG of functions, each calling up to three earlier ones."""
+    rng = random.Random(seed)
+    G = nx.MultiDiGraph()
+    for i in range(num_nodes):
+        G.add_node(f"func_{i}", info=f"def func_{i}(): pass  # NODE:func_{i}", docstring="", fname="mod.py",
+                   category="function", line=(i, i + 1))
+        for _ in range(rng.randrange(4) if i else 0):
+            G.add_edge(f"func_{i}", f"func_{rng.randrange(i)}", label='invokes')
+    return G
+
+
+def simulated_llm(G: nx.MultiDiGraph, latency: float):
+    """Stands in for AzureChatOpenAI: sleeps `latency`, then answers from the graph."""
+    def respond(prompt):
+        time.sleep(latency)
+        text = prompt.to_string()
+        if "Document the following code node" in text:
+            return AIMessage(content=f"Documentation for {re.search(r'code node: `([^`]+)`', text).group(1)}")
+        name = re.search(r"NODE:(\w+)", text).group(1)
+        if "Node Name:" in text:
+            edges = [{"target": target, "label": "USES"} for target in G.successors(name)]
+            return AIMessage(content=json.dumps({"semantic_metadata": {}, "semantic_edges": edges}))
+        return AIMessage(content=json.dumps(sorted(set(G.successors(name)))))
+    return lambda **kwargs: RunnableLambda(respond)
+
+
+def run(G: nx.MultiDiGraph, concurrency: int):
+    state = {"repo_graph": G, "conceptual_graph": nx.MultiDiGraph(), "documentation_graph": nx.MultiDiGraph(),
+             "final_output_data": {}, "context_metadata": {}}
+    app = create_agent_graph(concurrency=concurrency)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        final_state = app.invoke(state, config={"recursion_limit": G.number_of_nodes() * 6})
+    return time.perf_counter() - start, final_state['documented_nodes']
+
+
+def main():
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+    limits = [int(value) for value in sys.argv[3:]] or [8, 32]
+    G = make_call_graph(num_nodes)
+    llm_provider.AzureChatOpenAI = simulated_llm(G, latency)
+    llm_provider.reset()
+    llm_provider.configure_cache(None)
+
+    serial_time, expected = run(G, 1)
+    print(f"Graph: {num_nodes} nodes, {G.number_of_edges()} edges; simulated LLM latency {latency * 1000:.0f}ms")
+    print(f"serial:          {serial_time:7.2f}s")
+    for limit in limits:
+        elapsed, documented = run(G, limit)
+        assert documented == expected, f"concurrency {limit} changed the documentation"
+        print(f"concurrency {limit:<3}: {elapsed:7.2f}s ({serial_time / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
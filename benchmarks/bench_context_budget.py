@@ -0,0 +1,68 @@
+# File: benchmarks/bench_context_budget.py
+#
+# Compiles the dependency context of every node in a repository's code graph
+# (this one by default) without a limit and with the token budget, and
+# reports context sizes. Dependencies count as documented, as they are under
+# the topological scheduler, with stand-in documentation of about 300 tokens
+# each; pass --undocumented to use raw source instead. No LLM is called.
+# Without a downloadable tiktoken encoding, token counts are estimated from
+# characters (core.token_budget prints a warning).
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_context_budget [repo_path] [budget] [--undocumented]
+
+import io
+import sys
+import time
+import contextlib
+
+from core.construct_graph import CodeGraph
+from core.token_budget import DEFAULT_CONTEXT_TOKEN_BUDGET, get_encoding
+from agent.agent_nodes import EnhancedDependencySearcher, compile_dependency_context
+
+UNLIMITED = 10 ** 9
+
+
+def stand_in_documentation(name: str) -> str:
+    return (f"### `{name}`\n\n**Description:** Stand-in documentation for `{name}`.\n\n"
+            + "**Detailed Logic:** " + "It validates its input, calls its helpers and returns the result. " * 24)
+
+
+def context_sizes(G, searcher, documented, budget):
+    sizes = {}
+    start = time.perf_counter()
+    for node in G.nodes():
+        static = searcher.resolve_static_dependencies(node) or {'dependencies': [], 'external': {}}
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, metadata = compile_dependency_context(static['dependencies'], G, documented, searcher,
+                                                     static['external'], node, budget)
+        sizes[node] = metadata['context_tokens']
+    return sizes, time.perf_counter() - start
+
+
+def describe(label, sizes, elapsed):
+    ordered = sorted(sizes.values())
+    p95 = ordered[int(len(ordered) * 0.95)]
+    hub = max(sizes, key=sizes.get)
+    print(f"{label:<12} total {sum(ordered):9}  mean {sum(ordered) / len(ordered):7.0f}  p95 {p95:6}  "
+          f"max {ordered[-1]:6} ({hub})  {elapsed:5.2f}s")
+
+
+def main():
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith("--")]
+    repo_path = arguments[0] if arguments else "."
+    budget = int(arguments[1]) if len(arguments) > 1 else DEFAULT_CONTEXT_TOKEN_BUDGET
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        G = CodeGraph(root=repo_path).build_graph()
+    searcher = EnhancedDependencySearcher(G)
+    documented = {} if "--undocumented" in sys.argv else {node: stand_in_documentation(node) for node in G}
+
+    counter = "tiktoken" if get_encoding() is not None else "character estimate"
+    print(f"Graph: {G.number_of_nodes()} nodes; context tokens per node ({counter}), "
+          f"{'raw source' if not documented else 'documented dependencies'}")
+    describe("unlimited", *context_sizes(G, searcher, documented, UNLIMITED))
+    describe(f"budget {budget}", *context_sizes(G, searcher, documented, budget))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# File: benchmarks/bench_csr_backend.py
+#
+# Compares RepoSearcher's NetworkX backend against the CSR backend on a
+# synthetic code graph with about one million edges: neighbor and
+# label-filtered queries, traversals, shortest paths and whole-graph scans.
+# Both backends must return identical results for every query.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_csr_backend [num_nodes] [edges_per_node]
+
+import sys
+import time
+import random
+
+from core.graph_searcher import RepoSearcher
+from benchmarks.bench_graph_store import make_code_graph
+
+
+def make_workload(names, seed: int = 0):
+    """Per-node query names and (source, target) pairs, shared by both backends."""
+    rng = random.Random(seed)
+    nodes = [rng.choice(names) for _ in range(5000)]
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(100)]
+    return nodes, pairs
+
+
+def run_queries(searcher: RepoSearcher, nodes, pairs) -> dict:
+    """Runs each query group once; returns {group: (seconds, results)}."""
+    groups = {
+        "dependencies+references": lambda: [(searcher.get_dependencies(n), searcher.get_references(n))
+                                            for n in nodes],
+        "class_methods (label)": lambda: [searcher.get_class_methods(n) for n in nodes],
+        "function_calls (label)": lambda: [searcher.get_function_calls(n) for n in nodes],
+        "bfs depth 2": lambda: [searcher.bfs_traversal(n, 2) for n in nodes[:500]],
+        "dependency_depth 3": lambda: [searcher.get_dependency_depth(n, 3) for n in nodes[:200]],
+        "shortest_path": lambda: [searcher.find_shortest_path(s, t) for s, t in pairs],
+        "nodes_by_category": lambda: [searcher.get_nodes_by_category(c) for c in ('class', 'function')],
+        "leaf+root nodes": lambda: (searcher.get_leaf_nodes(), searcher.get_root_nodes()),
+        "most_connected 20": lambda: searcher.get_most_connected_nodes(20),
+        "edge_types_summary": lambda: searcher.get_edge_types_summary(),
+    }
+    report = {}
+    for name, query in groups.items():
+        start = time.perf_counter()
+        results = query()
+        report[name] = (time.perf_counter() - start, results)
+    return report
+
+
+def main():
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    edges_per_node = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    G = make_code_graph(num_nodes, edges_per_node)
+    nodes, pairs = make_workload(list(G.nodes()))
+
+    start = time.perf_counter()
+    csr_searcher = RepoSearcher(G, backend="csr")
+    build_time = time.perf_counter() - start
+    nx_searcher = RepoSearcher(G)
+
+    nx_report = run_queries(nx_searcher, nodes, pairs)
+    csr_report = run_queries(csr_searcher, nodes, pairs)
+
+    print(f"Graph:            {G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
+    print(f"CSR build:        {build_time:.2f}s (once per searcher)")
+    print(f"{'query':<26} {'networkx':>10} {'csr':>10} {'speedup':>8}")
+    nx_total = csr_total = 0.0
+    for name, (nx_time, nx_results) in nx_report.items():
+        csr_time, csr_results = csr_report[name]
+        assert nx_results == csr_results, f"{name}: backends disagree"
+        nx_total += nx_time
+        csr_total += csr_time
+        print(f"{name:<26} {nx_time:>9.3f}s {csr_time:>9.3f}s {nx_time / csr_time:>7.1f}x")
+    print(f"{'total':<26} {nx_total:>9.3f}s {csr_total:>9.3f}s {nx_total / csr_total:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
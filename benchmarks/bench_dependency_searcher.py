@@ -0,0 +1,53 @@
+# File: benchmarks/bench_dependency_searcher.py
+#
+# Measures the searcher setup part of gather_documentation_context over a
+# simulated run: previously an EnhancedDependencySearcher (and its name, file
+# and method indices over the whole graph) was built for every documented
+# node; now one is built per run and synced before each node. Search results
+# must be the same either way. The LLM analysis step is not part of this.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_dependency_searcher [num_nodes] [documented_nodes]
+
+import sys
+import time
+
+from agent.agent_nodes import EnhancedDependencySearcher
+from benchmarks.bench_graph_store import make_code_graph
+
+
+def main():
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    documented = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    G = make_code_graph(num_nodes, edges_per_node=3)
+    # Class-qualified names feed the method index
+    G.add_nodes_from((f"Class_{i}.method_{i % 50}", {'fname': f"pkg/cls_{i % 100}.py"}) for i in range(num_nodes // 10))
+    lookups = ["FUNC_42", "method_7"]
+
+    start = time.perf_counter()
+    expected = []
+    for _ in range(documented):
+        searcher = EnhancedDependencySearcher(G)
+        expected.append([searcher.method_index.get(name) for name in lookups])
+    per_node_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    shared = EnhancedDependencySearcher(G)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    results = []
+    for _ in range(documented):
+        shared.sync()
+        results.append([shared.method_index.get(name) for name in lookups])
+    sync_time = time.perf_counter() - start
+    assert results == expected, "shared searcher disagrees with per-node searchers"
+    assert shared.search_dependency("FUNC_42") == EnhancedDependencySearcher(G).search_dependency("FUNC_42")
+
+    print(f"Graph: {G.number_of_nodes()} nodes; simulated run documents {documented} nodes")
+    print(f"Searcher per node:     {per_node_time:.2f}s total, {per_node_time / documented * 1000:.1f}ms per node")
+    print(f"Shared searcher:       {build_time:.2f}s build once + {sync_time * 1000:.2f}ms syncing "
+          f"({sync_time / documented * 1e6:.1f}us per node)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# File: benchmarks/bench_fused_agent.py
+#
+# Runs the documentation agent with separate LLM calls per node (documentation
+# and conceptual data, plus dependency analysis where static resolution leaves
+# names unresolved) and in fused mode (one structured call per node) on a
+# synthetic call graph, against a stand-in LLM that answers after a fixed
+# latency (no network, response cache off). A share of the fused answers can
+# be made malformed to exercise the fallback to separate calls. Reports
+# wall-clock time and LLM calls per run, and checks that both modes document
+# every node and build the same conceptual edges.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_fused_agent [num_nodes] [latency_ms] [malformed_percent] [concurrency]
+
+import io
+import re
+import sys
+import json
+import time
+import random
+import contextlib
+import networkx as nx
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import core.llm_provider as llm_provider
+from agent.agent_graph import create_agent_graph
+from benchmarks.bench_concurrent_agent import make_call_graph, simulated_llm
+
+
+def fused_llm(G: nx.MultiDiGraph, latency: float, malformed_percent: float, calls: list):
+    """simulated_llm that also answers the fused prompt; a share of those answers is not JSON."""
+    separate_calls = simulated_llm(G, latency)()
+    rng = random.Random(0)
+
+    def respond(prompt):
+        calls[0] += 1
+        text = prompt.to_string()
+        if "in a single JSON object" not in text:
+            return separate_calls.invoke(prompt)
+        time.sleep(latency)
+        if rng.random() * 100 < malformed_percent:
+            return AIMessage(content="Sorry, here is the documentation: ...")
+        name = re.search(r"NODE:(\w+)", text).group(1)
+        successors = sorted(set(G.successors(name)))
+        return AIMessage(content=json.dumps({
+            "dependencies": successors,
+            "documentation": f"Documentation for {name}",
+            "semantic_metadata": {"label": name, "type": "Utility", "summary": f"Runs {name}."},
+            "semantic_edges": [{"target": target, "label": "USES"} for target in G.successors(name)],
+        }))
+    return lambda **kwargs: RunnableLambda(respond)
+
+
+def run(G: nx.MultiDiGraph, concurrency: int, fused: bool):
+    state = {"repo_graph": G, "conceptual_graph": nx.MultiDiGraph(), "documentation_graph": nx.MultiDiGraph(),
+             "final_output_data": {}, "context_metadata": {}}
+    app = create_agent_graph(concurrency=concurrency, fused=fused)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        final_state = app.invoke(state, config={"recursion_limit": G.number_of_nodes() * 6})
+    return time.perf_counter() - start, final_state
+
+
+def main():
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+    malformed_percent = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    concurrency = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+    G = make_call_graph(num_nodes)
+    calls = [0]
+    llm_provider.AzureChatOpenAI = fused_llm(G, latency, malformed_percent, calls)
+    llm_provider.reset()
+    llm_provider.configure_cache(None)
+
+    print(f"Graph: {num_nodes} nodes, {G.number_of_edges()} edges; simulated LLM latency {latency * 1000:.0f}ms, "
+          f"{malformed_percent:.0f}% malformed fused answers, concurrency {concurrency}")
+    edges = {}
+    for fused in (False, True):
+        calls[0] = 0
+        elapsed, final_state = run(G, concurrency, fused)
+        output = final_state['final_output_data']
+        assert len(output) == num_nodes, "a node was not documented"
+        edges[fused] = sorted(final_state['conceptual_graph'].edges())
+        modes = [data['context_metadata'].get('mode') for data in output.values()]
+        label = "fused" if fused else "separate calls"
+        detail = f" ({modes.count('fused_fallback')} fell back)" if fused else ""
+        print(f"{label:<15} {elapsed:7.2f}s  {calls[0]:5} LLM calls{detail}")
+    assert edges[True] == edges[False], "fused mode changed the conceptual edges"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# File: benchmarks/bench_fuzzy_match.py
+#
+# Compares the fuzzy strategy of EnhancedDependencySearcher.search_dependency
+# before and after the bigram shortlist: previously SequenceMatcher ran
+# against every node name for each unresolved dependency; now only the names
+# FuzzyNameIndex cannot rule out are scored. Both must return the same
+# matches. Unresolved names are a mix of near-misses of real node names and
+# names that only exist outside the repository.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_fuzzy_match [num_nodes] [lookups] [legacy_lookups]
+
+import sys
+import time
+import random
+from difflib import SequenceMatcher
+
+from agent.agent_nodes import EnhancedDependencySearcher
+from benchmarks.bench_graph_store import make_code_graph
+
+EXTERNAL_NAMES = ("os.path.join", "json.dumps", "print", "len", "isinstance", "DataFrame",
+                  "np.array", "requests.get", "logger.info", "self.assertEqual")
+
+
+def legacy_fuzzy(graph, dep_name: str):
+    """The previous strategy 3: SequenceMatcher against every node."""
+    results = []
+    for node in graph.nodes():
+        similarity = SequenceMatcher(None, dep_name.lower(), node.lower()).ratio()
+        if similarity > 0.8:
+            results.append((node, similarity))
+    return results
+
+
+def unresolved_names(graph, count: int, seed: int = 0):
+    """Near-misses of node names (one character changed or dropped) and external names."""
+    rng = random.Random(seed)
+    nodes = list(graph.nodes())
+    names = []
+    for i in range(count):
+        if i % 2:
+            names.append(rng.choice(EXTERNAL_NAMES))
+            continue
+        name = list(rng.choice(nodes))
+        position = rng.randrange(len(name))
+        if i % 4:
+            name[position] = rng.choice("abcdefgh_")
+        else:
+            del name[position]
+        names.append("".join(name).upper() if i % 8 == 0 else "".join(name))
+    return names
+
+
+def main():
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    legacy_lookups = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    G = make_code_graph(num_nodes, edges_per_node=1)
+    G.add_nodes_from(f"Class_{i % 997}.method_{i % 41}" for i in range(num_nodes // 5))
+    names = unresolved_names(G, lookups)
+    searcher = EnhancedDependencySearcher(G)
+
+    start = time.perf_counter()
+    expected = [legacy_fuzzy(G, name) for name in names[:legacy_lookups]]
+    legacy_time = (time.perf_counter() - start) / legacy_lookups
+
+    start = time.perf_counter()
+    fuzzy_index = searcher._fuzzy_name_index()
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [[(fuzzy_index.names[i], ratio) for i, ratio in fuzzy_index.matches(name)] for name in names]
+    indexed_time = (time.perf_counter() - start) / lookups
+    candidates = sum(len(fuzzy_index.candidates(name)) for name in names)
+    assert results[:legacy_lookups] == expected, "fuzzy matches differ from the full scan"
+
+    print(f"Graph: {G.number_of_nodes()} nodes; {lookups} unresolved names")
+    print(f"Full SequenceMatcher scan: {legacy_time * 1000:8.1f}ms per lookup "
+          f"(timed on {legacy_lookups}) -> {legacy_time * lookups:.1f}s for {lookups}")
+    print(f"Bigram shortlist:          {indexed_time * 1000:8.2f}ms per lookup "
+          f"-> {indexed_time * lookups:.2f}s for {lookups} (+{build_time:.2f}s index build, once per run)")
+    print(f"Names scored per lookup:   {candidates / lookups:.0f} instead of {G.number_of_nodes()} "
+          f"({sum(map(len, results)) / lookups:.0f} above the threshold)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# File: benchmarks/bench_graph_server.py
+#
+# Measures a batch script that asks for node info on many nodes: without a
+# query server every call opens the graph itself (as get_node_info.py did on
+# each invocation), with one the graph is loaded once and each call is a
+# localhost round trip, or a single round trip per batch.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_graph_server [num_nodes] [num_queries]
+
+import os
+import sys
+import time
+import pickle
+import subprocess
+import tempfile
+
+from benchmarks.bench_graph_store import make_code_graph
+from core.graph_store import save_graph
+from core.graph_server import GraphClient, GraphServerUnavailable, state_file_path
+import get_node_info
+
+DIRECT_SAMPLE = 50
+
+
+def wait_for_server(graph_path: str, timeout: float = 300.0) -> GraphClient:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            client = GraphClient.for_graph(graph_path)
+            client.health()
+            return client
+        except GraphServerUnavailable:
+            time.sleep(0.2)
+    raise RuntimeError("graph query server did not start")
+
+
+def main():
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    num_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    with tempfile.TemporaryDirectory() as tmp:
+        G = make_code_graph(num_nodes, 5)
+        names = list(G.nodes())
+        queries = [names[(i * 7919) % num_nodes] for i in range(num_queries)]
+        store_path = os.path.join(tmp, "graph.store")
+        pickle_path = os.path.join(tmp, "graph.pkl")
+        save_graph(G, store_path)
+        with open(pickle_path, 'wb') as f:
+            pickle.dump(G, f)
+        del G
+
+        # Without a server: each call opens the graph; timed on a sample and extrapolated
+        start = time.perf_counter()
+        for node_name in queries[:DIRECT_SAMPLE]:
+            get_node_info.get_info_for_node(node_name, graph_path=store_path)
+        direct_store = (time.perf_counter() - start) / DIRECT_SAMPLE
+        start = time.perf_counter()
+        for node_name in queries[:5]:
+            with open(pickle_path, 'rb') as f:
+                pickle.load(f)
+        direct_pickle = (time.perf_counter() - start) / 5
+
+        server = subprocess.Popen([sys.executable, "-m", "core.graph_server", store_path],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            start = time.perf_counter()
+            client = wait_for_server(store_path)
+            startup = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for node_name in queries:
+                get_node_info.get_info_for_node(node_name, graph_path=store_path)
+            served = time.perf_counter() - start
+
+            start = time.perf_counter()
+            responses = client.batch([{'op': 'node_info', 'args': {'node_name': n}} for n in queries])
+            batched = time.perf_counter() - start
+            assert all(response['ok'] for response in responses)
+            client.close()
+        finally:
+            server.terminate()
+            server.wait()
+            if os.path.exists(state_file_path(store_path)):
+                os.remove(state_file_path(store_path))
+
+    print(f"Graph: {num_nodes:,} nodes; {num_queries:,} node_info queries")
+    print(f"Reload pickle per query: {direct_pickle * num_queries:10.1f}s (extrapolated from 5)")
+    print(f"Open store per query:    {direct_store * num_queries:10.1f}s (extrapolated from {DIRECT_SAMPLE})")
+    print(f"Query server:            {served:10.1f}s (+{startup:.1f}s one-time load)")
+    print(f"Query server, batched:   {batched:10.1f}s")
+
+
+if __name__ == "__main__":
+    main()
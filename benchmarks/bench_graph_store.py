@@ -0,0 +1,116 @@
+# File: benchmarks/bench_graph_store.py
+#
+# Compares loading a large code graph from a pickle against the columnar graph
+# store: a full load, a load of only the attributes a tool needs, and opening
+# a StoredGraphView to answer a single-node query. Each case runs in its own
+# subprocess so its wall-clock time and peak RSS are measured in isolation.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_graph_store [num_nodes] [edges_per_node]
+
+import os
+import sys
+import json
+import time
+import pickle
+import random
+import resource
+import subprocess
+import tempfile
+import networkx as nx
+
+from core.graph_store import save_graph, load_graph, load_graph_view
+
+CASES = ("pickle_full", "store_full", "store_partial", "store_query")
+
+
+def make_code_graph(num_nodes: int, edges_per_node: int, seed: int = 0) -> nx.MultiDiGraph:
+    """Builds a graph shaped like CodeGraph output: spans, docstrings, invokes/contains edges."""
+    rng = random.Random(seed)
+    G = nx.MultiDiGraph()
+    for i in range(num_nodes):
+        fname = f"pkg_{i % 97}/module_{i % 1009}.py"
+        G.add_node(
+            f"func_{i}",
+            category='function' if i % 7 else 'class',
+            spans=((f"/repo/{fname}", i * 120, 400),),
+            docstring=f"Function {i}. " + "Does something useful with its arguments. " * 3,
+            fname=fname,
+            line=(i % 500, i % 500 + 12),
+            kind='def',
+        )
+    names = list(G.nodes())
+    for i, name in enumerate(names):
+        for _ in range(edges_per_node):
+            G.add_edge(name, names[rng.randrange(num_nodes)], label='invokes' if i % 5 else 'contains')
+    return G
+
+
+def run_case(case: str, pickle_path: str, store_path: str, query: str) -> dict:
+    start = time.perf_counter()
+    if case == "pickle_full":
+        with open(pickle_path, 'rb') as f:
+            G = pickle.load(f)
+        result = len(list(G.successors(query)))
+    elif case == "store_full":
+        G = load_graph(store_path)
+        result = len(list(G.successors(query)))
+    elif case == "store_partial":
+        G = load_graph(store_path, node_attributes=('category', 'fname'))
+        result = len(list(G.successors(query)))
+    else:
+        view = load_graph_view(store_path)
+        result = len(list(view.successors(query))) + len(view.nodes[query])
+    elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "result": result,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def prepare(tmp: str, num_nodes: int, edges_per_node: int) -> dict:
+    """Writes the graph as a pickle and as a store; runs in a subprocess to keep the parent small."""
+    pickle_path = os.path.join(tmp, "graph.pkl")
+    store_path = os.path.join(tmp, "graph.store")
+    G = make_code_graph(num_nodes, edges_per_node)
+    with open(pickle_path, 'wb') as f:
+        pickle.dump(G, f)
+    save_graph(G, store_path)
+    return {"pickle_path": pickle_path, "store_path": store_path, "query": f"func_{num_nodes // 2}"}
+
+
+def run_subprocess(*args) -> dict:
+    # A forked child inherits the parent's peak RSS, so the parent never holds a graph
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_graph_store", *map(str, args)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--prepare":
+        print(json.dumps(prepare(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))))
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "--case":
+        print(json.dumps(run_case(*sys.argv[2:6])))
+        return
+
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    edges_per_node = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = run_subprocess("--prepare", tmp, num_nodes, edges_per_node)
+        pickle_path, store_path = paths["pickle_path"], paths["store_path"]
+
+        store_bytes = sum(os.path.getsize(os.path.join(store_path, f)) for f in os.listdir(store_path))
+        print(f"Graph: {num_nodes:,} nodes, {num_nodes * edges_per_node:,} edges")
+        print(f"On disk: pickle {os.path.getsize(pickle_path) / 2**20:.1f} MB, store {store_bytes / 2**20:.1f} MB")
+        for case in CASES:
+            report = run_subprocess("--case", case, pickle_path, store_path, paths["query"])
+            print(f"{case:<15} {report['seconds']:.3f}s  peak RSS {report['peak_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
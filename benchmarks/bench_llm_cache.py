@@ -0,0 +1,65 @@
+# File: benchmarks/bench_llm_cache.py
+#
+# Runs the documentation agent three times over the same synthetic call graph
+# against a stand-in LLM with a fixed latency, with the response cache in a
+# temporary directory: a cold run, a rerun on unchanged code, and a rerun
+# after editing one function. Reports wall-clock time, LLM calls and cache
+# statistics per run, and checks that replayed runs produce the same
+# documentation. After the edit only the edited node misses: the stand-in
+# documents it with the same text as before, so its callers' prompts are
+# unchanged (with a real model they would usually miss as well).
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_llm_cache [num_nodes] [latency_ms]
+
+import os
+import sys
+import tempfile
+from langchain_core.runnables import RunnableLambda
+
+import core.llm_provider as llm_provider
+from benchmarks.bench_concurrent_agent import make_call_graph, run, simulated_llm
+
+
+def counting(factory):
+    """Wraps simulated_llm so every model call is counted."""
+    calls = [0]
+
+    def make(**kwargs):
+        model = factory(**kwargs)
+
+        def respond(prompt):
+            calls[0] += 1
+            return model.invoke(prompt)
+        return RunnableLambda(respond)
+    return make, calls
+
+
+def main():
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000
+    G = make_call_graph(num_nodes)
+    factory, calls = counting(simulated_llm(G, latency))
+    llm_provider.AzureChatOpenAI = factory
+    llm_provider.reset()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = llm_provider.configure_cache(os.path.join(directory, "llm_cache.sqlite"))
+        print(f"Graph: {num_nodes} nodes; simulated LLM latency {latency * 1000:.0f}ms")
+        results = []
+        for label in ("cold run", "unchanged rerun", "one node edited"):
+            if label == "one node edited":
+                G.nodes["func_3"]["info"] += "\n    return 42"
+            cache.hits = cache.misses = 0
+            calls[0] = 0
+            elapsed, documented = run(G, 1)
+            results.append(documented)
+            stats = cache.stats()
+            print(f"{label:<16} {elapsed:7.2f}s  {calls[0]:5} LLM calls  "
+                  f"{stats['hits']:5} hits  {stats['misses']:5} misses")
+        assert results[1] == results[0], "replayed documentation differs"
+        llm_provider.configure_cache(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# File: benchmarks/bench_llm_connections.py
+#
+# Counts the TCP connections a stand-in Azure OpenAI server accepts for 1,000
+# chat completions. "Per call" is what the agent steps used to do: a new
+# AzureChatOpenAI and chain for every request, each with its own connection
+# pool. "Shared" goes through core.llm_provider, whose one keep-alive client
+# serves every model and chain. The server answers instantly over plain HTTP
+# on localhost, and the response cache is off, so the timings show only the
+# client overhead. On a real endpoint every new connection also pays a TLS
+# handshake.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_llm_connections [calls] [threads]
+
+import sys
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_openai import AzureChatOpenAI
+
+import core.llm_provider as llm_provider
+
+TEMPLATE = "Document the following code node: `{node_name}`"
+COMPLETION = json.dumps({
+    "id": "chatcmpl-bench", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "Documentation."}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 12, "completion_tokens": 2, "total_tokens": 14},
+}).encode()
+
+
+class FakeAzureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+    requests = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with FakeAzureHandler.lock:
+            FakeAzureHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with FakeAzureHandler.lock:
+            FakeAzureHandler.requests += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(COMPLETION)))
+        self.end_headers()
+        self.wfile.write(COMPLETION)
+
+    def log_message(self, *args):
+        pass
+
+
+def measure(invoke, calls: int, threads: int):
+    FakeAzureHandler.connections = FakeAzureHandler.requests = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(invoke, range(calls)))
+    elapsed = time.perf_counter() - start
+    assert results == ["Documentation."] * calls and FakeAzureHandler.requests == calls
+    return elapsed, FakeAzureHandler.connections
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    llm_provider.configure_cache(None)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAzureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    settings = dict(azure_deployment="gpt-4o", azure_endpoint=f"http://127.0.0.1:{server.server_port}",
+                    api_key="benchmark", api_version="2024-02-01", temperature=0.0, max_retries=0)
+
+    def per_call(i):
+        llm = AzureChatOpenAI(**settings)
+        chain = PromptTemplate.from_template(TEMPLATE) | llm | StrOutputParser()
+        return chain.invoke({"node_name": f"func_{i}"})
+
+    def shared(i):
+        return llm_provider.get_chain(TEMPLATE, StrOutputParser, **settings).invoke({"node_name": f"func_{i}"})
+
+    print(f"{calls} chat completions against a local fake Azure OpenAI server")
+    for workers in (1, threads):
+        per_call_time, per_call_connections = measure(per_call, calls, workers)
+        llm_provider.reset()
+        shared_time, shared_connections = measure(shared, calls, workers)
+        print(f"{workers} thread(s): per call {per_call_connections:5} connections, {per_call_time:6.2f}s | "
+              f"shared {shared_connections:3} connections, {shared_time:6.2f}s")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
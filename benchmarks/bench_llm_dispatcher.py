@@ -0,0 +1,137 @@
+# File: benchmarks/bench_llm_dispatcher.py
+#
+# Fires a burst of concurrent chat completions, the way main2's
+# parallel_writer_node does, at a stand-in Azure OpenAI server that enforces
+# a requests-per-minute and a tokens-per-minute quota like Azure: each
+# request is charged its prompt estimate plus max_tokens, and over quota the
+# server answers 429 with retry-after / retry-after-ms headers. Compares:
+#
+#   direct     chains called straight on the model with the SDK's default
+#              retries (what the scripts used to do)
+#   adaptive   core.llm_provider chains through the dispatcher with no quota
+#              configured: concurrency is learned from the 429s
+#   metered    the same with the server's quota configured on the dispatcher
+#
+# and reports wall-clock time, completed and failed requests, and 429s
+# served. Without a configured quota the dispatcher pays for its throughput
+# with about one 429 per request, which it absorbs by waiting; with the
+# quota configured it stays under it. The response cache is off.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_llm_dispatcher [requests] [rpm] [tpm] [latency_ms]
+
+import sys
+import json
+import math
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_openai import AzureChatOpenAI
+
+import core.llm_provider as llm_provider
+from core.llm_dispatcher import TokenBucket
+
+TEMPLATE = "Write the section `{section}` of the documentation for the following code:\n{code}"
+MAX_TOKENS = 100
+
+
+class ThrottlingAzureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.2
+    requests = None
+    tokens = None
+    lock = threading.Lock()
+    counts = {'ok': 0, 'throttled': 0}
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        prompt_tokens = math.ceil(sum(len(m.get("content", "")) for m in body["messages"]) / 4)
+        cost = prompt_tokens + (body.get("max_completion_tokens") or body.get("max_tokens") or 4096)
+        with ThrottlingAzureHandler.lock:
+            now = time.monotonic()
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(cost, now))
+            if wait <= 0:
+                self.requests.take(1)
+                self.tokens.take(cost)
+            ThrottlingAzureHandler.counts['ok' if wait <= 0 else 'throttled'] += 1
+        if wait > 0:
+            payload = json.dumps({"error": {"code": "429", "message": "Rate limit is exceeded."}}).encode()
+            self.send_response(429)
+            self.send_header("retry-after", str(math.ceil(wait)))
+            self.send_header("retry-after-ms", str(int(wait * 1000)))
+        else:
+            time.sleep(self.latency)
+            payload = json.dumps({
+                "id": "chatcmpl-bench", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "Section text."},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 3,
+                          "total_tokens": prompt_tokens + 3},
+            }).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+async def burst(chain, model: AzureChatOpenAI, count: int):
+    inputs = [{"section": f"Section {i}", "code": "def f(x):\n    return x * 2\n" * 8} for i in range(count)]
+    results = await asyncio.gather(*(chain.ainvoke(item) for item in inputs), return_exceptions=True)
+    # The async client is bound to this event loop; close it before the loop goes
+    await model.root_async_client.close()
+    return sum(1 for result in results if isinstance(result, Exception))
+
+
+def measure(label: str, make_chain, count: int, rpm: float, tpm: float):
+    ThrottlingAzureHandler.requests = TokenBucket(rpm)
+    ThrottlingAzureHandler.tokens = TokenBucket(tpm)
+    ThrottlingAzureHandler.counts = {'ok': 0, 'throttled': 0}
+    start = time.perf_counter()
+    failed = asyncio.run(burst(*make_chain(), count))
+    elapsed = time.perf_counter() - start
+    counts = ThrottlingAzureHandler.counts
+    print(f"{label:<9} {elapsed:7.2f}s  {count - failed:4} completed  {failed:4} failed  "
+          f"{counts['throttled']:5} 429s  {(count - failed) / elapsed:6.2f} req/s")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    rpm = float(sys.argv[2]) if len(sys.argv) > 2 else 600
+    tpm = float(sys.argv[3]) if len(sys.argv) > 3 else 40000
+    ThrottlingAzureHandler.latency = (float(sys.argv[4]) if len(sys.argv) > 4 else 200) / 1000
+    llm_provider.configure_cache(None)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottlingAzureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    settings = dict(azure_deployment="gpt-4o", azure_endpoint=f"http://127.0.0.1:{server.server_port}",
+                    api_key="benchmark", api_version="2024-02-01", temperature=0.0, max_tokens=MAX_TOKENS)
+
+    def direct():
+        model = AzureChatOpenAI(**settings)
+        return PromptTemplate.from_template(TEMPLATE) | model | StrOutputParser(), model
+
+    def dispatched(quota):
+        def make_chain():
+            llm_provider.reset()
+            llm_provider.configure_dispatcher(*quota)
+            return llm_provider.get_chain(TEMPLATE, StrOutputParser, **settings), llm_provider.get_llm(**settings)
+        return make_chain
+
+    print(f"{count} concurrent completions against a fake Azure OpenAI server with {rpm:.0f} RPM / "
+          f"{tpm:.0f} TPM, {ThrottlingAzureHandler.latency * 1000:.0f}ms latency")
+    measure("direct", direct, count, rpm, tpm)
+    measure("adaptive", dispatched((None, None)), count, rpm, tpm)
+    measure("metered", dispatched((rpm, tpm)), count, rpm, tpm)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
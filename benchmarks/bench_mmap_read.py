@@ -0,0 +1,115 @@
+# File: benchmarks/bench_mmap_read.py
+#
+# Compares the previous text-mode file loading in the graph builder (decode
+# every file to str, parse the text, re-encode it for tree-sitter) against the
+# bytes-first path (raw bytes, or an mmap for large files, handed straight to
+# ast and tree-sitter). Each mode runs in its own subprocess so its peak RSS
+# is measured in isolation.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_mmap_read [num_files] [large_files]
+
+import os
+import sys
+import json
+import time
+import resource
+import subprocess
+import tempfile
+
+from core.construct_graph import CodeGraph
+from core.file_discovery import FileDiscovery
+from benchmarks.synthetic_repo import make_synthetic_repo, make_module_source
+
+MODES = ("text", "bytes")
+
+
+def make_large_modules(root: str, count: int, functions: int = 8000):
+    """Adds a few multi-megabyte generated modules, which are memory-mapped."""
+    for idx in range(count):
+        with open(os.path.join(root, f"generated_{idx}.py"), "w", encoding="utf-8") as f:
+            f.write(make_module_source(10_000 + idx, functions=functions, classes=50))
+
+
+def text_mode_parse(builder: CodeGraph, file_path: str):
+    """Reproduces the previous loading: text-mode read, str parse, re-encode for tree-sitter."""
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        code = f.read()
+    code_bytes = bytes(code, "utf-8")
+    parsed_info = builder._parse_python_source(code, code_bytes)
+    if not parsed_info:
+        return None, []
+    return parsed_info, builder._extract_tags(os.path.relpath(file_path, builder.root), code_bytes)
+
+
+def bytes_mode_parse(builder: CodeGraph, file_path: str):
+    """The current loading: bytes-first, mmap above MMAP_THRESHOLD."""
+    parsed_info, tags, _ = builder._parse_and_extract(file_path)
+    return parsed_info, tags
+
+
+def run_mode(mode: str, root: str) -> dict:
+    """Parses every file under `root` in one mode and reports time, counts and peak RSS."""
+    builder = CodeGraph.__new__(CodeGraph)
+    builder.root = root
+    builder.workers = 1
+    py_files = FileDiscovery().find(root)
+    parse = text_mode_parse if mode == "text" else bytes_mode_parse
+
+    # Warm up the page cache and the tree-sitter query outside the timed loop
+    parse(builder, py_files[0])
+
+    files = tags = 0
+    start = time.perf_counter()
+    for file_path in py_files:
+        parsed_info, file_tags = parse(builder, file_path)
+        if parsed_info:
+            files += 1
+            tags += len(file_tags)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "files": files,
+        "tags": tags,
+        "bytes": sum(os.path.getsize(p) for p in py_files),
+        "seconds": elapsed,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def measure(mode: str, root: str) -> dict:
+    """Runs one mode in a fresh interpreter and returns its report."""
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_mmap_read", "--mode", mode, root],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--mode":
+        print(json.dumps(run_mode(sys.argv[2], sys.argv[3])))
+        return
+
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    large_files = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with tempfile.TemporaryDirectory() as root:
+        make_synthetic_repo(root, files=num_files)
+        make_large_modules(root, large_files)
+        reports = {mode: measure(mode, root) for mode in MODES}
+
+    assert reports["text"]["tags"] == reports["bytes"]["tags"], "tag count mismatch between modes"
+
+    total_mb = reports["bytes"]["bytes"] / (1024 * 1024)
+    print(f"Files parsed:   {reports['bytes']['files']} ({total_mb:.1f} MB, {large_files} large)")
+    for mode in MODES:
+        report = reports[mode]
+        print(f"{mode + '-mode:':<15} {report['seconds']:.3f}s  "
+              f"{report['files'] / report['seconds']:.0f} files/s  "
+              f"{total_mb / report['seconds']:.2f} MB/s  "
+              f"peak RSS {report['peak_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# File: benchmarks/bench_scope_index.py
+#
+# Microbenchmark for scope lookup during edge construction: the previous
+# linear scan over every definition in a file versus the bisect-based
+# ScopeIndex, on one synthetic module with thousands of functions.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_scope_index [num_functions]
+
+import os
+import sys
+import tempfile
+import time
+
+from core.construct_graph import CodeGraph
+from benchmarks.synthetic_repo import make_module_source
+
+
+def linear_find_scope(structure_cache, file_path, line_number):
+    """The previous CodeGraph.find_scope: a scan over all definitions in the file."""
+    if file_path not in structure_cache:
+        return None
+
+    structure = structure_cache[file_path]
+
+    for func in structure.get('functions', []):
+        if func['start_line'] <= line_number <= func['end_line']:
+            return func['name']
+
+    for cls in structure.get('classes', []):
+        if cls['start_line'] <= line_number <= cls['end_line']:
+            for meth in cls.get('methods', []):
+                if meth['start_line'] <= line_number <= meth['end_line']:
+                    return f"{cls['name']}.{meth['name']}"
+            return cls['name']
+
+    if structure.get('module_level_code'):
+        return f"{file_path}::module_code"
+
+    return None
+
+
+def main():
+    num_functions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as root:
+        with open(os.path.join(root, "generated.py"), "w", encoding="utf-8") as f:
+            f.write(make_module_source(0, functions=num_functions, classes=num_functions // 50))
+        builder = CodeGraph(root=root)
+
+    refs = [(tag['rel_fname'], tag['line'])
+            for tags in builder.tags_cache.values() for tag in tags if tag['kind'] == 'ref']
+
+    start = time.perf_counter()
+    linear = [linear_find_scope(builder.structure_cache, path, line) for path, line in refs]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [builder.find_scope(path, line) for path, line in refs]
+    indexed_time = time.perf_counter() - start
+
+    assert linear == indexed, "scope lookups differ between linear scan and index"
+
+    print(f"Functions in file:   {num_functions}")
+    print(f"Reference lookups:   {len(refs)}")
+    print(f"Linear scan:         {linear_time:.3f}s")
+    print(f"Interval index:      {indexed_time:.3f}s")
+    print(f"Speedup:             {linear_time / indexed_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# File: benchmarks/bench_single_pass.py
+#
+# Compares the old two-pass CodeGraph flow (AST pass, then a second read and
+# tree-sitter pass over every file) against the single parse-and-extract pass.
+# The page cache is warm for both runs, so the measured saving is the repeated
+# read and decode work; on cold or network storage the second read costs more.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_single_pass [num_files]
+
+import gc
+import os
+import sys
+import tempfile
+import time
+
+from core.construct_graph import CodeGraph
+from benchmarks.synthetic_repo import make_synthetic_repo
+
+REPEATS = 3
+
+
+def two_pass_parse(builder: CodeGraph, py_files):
+    """Reproduces the previous flow: read + ast for all files, then read + tree-sitter again."""
+    structure = {}
+    for file_path in py_files:
+        parsed_info = builder._parse_python_file(file_path)
+        if parsed_info:
+            structure[os.path.relpath(file_path, builder.root)] = parsed_info
+
+    tags = []
+    for file_path in py_files:
+        rel_fname = os.path.relpath(file_path, builder.root)
+        if rel_fname not in structure:
+            continue
+        with open(file_path, "r", encoding='utf-8', errors='ignore') as f:
+            code = f.read()
+        tags.extend(builder._extract_tags(rel_fname, bytes(code, "utf-8")))
+    return structure, tags
+
+
+def single_pass_parse(builder: CodeGraph, py_files):
+    """The current flow: one read and one parse-and-extract pass per file."""
+    structure = {}
+    tags = []
+    for rel_path, parsed_info, file_tags in builder.iter_parsed_files(py_files):
+        structure[rel_path] = parsed_info
+        tags.extend(file_tags)
+    return structure, tags
+
+
+def best_of(repeats, fn, *args):
+    """Runs `fn` several times and returns (best wall-clock time, last result)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as root:
+        make_synthetic_repo(root, files=num_files)
+        builder = CodeGraph(root=root)
+        py_files = builder.find_files(root)
+        total_bytes = sum(os.path.getsize(p) for p in py_files)
+
+        # Warm up the OS page cache and the tree-sitter query so neither run pays for it
+        single_pass_parse(builder, py_files)
+
+        two_pass_time, (two_pass_structure, two_pass_tags) = best_of(REPEATS, two_pass_parse, builder, py_files)
+        one_pass_time, (one_pass_structure, one_pass_tags) = best_of(REPEATS, single_pass_parse, builder, py_files)
+
+    assert two_pass_structure == one_pass_structure, "structure mismatch between flows"
+    assert two_pass_tags == one_pass_tags, "tag mismatch between flows"
+
+    print(f"Files parsed:        {len(one_pass_structure)}")
+    print(f"Bytes read:          two-pass {2 * total_bytes:,} / single-pass {total_bytes:,}")
+    print(f"Tags extracted:      {len(one_pass_tags)}")
+    print(f"Two-pass flow:       {two_pass_time:.3f}s")
+    print(f"Single-pass flow:    {one_pass_time:.3f}s")
+    print(f"Wall-clock saving:   {two_pass_time - one_pass_time:.3f}s "
+          f"({(1 - one_pass_time / two_pass_time):.1%})")
+
+
+if __name__ == "__main__":
+    main()
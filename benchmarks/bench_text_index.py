@@ -0,0 +1,95 @@
+# File: benchmarks/bench_text_index.py
+#
+# Compares the previous search_nodes_by_pattern (lowercase and scan every
+# node's name, docstring and source on each call) against the trigram
+# TextIndex on a graph built from a synthetic repository. Results must be
+# identical. Also reports the one-off index build, and how long a later run
+# takes to open the index persisted next to the graph store.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_text_index [num_files]
+
+import os
+import sys
+import time
+import tempfile
+
+from core.construct_graph import CodeGraph
+from core.graph_store import save_graph, load_graph_view
+from core.graph_searcher import RepoSearcher
+from core.source_store import get_node_source
+from core.text_index import TextIndex
+from benchmarks.synthetic_repo import make_synthetic_repo
+
+QUERIES = (
+    ("func_12_1", 'name'),
+    ("method_3", 'name'),
+    ("of module 7", 'docstring'),
+    ("return func_99_", 'info'),
+    ("os.path.join", 'info'),
+    ("class_4", 'all'),
+)
+
+
+def legacy_search(graph, pattern: str, search_in: str):
+    """The previous search_nodes_by_pattern."""
+    matching_nodes = []
+    pattern_lower = pattern.lower()
+    for node, attrs in graph.nodes(data=True):
+        if search_in == 'name' or search_in == 'all':
+            if pattern_lower in node.lower():
+                matching_nodes.append(node)
+                continue
+        if search_in == 'docstring' or search_in == 'all':
+            if pattern_lower in attrs.get('docstring', '').lower():
+                matching_nodes.append(node)
+                continue
+        if search_in == 'info' or search_in == 'all':
+            if pattern_lower in get_node_source(attrs).lower():
+                matching_nodes.append(node)
+                continue
+    return matching_nodes
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as root:
+        make_synthetic_repo(os.path.join(root, "repo"), files=num_files)
+        store_path = os.path.join(root, "graph.store")
+        save_graph(CodeGraph(root=os.path.join(root, "repo")).build_graph(), store_path)
+        graph = load_graph_view(store_path)
+
+        build_time, index = timed(lambda: TextIndex(graph, store_path))
+        fields_time, _ = timed(index.build_all)
+        # A later run: fields are memory-mapped from the persisted index
+        open_time, reopened = timed(lambda: TextIndex(load_graph_view(store_path), store_path))
+        load_time, _ = timed(reopened.build_all)
+        searcher = RepoSearcher(graph, text_index=reopened)
+
+        print(f"Graph: {graph.number_of_nodes()} nodes from {num_files} files")
+        print(f"Index build (all fields, once): {build_time + fields_time:.2f}s; "
+              f"opening the persisted index: {open_time + load_time:.3f}s")
+        print(f"{'query':<34} {'previous':>10} {'indexed':>10} {'matches':>8}")
+        for pattern, search_in in QUERIES:
+            legacy_time, expected = timed(legacy_search, graph, pattern, search_in)
+            indexed_time, result = timed(searcher.search_nodes_by_pattern, pattern, search_in)
+            assert result == expected, f"results differ for {pattern!r} in {search_in}"
+            print(f"{f'{pattern!r} in {search_in}':<34} {legacy_time * 1000:>8.0f}ms "
+                  f"{indexed_time * 1000:>8.2f}ms {len(result):>8}")
+        prefix_time, result = timed(searcher.search_nodes_by_prefix, "func_1", 'name')
+        print(f"{'prefix func_1':<34} {'':>10} {prefix_time * 1000:>8.2f}ms {len(result):>8}")
+        regex = r"method_[0-2]\(self"
+        regex_time, result = timed(searcher.search_nodes_by_regex, regex, 'info')
+        print(f"{f'regex {regex} in info':<34} {'':>10} {regex_time * 1000:>8.2f}ms {len(result):>8}")
+        graph.store.close()
+        reopened.graph.store.close()
+
+
+if __name__ == "__main__":
+    main()
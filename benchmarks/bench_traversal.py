@@ -0,0 +1,135 @@
+# File: benchmarks/bench_traversal.py
+#
+# Regression benchmark for RepoSearcher's traversals (dfs_traversal,
+# bfs_traversal, get_dependency_depth) on the two shapes that made the
+# previous list-based versions quadratic: a long call chain and a wide
+# fan-out. The previous implementations are kept here for comparison. They
+# run on two smaller graphs of the same shape, and their time at full size is
+# extrapolated from the growth between those two; on the small graphs the
+# new output must match theirs exactly.
+#
+# Usage (from the repository root):
+#     python -m benchmarks.bench_traversal [num_nodes] [legacy_nodes]
+
+import sys
+import math
+import time
+import itertools
+import networkx as nx
+
+from core.graph_searcher import RepoSearcher
+
+
+def legacy_dfs(graph, start_node, depth_limit):
+    """The previous dfs_traversal: `visited` kept as a list."""
+    visited = []
+    stack = [(start_node, 0)]
+    while stack:
+        node, level = stack.pop()
+        if node not in visited:
+            visited.append(node)
+            if level < depth_limit:
+                for neighbor in reversed(list(graph.successors(node))):
+                    if neighbor not in visited:
+                        stack.append((neighbor, level + 1))
+    return visited
+
+
+def legacy_bfs(graph, start_node, depth_limit):
+    """The previous bfs_traversal: list `visited` and queue.pop(0)."""
+    visited = []
+    queue = [(start_node, 0)]
+    while queue:
+        node, level = queue.pop(0)
+        if node not in visited:
+            visited.append(node)
+            if level < depth_limit:
+                for neighbor in graph.successors(node):
+                    if neighbor not in visited:
+                        queue.append((neighbor, level + 1))
+    return visited
+
+
+def legacy_dependency_depth(graph, node_name, max_depth):
+    """The previous get_dependency_depth: queue.pop(0)."""
+    depths = {node_name: 0}
+    queue = [(node_name, 0)]
+    while queue:
+        current_node, current_depth = queue.pop(0)
+        if current_depth < max_depth:
+            for successor in graph.successors(current_node):
+                if successor not in depths:
+                    depths[successor] = current_depth + 1
+                    queue.append((successor, current_depth + 1))
+    return depths
+
+
+def make_chain(num_nodes: int) -> nx.MultiDiGraph:
+    """func_0 -> func_1 -> ... -> func_{n-1}, like a deep call chain."""
+    G = nx.MultiDiGraph()
+    nx.add_path(G, [f"func_{i}" for i in range(num_nodes)], label='invokes')
+    return G
+
+
+def make_fan_out(num_nodes: int) -> nx.MultiDiGraph:
+    """One module node containing every other node, and each of those invoking its neighbor."""
+    G = nx.MultiDiGraph()
+    children = [f"func_{i}" for i in range(1, num_nodes)]
+    G.add_edges_from((("module_code", child) for child in children), label='contains')
+    G.add_edges_from(zip(children, children[1:]), label='invokes')
+    return G
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def run_shape(name: str, make, num_nodes: int, legacy_nodes: int, start_node: str):
+    """Times every traversal on one graph shape and checks it against the legacy code."""
+    small = make(legacy_nodes)
+    smaller = make(legacy_nodes // 2)
+    G = make(num_nodes)
+    depth = num_nodes  # deep enough to reach every node
+    searchers = {"networkx": RepoSearcher(G), "csr": RepoSearcher(G, backend="csr")}
+    small_searchers = {"networkx": RepoSearcher(small), "csr": RepoSearcher(small, backend="csr")}
+    traversals = (
+        ("dfs_traversal", legacy_dfs, "dfs_traversal"),
+        ("bfs_traversal", legacy_bfs, "bfs_traversal"),
+        ("get_dependency_depth", legacy_dependency_depth, "get_dependency_depth"),
+    )
+
+    print(f"\n{name}: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges "
+          f"(legacy timed on {smaller.number_of_nodes()} and {small.number_of_nodes()} nodes, extrapolated)")
+    print(f"{'traversal':<22} {'legacy':>11} {'networkx':>10} {'csr':>10}")
+    for label, legacy, method in traversals:
+        half_time, _ = timed(legacy, smaller, start_node, depth)
+        legacy_time, expected = timed(legacy, small, start_node, depth)
+        for searcher in small_searchers.values():
+            assert getattr(searcher, method)(start_node, depth) == expected, f"{name}/{label}: order changed"
+        # Growth exponent between the two sizes, between linear and quadratic
+        exponent = min(max(math.log(legacy_time / half_time, 2), 1.0), 2.0)
+        scale = (G.number_of_nodes() / small.number_of_nodes()) ** exponent
+        times = {}
+        for backend, searcher in searchers.items():
+            times[backend], result = timed(getattr(searcher, method), start_node, depth)
+            assert len(result) == G.number_of_nodes(), f"{name}/{label}: missed nodes"
+        print(f"{label:<22} {legacy_time * scale:>10.1f}s {times['networkx']:>9.3f}s {times['csr']:>9.3f}s")
+
+    # Generator mode: stop after the first few nodes
+    searcher = searchers["networkx"]
+    elapsed, first = timed(lambda: list(itertools.islice(searcher.iter_bfs_traversal(start_node, depth), 10)))
+    assert first == searcher.bfs_traversal(start_node, depth)[:10]
+    print(f"{'iter_bfs first 10':<22} {'':>11} {elapsed:>9.5f}s")
+
+
+def main():
+    num_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    legacy_nodes = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    run_shape("chain", make_chain, num_nodes, legacy_nodes, "func_0")
+    run_shape("fan-out", make_fan_out, num_nodes, legacy_nodes, "module_code")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# File: benchmarks/synthetic_repo.py
+#
+# Helpers for generating throwaway Python repositories of a configurable size,
+# so the graph-building benchmarks can run without a real monorepo checkout.
+
+import os
+
+
+def make_module_source(module_idx: int, functions: int = 20, classes: int = 5, methods: int = 6) -> str:
+    """
+    Builds the source of one synthetic module with top-level functions,
+    classes with methods, cross-calls between them and some module-level code.
+    """
+    lines = [f'"""Synthetic module {module_idx}."""', "import os", ""]
+    for f in range(functions):
+        lines.append(f"def func_{module_idx}_{f}(value):")
+        lines.append(f'    """Function {f} of module {module_idx}."""')
+        if f:
+            lines.append(f"    value = func_{module_idx}_{f - 1}(value)")
+        lines.append("    return os.path.join(str(value), 'x')")
+        lines.append("")
+    for c in range(classes):
+        lines.append(f"class Class_{module_idx}_{c}:")
+        lines.append(f'    """Class {c} of module {module_idx}."""')
+        for m in range(methods):
+            lines.append(f"    def method_{m}(self, value):")
+            lines.append(f'        """Method {m}."""')
+            lines.append(f"        return func_{module_idx}_{m % max(functions, 1)}(value)")
+            lines.append("")
+    lines.append(f"RESULT_{module_idx} = func_{module_idx}_0(1)")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def make_synthetic_repo(root: str, files: int = 200, packages: int = 10, **module_kwargs) -> str:
+    """
+    Writes `files` synthetic modules spread over `packages` sub-directories
+    under `root` and returns the root path.
+    """
+    for i in range(files):
+        package_dir = os.path.join(root, f"pkg_{i % packages}")
+        os.makedirs(package_dir, exist_ok=True)
+        with open(os.path.join(package_dir, f"module_{i}.py"), "w", encoding="utf-8") as f:
+            f.write(make_module_source(i, **module_kwargs))
+    return root
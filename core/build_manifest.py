@@ -0,0 +1,121 @@
+# File: core/build_manifest.py
+#
+# Keeps a per-file manifest (path, mtime, size, content hash) of a CodeGraph
+# build together with the cached parse results for every file. On the next run
+# the manifest tells the graph builder which files were added, changed or
+# deleted, so only those need to be re-parsed and patched into the graph.
+
+import os
+import hashlib
+import pickle
+from collections import namedtuple
+
+FileChanges = namedtuple("FileChanges", "added modified deleted unchanged")
+
+
+def content_hash(file_path: str = None, data: bytes = None) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's raw bytes (or of `data` if given).
+    """
+    if data is None:
+        with open(file_path, "rb") as f:
+            data = f.read()
+    return hashlib.sha256(data).hexdigest()
+
+
+class BuildManifest:
+    """
+    Fingerprints and cached parse results for every Python file of one build.
+
+    Attributes:
+        root (str): Absolute path of the repository root the build was made for.
+        files (Dict[str, dict]): rel_path -> {'mtime': int, 'size': int, 'hash': str}.
+        structure_cache (Dict[str, dict]): rel_path -> AST structure record.
+        tags_cache (Dict[str, list]): rel_path -> tree-sitter def/ref tags.
+    """
+
+    VERSION = 2
+
+    def __init__(self, root: str, files=None, structure_cache=None, tags_cache=None):
+        self.root = os.path.abspath(root)
+        self.files = files or {}
+        self.structure_cache = structure_cache or {}
+        self.tags_cache = tags_cache or {}
+
+    @staticmethod
+    def stat_entry(file_path: str) -> dict:
+        """Returns the mtime/size part of a fingerprint; the hash is filled in separately."""
+        st = os.stat(file_path)
+        return {'mtime': st.st_mtime_ns, 'size': st.st_size, 'hash': None}
+
+    def diff(self, root: str, py_files):
+        """
+        Compares the files found on disk now against this manifest.
+
+        A file whose mtime and size are unchanged is trusted without reading it.
+        Otherwise its content hash decides, so a touched-but-identical file is
+        not re-parsed.
+
+        Args:
+            root (str): Repository root the `py_files` paths belong to.
+            py_files (List[str]): Paths of all Python files currently in the repository.
+
+        Returns:
+            Tuple[FileChanges, Dict[str, dict]]: The sets of added, modified,
+            deleted and unchanged relative paths, and fresh fingerprints for
+            every current file.
+        """
+        added, modified, unchanged = set(), set(), set()
+        entries = {}
+        for file_path in py_files:
+            rel_path = os.path.relpath(file_path, root)
+            try:
+                entry = self.stat_entry(file_path)
+            except OSError:
+                continue
+            previous = self.files.get(rel_path)
+            if previous is None:
+                added.add(rel_path)
+            elif previous['mtime'] == entry['mtime'] and previous['size'] == entry['size']:
+                entry['hash'] = previous['hash']
+                unchanged.add(rel_path)
+            else:
+                entry['hash'] = content_hash(file_path)
+                if entry['hash'] == previous['hash']:
+                    unchanged.add(rel_path)
+                else:
+                    modified.add(rel_path)
+            entries[rel_path] = entry
+
+        deleted = set(self.files) - set(entries)
+        return FileChanges(added, modified, deleted, unchanged), entries
+
+    def save(self, path: str):
+        """Writes the manifest, with a version header, to `path`."""
+        payload = {
+            'version': self.VERSION,
+            'root': self.root,
+            'files': self.files,
+            'structure_cache': self.structure_cache,
+            'tags_cache': self.tags_cache,
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str, root: str):
+        """
+        Loads a manifest written by `save`. Returns None if the file is missing,
+        unreadable, from another manifest version or for a different root, in
+        which case the caller should fall back to a full build.
+        """
+        try:
+            with open(path, 'rb') as f:
+                payload = pickle.load(f)
+        except Exception:
+            return None
+        if not isinstance(payload, dict) or payload.get('version') != cls.VERSION:
+            return None
+        if payload.get('root') != os.path.abspath(root):
+            return None
+        return cls(payload['root'], payload['files'], payload['structure_cache'], payload['tags_cache'])
@@ -0,0 +1,255 @@
+# File: core/connection_strength.py
+#
+# Batched computation of RepoSearcher's connection-strength scores. Instead of
+# one shortest-path search and two freshly split docstrings per node pair, the
+# engine builds a sparse adjacency matrix and a sparse docstring token matrix
+# once, runs at most one breadth-first search per source row, and scores whole blocks
+# of rows with array operations. Results are bit-for-bit the values
+# RepoSearcher.calculate_connection_strength produces.
+
+import numpy as np
+import networkx as nx
+import scipy.sparse as sp
+from scipy.sparse import csgraph
+from typing import Iterator, List, Optional, Tuple
+
+from core.csr_backend import CSRAdjacency
+
+# Direct strength of an edge by label; any other label scores DEFAULT_EDGE_WEIGHT
+EDGE_WEIGHTS = {
+    'calls': 1.0,
+    'inherits_from': 0.9,
+    'contains': 0.8,
+    'uses': 0.7,
+    'references': 0.6,
+    'invokes': 0.5
+}
+DEFAULT_EDGE_WEIGHT = 0.3
+
+# Indirect strength by shortest-path length: 1 hop, 2-3 hops (1/length), longer,
+# unreachable (index 5). Index 0, a node to itself, is always overwritten.
+INDIRECT_BY_HOPS = np.array([1.0, 1.0, 1.0 / 2, 1.0 / 3, 0.1, 0.0])
+
+# Dense float64 cells per scored block (rows x graph nodes), about 32 MB
+BLOCK_CELLS = 1 << 22
+
+
+class ConnectionStrengthEngine:
+    """
+    Scores many node pairs at once.
+
+    Attributes:
+        csr (CSRAdjacency): Integer-indexed adjacency of the graph.
+        adjacency (sp.csr_array): Unweighted N x N adjacency used for the BFS distances.
+        direct (sp.csr_array): Strongest edge weight for every connected pair.
+        tokens (sp.csr_array): Binary node x word matrix of the docstrings.
+        token_counts (np.ndarray): Number of distinct docstring words per node.
+    """
+
+    def __init__(self, graph, csr: Optional[CSRAdjacency] = None):
+        """
+        Args:
+            graph: The repository code graph (MultiDiGraph or StoredGraphView).
+            csr (CSRAdjacency): Adjacency arrays to reuse, e.g. from a searcher on the CSR backend.
+        """
+        if csr is None:
+            if isinstance(graph, nx.Graph):
+                csr = CSRAdjacency.from_graph(graph)
+            else:
+                csr = CSRAdjacency.from_store(graph.store)
+        self.csr = csr
+        n = csr.num_nodes
+
+        self.adjacency = sp.csr_array((np.ones(len(csr.out_dst)), csr.out_dst, csr.out_indptr), shape=(n, n))
+
+        pair_weights = np.zeros(len(csr.out_dst))
+        for label, mask in csr.pair_labels.items():
+            weight = EDGE_WEIGHTS.get(label if label is not None else 'unknown', DEFAULT_EDGE_WEIGHT)
+            np.maximum(pair_weights, np.where(mask, weight, 0.0), out=pair_weights)
+        self.pair_weights = pair_weights
+        self.direct = sp.csr_array((pair_weights, csr.out_dst, csr.out_indptr), shape=(n, n))
+
+        # File and category codes; a missing value is its own code, since two
+        # missing values compare equal in the pairwise score
+        fnames, categories = {}, {}
+        self.fname_codes = np.zeros(n, dtype=np.int64)
+        self.category_codes = np.zeros(n, dtype=np.int64)
+        vocabulary = {}
+        rows, cols = [], []
+        self.token_counts = np.zeros(n, dtype=np.int64)
+        for name, attrs in graph.nodes(data=True):
+            i = csr.ids[name]
+            self.fname_codes[i] = fnames.setdefault(attrs.get('fname'), len(fnames))
+            self.category_codes[i] = categories.setdefault(attrs.get('category'), len(categories))
+            words = set(attrs.get('docstring', '').lower().split())
+            for word in words:
+                rows.append(i)
+                cols.append(vocabulary.setdefault(word, len(vocabulary)))
+            self.token_counts[i] = len(words)
+        self.tokens = sp.csr_array((np.ones(len(rows)), (rows, cols)), shape=(n, max(len(vocabulary), 1)))
+        # Strongly connected component of each node, computed on first use
+        self._components = None
+
+    def _distances(self, rows: np.ndarray, max_depth: Optional[int]) -> np.ndarray:
+        """
+        Directed hop counts from each row node to every node, inf where
+        unreachable. The indirect score only tells apart 1, 2, 3 and "further",
+        so distances are searched up to 3 hops and anything else reachable is
+        reported as 4.
+        """
+        limit = 3 if max_depth is None else min(max_depth, 3)
+        hops = csgraph.dijkstra(self.adjacency, directed=True, indices=rows, unweighted=True, limit=limit + 0.5)
+        if max_depth is not None and max_depth <= 3:
+            return hops
+        if self._components is None:
+            self._components = csgraph.connected_components(self.adjacency, directed=True, connection='strong')[1]
+
+        # Nodes in one strongly connected component reach the same nodes
+        reachable = {}
+        for r, row in enumerate(rows.tolist()):
+            component = self._components[row]
+            if component not in reachable:
+                if max_depth is None:
+                    order = csgraph.breadth_first_order(self.adjacency, row, directed=True,
+                                                        return_predecessors=False)
+                else:
+                    order = np.flatnonzero(np.isfinite(csgraph.dijkstra(
+                        self.adjacency, directed=True, indices=row, unweighted=True, limit=max_depth + 0.5)))
+                reachable[component] = order
+            further = np.zeros(len(hops[r]), dtype=bool)
+            further[reachable[component]] = True
+            hops[r, further & np.isinf(hops[r])] = 4.0
+        return hops
+
+    def _name_codes(self, nodes: List[str]) -> np.ndarray:
+        """One code per distinct name, so equal names can be compared as integers."""
+        codes = {}
+        return np.array([codes.setdefault(name, len(codes)) for name in nodes], dtype=np.int64)
+
+    def iter_blocks(self, nodes: List[str], max_depth: Optional[int] = None,
+                    block_rows: Optional[int] = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yields the overall strength between `nodes` and themselves, a block of rows at a time.
+
+        Args:
+            nodes (List[str]): Node names of the rows and columns. A name missing
+                from the graph scores 0.0 against every other name.
+            max_depth (int): Treat paths longer than this as missing. None keeps
+                the exact score, where any reachable node scores at least 0.1.
+            block_rows (int): Rows per block; defaults to what fits in BLOCK_CELLS.
+
+        Yields:
+            Tuple[int, np.ndarray]: Index of the first row, and a dense
+            (rows x len(nodes)) block of overall strengths. A name against
+            itself scores 1.0.
+        """
+        node_ids = np.array([self.csr.ids.get(name, -1) for name in nodes], dtype=np.int64)
+        name_codes = self._name_codes(nodes)
+        k = len(node_ids)
+        present = node_ids >= 0
+        cols = np.where(present, node_ids, 0)
+        if block_rows is None:
+            block_rows = max(1, BLOCK_CELLS // max(self.csr.num_nodes, k, 1))
+
+        col_tokens = self.tokens[cols]
+        col_counts = np.where(present, self.token_counts[cols], 0)
+        for start in range(0, k, block_rows):
+            rows = cols[start:start + block_rows]
+            row_present = present[start:start + block_rows]
+
+            direct = self.direct[rows][:, cols].toarray()
+
+            # Hop counts are 0..4 or inf, so the indirect score is a table lookup
+            hops = self._distances(rows, max_depth)[:, cols]
+            indirect = INDIRECT_BY_HOPS[np.minimum(hops, 5).astype(np.intp)]
+
+            # Same order of additions as RepoSearcher._calculate_semantic_strength
+            semantic = np.where(self.fname_codes[rows][:, None] == self.fname_codes[cols][None, :], 0.3, 0.0)
+            semantic += np.where(self.category_codes[rows][:, None] == self.category_codes[cols][None, :], 0.2, 0.0)
+            row_counts = np.where(row_present, self.token_counts[rows], 0)
+            both = (row_counts[:, None] > 0) & (col_counts[None, :] > 0)
+            if both.any():
+                shared = (self.tokens[rows] @ col_tokens.T).toarray()
+                union = row_counts[:, None] + col_counts[None, :] - shared
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    semantic += np.where(both, 0.5 * (shared / union), 0.0)
+            np.minimum(semantic, 1.0, out=semantic)
+
+            overall = 0.5 * direct + 0.3 * indirect + 0.2 * semantic
+            overall[~row_present, :] = 0.0
+            overall[:, ~present] = 0.0
+            # Identical names score 1.0, as in get_node_relationship_matrix
+            overall[name_codes[start:start + block_rows, None] == name_codes[None, :]] = 1.0
+            yield start, overall
+
+    def edge_strengths(self, chunk_pairs: int = 1 << 17) -> np.ndarray:
+        """
+        Overall strength of every (node, successor) pair, in CSR pair order.
+        The pair is one hop apart, so no path search is needed; a self-loop
+        scores 1.0 like a node against itself.
+
+        Args:
+            chunk_pairs (int): Pairs scored per chunk, bounding the token-matrix temporaries.
+
+        Returns:
+            np.ndarray: One float64 score per successor pair.
+        """
+        csr = self.csr
+        sources = np.repeat(np.arange(csr.num_nodes), np.diff(csr.out_indptr))
+        targets = csr.out_dst
+        semantic = np.where(self.fname_codes[sources] == self.fname_codes[targets], 0.3, 0.0)
+        semantic += np.where(self.category_codes[sources] == self.category_codes[targets], 0.2, 0.0)
+        source_counts, target_counts = self.token_counts[sources], self.token_counts[targets]
+        both = np.flatnonzero((source_counts > 0) & (target_counts > 0))
+        for start in range(0, len(both), chunk_pairs):
+            pairs = both[start:start + chunk_pairs]
+            shared = np.asarray(self.tokens[sources[pairs]].multiply(self.tokens[targets[pairs]]).sum(axis=1)).ravel()
+            union = source_counts[pairs] + target_counts[pairs] - shared
+            semantic[pairs] += 0.5 * (shared / union)
+        np.minimum(semantic, 1.0, out=semantic)
+
+        overall = 0.5 * self.pair_weights + 0.3 * INDIRECT_BY_HOPS[1] + 0.2 * semantic
+        overall[sources == targets] = 1.0
+        return overall
+
+    def matrix(self, nodes: List[str], top_k: Optional[int] = None,
+               max_depth: Optional[int] = None) -> sp.csr_array:
+        """
+        Builds the strength matrix as a sparse array, never holding more than
+        one dense block of rows.
+
+        Args:
+            nodes (List[str]): Node names of the rows and columns.
+            top_k (int): Keep only each row's `top_k` strongest other nodes (ties go
+                to the earlier column), leaving out the node itself. None keeps
+                every non-zero score.
+            max_depth (int): See `iter_blocks`.
+
+        Returns:
+            sp.csr_array: len(nodes) x len(nodes) strengths, rows and columns in the order of `nodes`.
+        """
+        k = len(nodes)
+        name_codes = self._name_codes(nodes)
+        data, indices, indptr = [], [], [0]
+        for start, block in self.iter_blocks(nodes, max_depth=max_depth):
+            if top_k is not None:
+                block[name_codes[start:start + len(block), None] == name_codes[None, :]] = 0.0
+                # The k-th largest score bounds each row's candidates; only those are sorted
+                kth = top_k - 1 if top_k <= k else k - 1
+                cutoff = -np.partition(-block, kth, axis=1)[:, kth] if top_k > 0 else np.full(len(block), np.inf)
+                for row, row_cutoff in zip(block, cutoff):
+                    candidates = np.flatnonzero((row >= row_cutoff) & (row > 0))
+                    order = np.lexsort((candidates, -row[candidates]))[:top_k]
+                    columns = np.sort(candidates[order])
+                    data.append(row[columns])
+                    indices.append(columns)
+                    indptr.append(indptr[-1] + len(columns))
+            else:
+                for row in block:
+                    columns = np.flatnonzero(row)
+                    data.append(row[columns])
+                    indices.append(columns)
+                    indptr.append(indptr[-1] + len(columns))
+        data = np.concatenate(data) if data else np.zeros(0)
+        indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64)
+        return sp.csr_array((data, indices, np.asarray(indptr, dtype=np.int64)), shape=(k, k))
@@ -6,9 +6,11 @@
 
 import os
 import sys
+import argparse
+import multiprocessing
+import mmap
 import warnings
 import ast
-import pickle
 import json
 from collections import namedtuple
 import networkx as nx
@@ -17,18 +19,70 @@ from tqdm import tqdm
 warnings.simplefilter("ignore", category=FutureWarning)
 from tree_sitter_languages import get_language, get_parser
 
+if not __package__:
+    # Running as `python core/construct_graph.py`: make the `core` package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.build_manifest import BuildManifest, content_hash
+from core.file_discovery import FileDiscovery
+from core.graph_store import save_graph
+from core.scope_index import ScopeIndex
+from core.source_store import source_view, line_offsets, register_source_files
+
 Tag = namedtuple("Tag", "rel_fname fname line name kind category info docstring".split())
 
+TAG_QUERY_SCM = """
+    (class_definition name: (identifier) @name.definition.class) @definition.class
+    (function_definition name: (identifier) @name.definition.function) @definition.function
+    (call function: [(identifier) @name.reference.call (attribute attribute: (identifier) @name.reference.call)]) @reference.call
+"""
+
+# Files at least this large are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 1 << 20
+
+_tag_parser = None
+
+def _get_tag_parser():
+    """
+    Returns the tree-sitter parser and compiled tag query, creating them on
+    first use so they are shared by every file in the run.
+    """
+    global _tag_parser
+    if _tag_parser is None:
+        language = get_language('python')
+        _tag_parser = (get_parser('python'), language.query(TAG_QUERY_SCM))
+    return _tag_parser
+
 class CodeGraph:
     """
     Analyzes a code repository and constructs a detailed dependency graph,
     including nodes for functions, classes, and module-level code.
     """
 
-    def __init__(self, root=None):
+    def __init__(self, root=None, workers=1, previous_manifest=None, discovery=None):
+        """
+        Args:
+            root (str): Repository root to analyze. Defaults to the current directory.
+            workers (int): Number of processes used for the parse pass. 1 parses
+                serially in this process; 0 uses every available CPU.
+            previous_manifest (BuildManifest): Manifest of an earlier build of the
+                same root. When given, only added or changed files are parsed and
+                `update_graph` can patch the earlier graph instead of rebuilding it.
+            discovery (FileDiscovery): Decides which files are parsed. Defaults to
+                one honoring .gitignore and the default exclude list, listing
+                directories with `workers` threads.
+        """
         if not root:
             root = os.getcwd()
         self.root = root
+        self.workers = workers if workers and workers > 0 else (os.cpu_count() or 1)
+        self.discovery = discovery if discovery is not None else FileDiscovery(workers=self.workers)
+        self.previous_manifest = previous_manifest
+        # Set of added/modified/deleted/unchanged files; None for a full build
+        self.changes = None
+        # Def/ref tags per file, filled in by the same pass that builds the structure cache
+        self.tags_cache = {}
+        # Per-file interval index used by find_scope, built alongside the structure cache
+        self.scope_index = {}
         self.structure_cache = self._pre_parse_all_files()
 
     def _parse_python_file(self, file_path):
@@ -37,11 +91,47 @@ class CodeGraph:
         functions, classes, methods, their docstrings, and any module-level code.
         """
         try:
-            with open(file_path, "r", encoding='utf-8', errors='ignore') as file:
-                file_content = file.read()
-                parsed_data = ast.parse(file_content)
+            with open(file_path, "rb") as f:
+                raw = f.read()
+        except Exception:
+            return None
+        code_bytes, text = source_view(raw)
+        return self._parse_python_source(code_bytes if text is None else text, code_bytes)
+
+    def _parse_python_source(self, source, code_bytes=None):
+        """
+        Runs the AST extraction on already-loaded source, given either as text
+        or as a UTF-8 buffer (bytes or mmap). Returns None if the source cannot
+        be parsed.
+
+        Source text is not copied into the record. Each class, method and
+        function gets a "span" of [byte_offset, byte_length] into `code_bytes`
+        (the UTF-8 bytes of the source), and module-level code is a list of
+        such spans, one per top-level statement.
+        """
+        try:
+            parsed_data = ast.parse(source)
         except Exception:
             return None
+        if code_bytes is None:
+            code_bytes = source.encode("utf-8") if isinstance(source, str) else source
+
+        # Byte offset at which each line starts; ast col offsets are UTF-8 byte offsets too
+        offsets = line_offsets(code_bytes)
+
+        def definition_span(node):
+            # Start at the beginning of the first decorator (or def/class) line
+            first_line = min([node.lineno] + [d.lineno for d in node.decorator_list])
+            start = offsets[first_line - 1]
+            end = offsets[node.end_lineno - 1] + node.end_col_offset
+            return [start, end - start]
+
+        def statement_span(node):
+            if getattr(node, 'decorator_list', None):
+                return definition_span(node)
+            start = offsets[node.lineno - 1] + node.col_offset
+            end = offsets[node.end_lineno - 1] + node.end_col_offset
+            return [start, end - start]
 
         class_info = []
         function_names = []
@@ -60,7 +150,7 @@ class CodeGraph:
                             "name": n.name,
                             "start_line": n.lineno,
                             "end_line": getattr(n, 'end_lineno', n.lineno),
-                            "text": ast.unparse(n),
+                            "span": definition_span(n),
                             "docstring": ast.get_docstring(n) or ""
                         })
                         class_methods.add(n.name)
@@ -68,7 +158,7 @@ class CodeGraph:
                     "name": node.name,
                     "start_line": node.lineno,
                     "end_line": getattr(node, 'end_lineno', node.lineno),
-                    "text": ast.unparse(node),
+                    "span": definition_span(node),
                     "methods": methods,
                     "docstring": ast.get_docstring(node) or ""
                 })
@@ -79,7 +169,7 @@ class CodeGraph:
                     "name": node.name,
                     "start_line": node.lineno,
                     "end_line": getattr(node, 'end_lineno', node.lineno),
-                    "text": ast.unparse(node),
+                    "span": definition_span(node),
                     "docstring": ast.get_docstring(node) or ""
                 })
 
@@ -97,77 +187,171 @@ class CodeGraph:
                 # This correctly captures assignments, function calls, etc.
                 module_level_nodes.append(node)
 
-        module_level_code_str = ""
-        if module_level_nodes:
-            # Reconstruct the module-level code from the collected nodes
-            module_level_code_str = "\n".join([ast.unparse(n) for n in module_level_nodes])
-
         return {
             "classes": class_info,
             "functions": function_names,
-            "module_level_code": module_level_code_str
+            "module_level_code": [statement_span(n) for n in module_level_nodes]
         }
 
+    def _load_source(self, file_path):
+        """
+        Returns a file's raw contents without decoding them: a read-only mmap
+        for files of at least MMAP_THRESHOLD bytes, plain bytes otherwise.
+        """
+        with open(file_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= MMAP_THRESHOLD:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return f.read()
+
+    def _extract_tags(self, rel_fname, code_bytes):
+        """
+        Uses tree-sitter to find all definitions and references in one file's
+        source bytes.
+        """
+        parser, ts_query = _get_tag_parser()
+        tree = parser.parse(code_bytes)
+        captures = ts_query.captures(tree.root_node)
+
+        tags = []
+        for node, tag_type in captures:
+            kind = "def" if "definition" in tag_type else "ref"
+            tag_name = node.text.decode("utf-8")
+
+            tags.append({
+                "name": tag_name,
+                "kind": kind,
+                "rel_fname": rel_fname,
+                "line": node.start_point[0] + 1,
+            })
+        return tags
+
+    def _parse_and_extract(self, file_path):
+        """
+        Single parse-and-extract pass over one file: loads it once, builds the
+        AST structure record and the tree-sitter def/ref tags together, and
+        hashes the raw bytes for the build manifest.
+
+        The buffer is handed to `ast` and tree-sitter as bytes; text is only
+        decoded up front for files that need transcoding (see source_view).
+
+        Returns:
+            tuple: (structure, tags, content_hash). structure is None and tags
+            empty if the file cannot be parsed; the hash is None if it cannot be read.
+        """
+        rel_path = os.path.relpath(file_path, self.root)
+        try:
+            raw = self._load_source(file_path)
+        except Exception:
+            return None, [], None
+        try:
+            digest = content_hash(data=raw)
+            code_bytes, text = source_view(raw)
+            parsed_info = self._parse_python_source(code_bytes if text is None else text, code_bytes)
+            if not parsed_info:
+                return None, [], digest
+            return parsed_info, self._extract_tags(rel_path, code_bytes), digest
+        finally:
+            if isinstance(raw, mmap.mmap):
+                raw.close()
+
+    def _parse_results(self, py_files):
+        """
+        Yields one (structure, tags, content_hash) result per file, in input
+        order. With more than one worker the files are spread over a process
+        pool; imap keeps the results ordered, so the merge is identical to a
+        serial run.
+        """
+        if self.workers <= 1 or len(py_files) <= 1:
+            for file_path in py_files:
+                yield self._parse_and_extract(file_path)
+            return
+
+        processes = min(self.workers, len(py_files))
+        chunksize = max(1, len(py_files) // (processes * 8))
+        with multiprocessing.Pool(processes, initializer=_init_parse_worker, initargs=(self.root,)) as pool:
+            yield from pool.imap(_parse_file_task, py_files, chunksize=chunksize)
+
+    def iter_parsed_files(self, py_files):
+        """
+        Streams (rel_path, structure, tags) records for every file that parses.
+        """
+        results = self._parse_results(py_files)
+        for file_path, (parsed_info, tags, _) in zip(py_files, results):
+            if parsed_info:
+                yield os.path.relpath(file_path, self.root), parsed_info, tags
+
     def _pre_parse_all_files(self):
         """
-        Walks the repository and runs the AST parser on all Python files,
-        caching the results for fast lookups later.
+        Walks the repository and runs the single AST + tree-sitter pass on all
+        Python files, caching the structure and tags for fast lookups later.
+
+        With a previous manifest, files whose fingerprint is unchanged reuse
+        their cached structure and tags, and only the rest are parsed.
         """
-        print("Pre-parsing repository structure with AST...")
-        structure = {}
+        mode = f"{self.workers} worker processes" if self.workers > 1 else "serial"
         py_files = self.find_files(self.root)
-        for file_path in tqdm(py_files, desc="Parsing Files (AST)"):
-            rel_path = os.path.relpath(file_path, self.root)
-            parsed_info = self._parse_python_file(file_path)
+        rel_paths = {file_path: os.path.relpath(file_path, self.root) for file_path in py_files}
+
+        previous = self.previous_manifest
+        if previous is not None:
+            self.changes, fingerprints = previous.diff(self.root, py_files)
+            to_parse = [p for p in py_files if rel_paths[p] in self.changes.added or rel_paths[p] in self.changes.modified]
+            print(f"Incremental parse: {len(self.changes.added)} added, {len(self.changes.modified)} modified, "
+                  f"{len(self.changes.deleted)} deleted, {len(self.changes.unchanged)} unchanged files.")
+        else:
+            fingerprints = {}
+            to_parse = py_files
+
+        print(f"Pre-parsing repository structure (AST + tree-sitter, {mode})...")
+        parsed = {}
+        results = self._parse_results(to_parse)
+        for file_path, (parsed_info, tags, digest) in tqdm(zip(to_parse, results), total=len(to_parse), desc="Parsing Files"):
+            rel_path = rel_paths[file_path]
+            parsed[rel_path] = (parsed_info, tags)
+            if digest is not None:
+                if rel_path not in fingerprints:
+                    try:
+                        fingerprints[rel_path] = BuildManifest.stat_entry(file_path)
+                    except OSError:
+                        continue
+                fingerprints[rel_path]['hash'] = digest
+
+        # Merge in discovery order so the cache is identical to a full build's
+        structure = {}
+        for file_path in py_files:
+            rel_path = rel_paths[file_path]
+            if rel_path in parsed:
+                parsed_info, tags = parsed[rel_path]
+            elif previous is not None and rel_path in previous.structure_cache:
+                parsed_info, tags = previous.structure_cache[rel_path], previous.tags_cache.get(rel_path, [])
+            else:
+                continue
             if parsed_info:
                 structure[rel_path] = parsed_info
+                self.tags_cache[rel_path] = tags
+                self.scope_index[rel_path] = ScopeIndex(rel_path, parsed_info)
+
+        self.manifest = BuildManifest(self.root, fingerprints, structure, self.tags_cache)
         return structure
 
     def get_all_tags(self, files_to_process):
         """
-        Uses tree-sitter to find all definitions and references in the code,
-        creating a list of Tag objects.
+        Returns the definition and reference tags for the given files, as
+        collected by the single parse pass. Files that failed to parse are skipped.
         """
         all_tags = []
-        language = get_language('python')
-        parser = get_parser('python')
-        query_scm = """
-            (class_definition name: (identifier) @name.definition.class) @definition.class
-            (function_definition name: (identifier) @name.definition.function) @definition.function
-            (call function: [(identifier) @name.reference.call (attribute attribute: (identifier) @name.reference.call)]) @reference.call
-        """
-        ts_query = language.query(query_scm)
-
-        for fname in tqdm(files_to_process, desc="Scanning Files (tree-sitter)"):
+        for fname in files_to_process:
             rel_fname = os.path.relpath(fname, self.root)
-            if rel_fname not in self.structure_cache:
-                continue
-
-            with open(fname, "r", encoding='utf-8', errors='ignore') as f:
-                code = f.read()
-            
-            tree = parser.parse(bytes(code, "utf-8"))
-            captures = ts_query.captures(tree.root_node)
-
-            for node, tag_type in captures:
-                kind = "def" if "definition" in tag_type else "ref"
-                tag_name = node.text.decode("utf-8")
-                
-                all_tags.append({
-                    "name": tag_name,
-                    "kind": kind,
-                    "rel_fname": rel_fname,
-                    "line": node.start_point[0] + 1,
-                })
+            all_tags.extend(self.tags_cache.get(rel_fname, []))
         return all_tags
 
-    def tags_to_graph(self, tags):
+    def _collect_definitions(self):
         """
-        Constructs the final NetworkX graph from the list of tags, including
-        nodes for module-level code.
+        Maps every class, method and function name to its definition record.
+        When several files define the same name, the last file in the structure
+        cache wins.
         """
-        G = nx.MultiDiGraph()
-        
         definitions = {}
         for file_path, structure in self.structure_cache.items():
             for class_def in structure.get('classes', []):
@@ -176,33 +360,73 @@ class CodeGraph:
                     definitions[f"{class_def['name']}.{method_def['name']}"] = {'type': 'method', 'file': file_path, **method_def}
             for func_def in structure.get('functions', []):
                 definitions[func_def['name']] = {'type': 'function', 'file': file_path, **func_def}
+        return definitions
+
+    def _source_path(self, file_path):
+        """Absolute path that node spans point into."""
+        return os.path.abspath(os.path.join(self.root, file_path))
+
+    def _record_source_files(self, G):
+        """
+        Stores the (size, mtime_ns) of every file the spans point into as the
+        graph's 'source_files' attribute, and registers them with the source
+        store, so spans are not read from files edited since this build.
+        """
+        G.graph['source_files'] = {
+            self._source_path(rel_path): (entry['size'], entry['mtime'])
+            for rel_path, entry in self.manifest.files.items()
+        }
+        register_source_files(G.graph['source_files'])
+
+    def _add_definition_node(self, G, name, attrs):
+        offset, length = attrs['span']
+        G.add_node(
+            name,
+            category=attrs['type'],
+            spans=((self._source_path(attrs['file']), offset, length),), # Source text is loaded lazily
+            docstring=attrs.get('docstring', ''),
+            fname=attrs['file'],
+            line=(attrs['start_line'], attrs['end_line']),
+            kind='def'
+        )
+
+    def _add_module_code_node(self, G, file_path, module_code):
+        # Create a unique name for this node
+        node_name = f"{file_path}::module_code"
+        source_path = self._source_path(file_path)
+        G.add_node(
+            node_name,
+            category='module_code',
+            spans=tuple((source_path, offset, length) for offset, length in module_code),
+            docstring='', # No formal docstring for module code
+            fname=file_path,
+            line=(0, 0), # Line numbers are for the whole block
+            kind='def'
+        )
+
+    def _add_contains_edges(self, G, class_name, attrs):
+        for method in attrs.get('methods', []):
+            method_full_name = f"{class_name}.{method['name']}"
+            if G.has_node(class_name) and G.has_node(method_full_name):
+                G.add_edge(class_name, method_full_name, label='contains')
+
+    def tags_to_graph(self, tags):
+        """
+        Constructs the final NetworkX graph from the list of tags, including
+        nodes for module-level code.
+        """
+        G = nx.MultiDiGraph()
+        
+        definitions = self._collect_definitions()
 
         for name, attrs in definitions.items():
-            G.add_node(
-                name,
-                category=attrs['type'],
-                info=attrs['text'],
-                docstring=attrs.get('docstring', ''),
-                fname=attrs['file'],
-                line=(attrs['start_line'], attrs['end_line']),
-                kind='def'
-            )
+            self._add_definition_node(G, name, attrs)
 
         # --- Add nodes for module-level code ---
         for file_path, structure in self.structure_cache.items():
             module_code = structure.get('module_level_code')
             if module_code:
-                # Create a unique name for this node
-                node_name = f"{file_path}::module_code"
-                G.add_node(
-                    node_name,
-                    category='module_code',
-                    info=module_code,
-                    docstring='', # No formal docstring for module code
-                    fname=file_path,
-                    line=(0, 0), # Line numbers are for the whole block
-                    kind='def'
-                )
+                self._add_module_code_node(G, file_path, module_code)
 
         for tag in tqdm(tags, desc="Building Graph Edges"):
             if tag['kind'] == 'ref':
@@ -213,62 +437,128 @@ class CodeGraph:
         
         for class_name, attrs in definitions.items():
             if attrs['type'] == 'class':
-                for method in attrs.get('methods', []):
-                    method_full_name = f"{class_name}.{method['name']}"
-                    if G.has_node(class_name) and G.has_node(method_full_name):
-                        G.add_edge(class_name, method_full_name, label='contains')
+                self._add_contains_edges(G, class_name, attrs)
 
         return G
-    
+
+    def _defined_names(self, file_path, structure):
+        """Returns every node name a file's structure record contributes to the graph."""
+        names = set()
+        for class_def in structure.get('classes', []):
+            names.add(class_def['name'])
+            for method_def in class_def.get('methods', []):
+                names.add(f"{class_def['name']}.{method_def['name']}")
+        for func_def in structure.get('functions', []):
+            names.add(func_def['name'])
+        if structure.get('module_level_code'):
+            names.add(f"{file_path}::module_code")
+        return names
+
+    def update_graph(self, G):
+        """
+        Patches a graph built from the previous manifest so that it matches a
+        full rebuild of the current tree, touching only what the changed files
+        affect.
+
+        Every node defined by an added, modified or deleted file (before or
+        after the change) is "affected". Its edges are dropped, its attributes
+        re-resolved against the current definitions (or the node removed), and
+        the edges that touch it are re-created from the cached tags. Unchanged
+        files are only scanned for references to affected names, unless they
+        define an affected name themselves.
+
+        Args:
+            G (nx.MultiDiGraph): The graph from the previous build; modified in place.
+
+        Returns:
+            nx.MultiDiGraph: The patched graph.
+        """
+        if self.changes is None:
+            raise ValueError("update_graph requires a CodeGraph built with previous_manifest")
+
+        previous = self.previous_manifest
+        changed_files = self.changes.added | self.changes.modified | self.changes.deleted
+        affected = set()
+        for file_path in changed_files:
+            for cache in (previous.structure_cache, self.structure_cache):
+                if file_path in cache:
+                    affected |= self._defined_names(file_path, cache[file_path])
+        self._record_source_files(G)
+        if not affected:
+            return G
+
+        print(f"Patching graph: {len(affected)} affected nodes from {len(changed_files)} changed files...")
+        for name in affected:
+            if G.has_node(name):
+                G.remove_edges_from(list(G.in_edges(name, keys=True)) + list(G.out_edges(name, keys=True)))
+
+        definitions = self._collect_definitions()
+        for name in affected:
+            if name in definitions:
+                self._add_definition_node(G, name, definitions[name])
+            elif name.endswith("::module_code"):
+                file_path = name[:-len("::module_code")]
+                module_code = self.structure_cache.get(file_path, {}).get('module_level_code')
+                if module_code:
+                    self._add_module_code_node(G, file_path, module_code)
+                elif G.has_node(name):
+                    G.remove_node(name)
+            elif G.has_node(name):
+                G.remove_node(name)
+
+        for file_path, structure in self.structure_cache.items():
+            # Files that define an affected name can own affected caller scopes
+            scan_all = file_path in changed_files or bool(self._defined_names(file_path, structure) & affected)
+            for tag in self.tags_cache.get(file_path, []):
+                if tag['kind'] != 'ref' or not (scan_all or tag['name'] in affected):
+                    continue
+                caller_scope = self.find_scope(file_path, tag['line'])
+                callee_name = tag['name']
+                if not (caller_scope in affected or callee_name in affected):
+                    continue
+                if caller_scope and callee_name in G and G.has_node(caller_scope):
+                    G.add_edge(caller_scope, callee_name, label='invokes')
+
+        for class_name in affected:
+            attrs = definitions.get(class_name)
+            if attrs and attrs['type'] == 'class':
+                self._add_contains_edges(G, class_name, attrs)
+
+        return G
+
     def find_scope(self, file_path, line_number):
         """
         Finds the function, class, or module-level scope that contains a given line number.
+        Uses the file's interval index, so each lookup is a bisect rather than a
+        scan over every definition in the file.
         """
-        if file_path not in self.structure_cache:
+        index = self.scope_index.get(file_path)
+        if index is None:
             return None
-            
-        structure = self.structure_cache[file_path]
-        
-        for func in structure.get('functions', []):
-            if func['start_line'] <= line_number <= func['end_line']:
-                return func['name']
-        
-        for cls in structure.get('classes', []):
-            if cls['start_line'] <= line_number <= cls['end_line']:
-                for meth in cls.get('methods', []):
-                    if meth['start_line'] <= line_number <= meth['end_line']:
-                        return f"{cls['name']}.{meth['name']}"
-                return cls['name']
-        
-        # --- If not in a function or class, it's in the module-level scope ---
-        if structure.get('module_level_code'):
-            return f"{file_path}::module_code"
-            
-        return None
+        return index.find(line_number)
 
     def find_files(self, start_dir):
         """
-        Finds all Python files in the given directory.
+        Finds all Python files in the given directory, skipping those excluded
+        by .gitignore files, the exclude list or the size limit of `self.discovery`.
         """
-        py_files = []
-        for root, _, files in os.walk(start_dir):
-            for file in files:
-                if file.endswith('.py'):
-                    py_files.append(os.path.join(root, file))
+        py_files = self.discovery.find(start_dir)
+        stats = self.discovery.stats
+        print(f"Discovered {stats['files']} Python files in {stats['directories']} directories "
+              f"({stats['pruned_directories']} directories pruned, {stats['skipped_files']} files skipped).")
         return py_files
 
     def build_graph(self):
         """
         The main public method to build the full graph.
         """
-        print("Finding all Python files in the repository...")
-        py_files = self.find_files(self.root)
-        
-        print("Extracting tags from files using tree-sitter...")
-        tags = self.get_all_tags(py_files)
+        # Tags were extracted alongside the AST structure in the parse pass,
+        # so no file is read or parsed again here.
+        tags = [tag for file_tags in self.tags_cache.values() for tag in file_tags]
         
         print("Constructing NetworkX graph from tags...")
         graph = self.tags_to_graph(tags)
+        self._record_source_files(graph)
         
         return graph
     
@@ -282,13 +572,41 @@ def generate_structure_json(repo_path: str, output_path: str = "structure.json")
         json.dump(graph_builder.structure_cache, f, indent=2)
     print(f"✅ structure.json saved at: {output_path}")
 
+# --- Process-pool workers for the parallel parse pass ---
+_worker_builder = None
+
+def _init_parse_worker(root):
+    """
+    Pool initializer: gives each worker a CodeGraph bound to `root`. __init__ is
+    skipped on purpose, since it would walk and parse the whole repository again.
+    """
+    global _worker_builder
+    _worker_builder = CodeGraph.__new__(CodeGraph)
+    _worker_builder.root = root
+    _worker_builder.workers = 1
+
+def _parse_file_task(file_path):
+    """Runs the single parse-and-extract pass for one file inside a worker."""
+    return _worker_builder._parse_and_extract(file_path)
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python core/construct_graph.py <directory>")
-        sys.exit(1)
+    arg_parser = argparse.ArgumentParser(description="Construct the code graph for a repository.")
+    arg_parser.add_argument("directory", help="Root of the repository to analyze.")
+    arg_parser.add_argument("--workers", type=int, default=1,
+                            help="Parse processes to use (1 = serial, 0 = all CPUs).")
+    arg_parser.add_argument("--exclude", action="append", default=[], metavar="PATTERN",
+                            help="gitignore-style pattern to exclude; a leading / anchors it to the root (repeatable).")
+    arg_parser.add_argument("--no-gitignore", action="store_true",
+                            help="Do not honor .gitignore files.")
+    arg_parser.add_argument("--max-file-size", type=int, default=None, metavar="BYTES",
+                            help="Skip Python files larger than this.")
+    args = arg_parser.parse_args()
 
-    dir_name = sys.argv[1]
-    graph_builder = CodeGraph(root=dir_name)
+    dir_name = args.directory
+    discovery = FileDiscovery(exclude=args.exclude, use_gitignore=not args.no_gitignore,
+                              max_file_size=args.max_file_size, workers=args.workers)
+    graph_builder = CodeGraph(root=dir_name, workers=args.workers, discovery=discovery)
     repo_graph = graph_builder.build_graph()
 
     print("\n" + "="*50)
@@ -298,10 +616,9 @@ if __name__ == "__main__":
     print("="*50)
 
     # --- THIS IS THE FIX: Save the graph and the structure cache ---
-    # Save the graph as a pickle file
-    graph_output_file = 'pickle_graph.pkl'
-    with open(graph_output_file, 'wb') as f:
-        pickle.dump(repo_graph, f)
+    # Save the graph as a graph store (see core/graph_store.py)
+    graph_output_file = 'graph.store'
+    save_graph(repo_graph, graph_output_file)
     print(f"🏅 Saved graph to '{graph_output_file}'")
 
     # Save the detailed structure as a JSON file
@@ -0,0 +1,348 @@
+# File: core/csr_backend.py
+#
+# A compressed-sparse-row (CSR) view of the repository graph for RepoSearcher.
+# Node names map to integer IDs, successors and predecessors live in flat
+# NumPy arrays addressed by per-node offsets, and every edge label gets its own
+# adjacency arrays, so "neighbors connected by label X" is an array slice
+# instead of a walk over NetworkX edge-attribute dicts.
+
+import numpy as np
+import networkx as nx
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def _csr_from_rows(rows: np.ndarray, cols: np.ndarray, num_rows: int):
+    """Builds (indptr, indices) from row-grouped (row, col) pairs, keeping their order."""
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+    return indptr, cols
+
+
+class CSRAdjacency:
+    """
+    Integer-indexed adjacency of a MultiDiGraph, built once.
+
+    Parallel edges between the same two nodes collapse into one "pair"; each
+    pair records which labels its edges carry. Successor and predecessor
+    lists keep the order NetworkX would report them in, so every query
+    answered here matches the NetworkX answer exactly.
+
+    Attributes:
+        names (List[str]): Node names by ID.
+        ids (Dict[str, int]): Node name -> ID.
+        out_indptr, out_dst (np.ndarray): CSR of distinct successors per node.
+        in_indptr, in_src (np.ndarray): CSR of distinct predecessors per node.
+        labels (List[Any]): Distinct edge labels (None for edges without one).
+        pair_labels (Dict[Any, np.ndarray]): label -> bool per successor pair.
+        label_adjacency (Dict[Any, tuple]): label -> (indptr, dst) of successors via that label.
+        out_degree, in_degree (np.ndarray): Edge counts per node, parallel edges included.
+        categories (List[str]): Distinct node categories; node_category holds their index (-1: none).
+        edge_label_counts (Dict[Any, int]): Number of edges per label.
+    """
+
+    def __init__(self, names: List[str], out_indptr: np.ndarray, out_dst: np.ndarray,
+                 in_indptr: np.ndarray, in_src: np.ndarray, pair_labels: Dict[Any, np.ndarray],
+                 out_degree: np.ndarray, in_degree: np.ndarray, node_categories: List[Optional[str]],
+                 edge_label_counts: Dict[Any, int]):
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.num_nodes = len(names)
+        self.out_indptr = out_indptr
+        self.out_dst = out_dst
+        self.in_indptr = in_indptr
+        self.in_src = in_src
+        self.labels = list(pair_labels)
+        self.pair_labels = pair_labels
+        self.out_degree = out_degree
+        self.in_degree = in_degree
+        self.edge_label_counts = edge_label_counts
+
+        self.categories = sorted({c for c in node_categories if c is not None})
+        category_ids = {c: i for i, c in enumerate(self.categories)}
+        self.node_category = np.array([category_ids.get(c, -1) for c in node_categories], dtype=np.int32)
+
+        # Per-label CSR: the successor pairs carrying each label, in successor order
+        pair_rows = np.repeat(np.arange(self.num_nodes), np.diff(out_indptr))
+        self.label_adjacency = {}
+        for label, mask in pair_labels.items():
+            self.label_adjacency[label] = _csr_from_rows(pair_rows[mask], out_dst[mask], self.num_nodes)
+
+        # Per-node queries slice list copies of the arrays: indexing a NumPy
+        # array one element at a time costs more than the lookup it replaces
+        self._out = (out_indptr.tolist(), out_dst.tolist())
+        self._in = (in_indptr.tolist(), in_src.tolist())
+        self._by_label = {label: (indptr.tolist(), dst.tolist())
+                          for label, (indptr, dst) in self.label_adjacency.items()}
+
+    @classmethod
+    def from_graph(cls, graph: nx.MultiDiGraph) -> "CSRAdjacency":
+        """Builds the arrays from a NetworkX MultiDiGraph (or DiGraph) in one pass over its edges."""
+        names = list(graph.nodes())
+        ids = {name: i for i, name in enumerate(names)}
+        n = len(names)
+        multigraph = graph.is_multigraph()
+
+        out_indptr = np.zeros(n + 1, dtype=np.int64)
+        out_dst = []
+        pair_label_lists = {}
+        edge_label_counts = {}
+        out_degree = [0] * n
+        in_degree = [0] * n
+        for i, (u, nbrs) in enumerate(graph.adjacency()):
+            for v, edges in nbrs.items():
+                pair = len(out_dst)
+                j = ids[v]
+                out_dst.append(j)
+                multiplicity = 0
+                for data in (edges.values() if multigraph else (edges,)):
+                    label = data.get('label')
+                    edge_label_counts[label] = edge_label_counts.get(label, 0) + 1
+                    pair_label_lists.setdefault(label, []).append(pair)
+                    multiplicity += 1
+                out_degree[i] += multiplicity
+                in_degree[j] += multiplicity
+            out_indptr[i + 1] = len(out_dst)
+
+        in_indptr = np.zeros(n + 1, dtype=np.int64)
+        in_src = []
+        for i, v in enumerate(names):
+            in_src.extend(ids[u] for u in graph.pred[v])
+            in_indptr[i + 1] = len(in_src)
+
+        num_pairs = len(out_dst)
+        pair_labels = {}
+        for label, pairs in pair_label_lists.items():
+            mask = np.zeros(num_pairs, dtype=bool)
+            mask[pairs] = True
+            pair_labels[label] = mask
+
+        out_dst = np.asarray(out_dst, dtype=np.int64)
+        categories = [graph.nodes[name].get('category') for name in names]
+        return cls(names, out_indptr, out_dst, in_indptr, np.asarray(in_src, dtype=np.int64),
+                   pair_labels, np.asarray(out_degree, dtype=np.int64), np.asarray(in_degree, dtype=np.int64),
+                   categories, edge_label_counts)
+
+    @classmethod
+    def from_store(cls, store) -> "CSRAdjacency":
+        """
+        Builds the arrays from a GraphStore, reusing its on-disk CSR columns
+        instead of materializing a NetworkX graph.
+
+        Args:
+            store (GraphStore): An open graph store.
+        """
+        n = store.num_nodes
+        edge_indptr = np.asarray(store.column('out_indptr'), dtype=np.int64)
+        edge_dst = np.asarray(store.column('edge_dst'), dtype=np.int64)
+        edge_label = np.asarray(store.column('edge_label'))
+        num_edges = len(edge_dst)
+        edge_src = np.repeat(np.arange(n), np.diff(edge_indptr))
+
+        # Parallel edges are stored next to each other, so a pair starts
+        # wherever the (src, dst) combination changes
+        starts = np.ones(num_edges, dtype=bool)
+        if num_edges:
+            starts[1:] = (edge_src[1:] != edge_src[:-1]) | (edge_dst[1:] != edge_dst[:-1])
+        edge_pair = np.cumsum(starts) - 1
+        out_dst = edge_dst[starts]
+        out_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edge_src[starts], minlength=n), out=out_indptr[1:])
+
+        # Edges of each label: interned labels from the column, the rest
+        # (non-string labels, extra attributes) from extras
+        label_edges = []
+        label_ids, first_edges = np.unique(edge_label, return_index=True)
+        for label_id, first in zip(label_ids.tolist(), first_edges.tolist()):
+            if label_id >= 0:
+                label_edges.append((first, store.strings[label_id], np.flatnonzero(edge_label == label_id)))
+        if label_ids.size and label_ids[0] < 0:
+            extra_edges = {}
+            for e, (_, attrs) in store.extras['edges'].items():
+                extra_edges.setdefault(attrs.get('label'), []).append(e)
+            for label, edges in extra_edges.items():
+                label_edges.append((min(edges), label, np.asarray(edges, dtype=np.int64)))
+
+        # Count labels in order of first appearance, like iterating the edges
+        edge_label_counts = {}
+        pair_labels = {}
+        for _, label, edges in sorted(label_edges, key=lambda entry: entry[0]):
+            edge_label_counts[label] = edge_label_counts.get(label, 0) + len(edges)
+            pairs = pair_labels.setdefault(label, np.zeros(len(out_dst), dtype=bool))
+            pairs[edge_pair[edges]] = True
+
+        strings = store.strings
+        code_node = store.column('code_node').tolist()
+        categories = []
+        for i, category_id in enumerate(store.column('category').tolist()):
+            if code_node[i]:
+                categories.append(strings[category_id])
+            else:
+                categories.append(store.node_attrs(i, ('category',)).get('category'))
+
+        return cls(list(store.names), out_indptr, out_dst,
+                   np.asarray(store.column('in_indptr'), dtype=np.int64),
+                   np.asarray(store.column('in_nbr'), dtype=np.int64),
+                   pair_labels, np.diff(edge_indptr), np.bincount(edge_dst, minlength=n).astype(np.int64),
+                   categories, edge_label_counts)
+
+    # --- Neighbor queries ---
+
+    def successors(self, i: int) -> List[int]:
+        indptr, dst = self._out
+        return dst[indptr[i]:indptr[i + 1]]
+
+    def predecessors(self, i: int) -> List[int]:
+        indptr, src = self._in
+        return src[indptr[i]:indptr[i + 1]]
+
+    def successors_by_label(self, i: int, labels: Iterable[Any]) -> List[int]:
+        """Successors of node `i` reached by at least one edge with one of `labels`."""
+        labels = [label for label in labels if label in self.pair_labels]
+        if not labels:
+            return []
+        if len(labels) == 1:
+            indptr, dst = self._by_label[labels[0]]
+            return dst[indptr[i]:indptr[i + 1]]
+        indptr, dst = self._out
+        lo, hi = indptr[i], indptr[i + 1]
+        mask = np.zeros(hi - lo, dtype=bool)
+        for label in labels:
+            mask |= self.pair_labels[label][lo:hi]
+        return self.out_dst[lo:hi][mask].tolist()
+
+    def pair_index(self, i: int, j: int) -> int:
+        """Index of the (i, j) successor pair, or -1 if there is no edge i -> j."""
+        indptr, dst = self._out
+        lo, hi = indptr[i], indptr[i + 1]
+        try:
+            return dst.index(j, lo, hi)
+        except ValueError:
+            return -1
+
+    def edge_labels(self, i: int, j: int) -> List[Any]:
+        """Labels of the edges from node `i` to node `j`."""
+        pair = self.pair_index(i, j)
+        if pair < 0:
+            return []
+        return [label for label in self.labels if self.pair_labels[label][pair]]
+
+    def names_of(self, node_ids: Iterable[int]) -> List[str]:
+        names = self.names
+        return [names[i] for i in node_ids]
+
+    def nodes_in_categories(self, categories: Iterable[str]) -> np.ndarray:
+        """IDs of nodes whose category is one of `categories` (None: no category), in node order."""
+        wanted = [self.categories.index(c) if c is not None else -1
+                  for c in categories if c is None or c in self.categories]
+        if not wanted:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(np.isin(self.node_category, wanted))
+
+    # --- Traversals; same visiting order as the NetworkX-based RepoSearcher methods ---
+
+    def iter_dfs(self, start: int, depth_limit: int) -> Iterator[int]:
+        """Yields node IDs in depth-first discovery order, up to `depth_limit` edges from `start`."""
+        out_indptr, out_dst = self._out
+        seen = bytearray(self.num_nodes)
+        stack = [(start, 0)]
+        while stack:
+            node, level = stack.pop()
+            if seen[node]:
+                continue
+            seen[node] = 1
+            yield node
+            if level < depth_limit:
+                level += 1
+                stack.extend((neighbor, level)
+                             for neighbor in reversed(out_dst[out_indptr[node]:out_indptr[node + 1]])
+                             if not seen[neighbor])
+
+    def iter_bfs(self, start: int, depth_limit: int) -> Iterator[int]:
+        """Yields node IDs in breadth-first discovery order, up to `depth_limit` edges from `start`."""
+        out_indptr, out_dst = self._out
+        seen = bytearray(self.num_nodes)
+        queue = deque([(start, 0)])
+        while queue:
+            node, level = queue.popleft()
+            if seen[node]:
+                continue
+            seen[node] = 1
+            yield node
+            if level < depth_limit:
+                level += 1
+                queue.extend((neighbor, level)
+                             for neighbor in out_dst[out_indptr[node]:out_indptr[node + 1]]
+                             if not seen[neighbor])
+
+    def iter_depths(self, start: int, max_depth: int) -> Iterator[Tuple[int, int]]:
+        """Yields (node ID, depth) pairs as a breadth-first search from `start` first reaches them."""
+        out_indptr, out_dst = self._out
+        seen = bytearray(self.num_nodes)
+        seen[start] = 1
+        yield start, 0
+        queue = deque([(start, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            if depth < max_depth:
+                depth += 1
+                for successor in out_dst[out_indptr[node]:out_indptr[node + 1]]:
+                    if not seen[successor]:
+                        seen[successor] = 1
+                        yield successor, depth
+                        queue.append((successor, depth))
+
+    def shortest_path(self, source: int, target: int) -> Optional[List[int]]:
+        """
+        Bidirectional BFS, expanding the smaller fringe first exactly like
+        networkx.bidirectional_shortest_path, so ties resolve to the same path.
+        Returns None if there is no path.
+        """
+        if source == target:
+            return [source]
+        out_indptr, out_dst = self._out
+        in_indptr, in_src = self._in
+        pred = {source: None}
+        succ = {target: None}
+        forward_fringe = [source]
+        reverse_fringe = [target]
+        meet = None
+        while forward_fringe and reverse_fringe and meet is None:
+            if len(forward_fringe) <= len(reverse_fringe):
+                this_level, forward_fringe = forward_fringe, []
+                for v in this_level:
+                    for w in out_dst[out_indptr[v]:out_indptr[v + 1]]:
+                        if w not in pred:
+                            forward_fringe.append(w)
+                            pred[w] = v
+                        if w in succ:
+                            meet = w
+                            break
+                    if meet is not None:
+                        break
+            else:
+                this_level, reverse_fringe = reverse_fringe, []
+                for v in this_level:
+                    for w in in_src[in_indptr[v]:in_indptr[v + 1]]:
+                        if w not in succ:
+                            succ[w] = v
+                            reverse_fringe.append(w)
+                        if w in pred:
+                            meet = w
+                            break
+                    if meet is not None:
+                        break
+        if meet is None:
+            return None
+
+        path = []
+        w = meet
+        while w is not None:
+            path.append(w)
+            w = pred[w]
+        path.reverse()
+        w = succ[path[-1]]
+        while w is not None:
+            path.append(w)
+            w = succ[w]
+        return path
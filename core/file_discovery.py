@@ -0,0 +1,290 @@
+# File: core/file_discovery.py
+#
+# Finds the Python files the graph builder should parse. Directories matched by
+# .gitignore files or by the exclude list (VCS metadata, virtualenvs,
+# node_modules, build outputs, vendored code) are pruned before they are
+# entered, oversized files can be skipped, and directory listings can run on a
+# thread pool while the result keeps the same order as a top-down os.walk.
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Iterable, List, Optional, Tuple
+
+# gitignore-style patterns excluded unless use_default_excludes=False. Build
+# outputs and vendored trees are anchored to the root: a package's own build/
+# or vendor/ subpackage is source, and unanchored they would match at any depth
+DEFAULT_EXCLUDES = (
+    ".git/",
+    ".hg/",
+    ".svn/",
+    "__pycache__/",
+    "node_modules/",
+    ".venv/",
+    "venv/",
+    "site-packages/",
+    ".tox/",
+    ".nox/",
+    ".mypy_cache/",
+    ".pytest_cache/",
+    "/build/",
+    "/dist/",
+    "*.egg-info/",
+    "/vendor/",
+    "/_vendor/",
+    "/third_party/",
+)
+
+
+def _glob_to_regex(glob: str) -> str:
+    """Translates the glob part of one gitignore pattern into a regex body."""
+    out = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if glob.startswith("**/", i) and (i == 0 or glob[i - 1] == "/"):
+            out.append("(?:.*/)?")
+            i += 3
+        elif glob.startswith("**", i) and i + 2 == n and (i == 0 or glob[i - 1] == "/"):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+            while i < n and glob[i] == "*":
+                i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            close = glob.find("]", i + 2 if glob.startswith("[!", i) or glob.startswith("[]", i) else i + 1)
+            if close == -1:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                body = glob[i + 1:close]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = close + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(glob[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+def parse_ignore_line(line: str):
+    """
+    Parses one line of a .gitignore file.
+
+    Returns:
+        Optional[Tuple[Pattern, bool, bool]]: (regex, negate, dir_only), or None
+        for blank lines and comments. The regex matches paths relative to the
+        directory holding the .gitignore, with '/' separators.
+    """
+    line = line.rstrip("\n").rstrip("\r")
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    # A slash anywhere but the end anchors the pattern to the .gitignore's directory
+    anchored = "/" in line
+    line = line.lstrip("/")
+    prefix = "" if anchored else "(?:.*/)?"
+    return re.compile(prefix + _glob_to_regex(line) + r"\Z"), negate, dir_only
+
+
+class IgnoreRules:
+    """
+    An ordered, immutable set of gitignore rules. The last matching rule wins,
+    and rules from deeper .gitignore files come after those of their parents.
+    """
+
+    def __init__(self, rules: Tuple = ()):
+        # Each rule is (base_dir, regex, negate, dir_only); base_dir is '' or ends with '/'
+        self.rules = rules
+
+    def extend(self, base_dir: str, lines: Iterable[str]) -> "IgnoreRules":
+        """Returns a new rule set with the given lines added, relative to `base_dir`."""
+        added = []
+        base = f"{base_dir}/" if base_dir else ""
+        for line in lines:
+            parsed = parse_ignore_line(line)
+            if parsed is not None:
+                added.append((base,) + parsed)
+        return IgnoreRules(self.rules + tuple(added)) if added else self
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """
+        Args:
+            rel_path (str): Path relative to the discovery root, with '/' separators.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            bool: True if the path is excluded.
+        """
+        for base, regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not rel_path.startswith(base):
+                    continue
+                path = rel_path[len(base):]
+            else:
+                path = rel_path
+            if regex.match(path):
+                return not negate
+        return False
+
+
+class FileDiscovery:
+    """
+    Ignore-aware discovery of Python source files.
+
+    Attributes:
+        use_gitignore (bool): Honor .gitignore files and .git/info/exclude.
+        max_file_size (Optional[int]): Files larger than this many bytes are skipped.
+        workers (int): Threads used to list directories; 1 lists them serially.
+        stats (dict): Counts from the last `find` call.
+    """
+
+    def __init__(self, exclude: Optional[Iterable[str]] = None, use_default_excludes: bool = True,
+                 use_gitignore: bool = True, max_file_size: Optional[int] = None, workers: int = 1):
+        """
+        Args:
+            exclude (Iterable[str]): Extra gitignore-style patterns, relative to the root.
+            use_default_excludes (bool): Also apply DEFAULT_EXCLUDES.
+            use_gitignore (bool): Honor .gitignore files found while walking.
+            max_file_size (int): Skip files larger than this many bytes. None means no limit.
+            workers (int): Threads used to list directories. 0 uses os.cpu_count().
+        """
+        patterns = list(DEFAULT_EXCLUDES) if use_default_excludes else []
+        patterns.extend(exclude or [])
+        self.base_rules = IgnoreRules().extend("", patterns)
+        self.use_gitignore = use_gitignore
+        self.max_file_size = max_file_size
+        self.workers = workers if workers and workers > 0 else (os.cpu_count() or 1)
+        self.stats = {}
+
+    def _root_rules(self, start_dir: str) -> IgnoreRules:
+        rules = self.base_rules
+        if self.use_gitignore:
+            rules = rules.extend("", self._read_lines(os.path.join(start_dir, ".git", "info", "exclude")))
+        return rules
+
+    @staticmethod
+    def _read_lines(path: str) -> List[str]:
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                return f.readlines()
+        except OSError:
+            return []
+
+    def _scan_dir(self, dir_path: str, rel_dir: str, rules: IgnoreRules):
+        """
+        Lists one directory.
+
+        Returns:
+            Tuple[List[str], List[tuple], int, int]: Python files kept, the
+            subdirectories to descend into as (path, rel_path, rules), and the
+            number of pruned directories and skipped files.
+        """
+        try:
+            entries = list(os.scandir(dir_path))
+        except OSError:
+            return [], [], 0, 0
+
+        if self.use_gitignore and any(entry.name == ".gitignore" for entry in entries):
+            rules = rules.extend(rel_dir, self._read_lines(os.path.join(dir_path, ".gitignore")))
+
+        files, subdirs = [], []
+        pruned = skipped = 0
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        for entry in entries:
+            rel_path = prefix + entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                # Like os.walk, symlinked directories are not followed
+                if entry.is_symlink():
+                    continue
+                if rules.ignored(rel_path, True) or os.path.exists(os.path.join(entry.path, "pyvenv.cfg")):
+                    pruned += 1
+                    continue
+                subdirs.append((entry.path, rel_path, rules))
+            elif entry.name.endswith(".py"):
+                if rules.ignored(rel_path, False):
+                    skipped += 1
+                    continue
+                if self.max_file_size is not None:
+                    try:
+                        if entry.stat().st_size > self.max_file_size:
+                            skipped += 1
+                            continue
+                    except OSError:
+                        continue
+                files.append(entry.path)
+        return files, subdirs, pruned, skipped
+
+    def find(self, start_dir: str) -> List[str]:
+        """
+        Finds all Python files under `start_dir` that are not excluded.
+
+        The result is in the same order as a top-down os.walk, whether or not
+        directories were listed concurrently.
+
+        Args:
+            start_dir (str): Directory to search.
+
+        Returns:
+            List[str]: Paths of the discovered files, joined onto `start_dir`.
+        """
+        listings = {}
+        root_task = (start_dir, "", self._root_rules(start_dir))
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                pending = {pool.submit(self._scan_dir, *root_task): start_dir}
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        dir_path = pending.pop(future)
+                        listings[dir_path] = future.result()
+                        for task in listings[dir_path][1]:
+                            pending[pool.submit(self._scan_dir, *task)] = task[0]
+        else:
+            stack = [root_task]
+            while stack:
+                task = stack.pop()
+                listings[task[0]] = self._scan_dir(*task)
+                stack.extend(listings[task[0]][1])
+
+        # Reassemble the listings depth-first so the order matches os.walk
+        py_files = []
+        pruned = skipped = 0
+        stack = [start_dir]
+        while stack:
+            files, subdirs, dir_pruned, dir_skipped = listings[stack.pop()]
+            py_files.extend(files)
+            pruned += dir_pruned
+            skipped += dir_skipped
+            stack.extend(task[0] for task in reversed(subdirs))
+
+        self.stats = {'files': len(py_files), 'directories': len(listings),
+                      'pruned_directories': pruned, 'skipped_files': skipped}
+        return py_files
@@ -0,0 +1,126 @@
+# File: core/fuzzy_index.py
+#
+# Shortlists names similar to a query before the exact difflib score, so a
+# fuzzy lookup no longer runs SequenceMatcher against every node name.
+#
+# The index holds character and character-bigram inverted indices with
+# counts. For a query, the shared character and bigram counts of every name
+# come from one bincount each over the query grams' postings. Both bound the
+# longest common subsequence, which in turn bounds SequenceMatcher.ratio()
+# = 2 * matches / (len(a) + len(b)), with matches <= LCS:
+#
+#     LCS <= shared characters
+#     shared bigrams >= 3 * LCS - (len(a) + len(b)) - 1
+#
+# (a deletion from the query breaks at most 2 of its bigrams, an insertion at
+# most 1). Names whose bound is not above the threshold cannot match and are
+# skipped; the rest get the exact ratio, so results are identical to the full
+# scan.
+
+import numpy as np
+from difflib import SequenceMatcher
+from typing import List, Tuple
+
+_BITS = 21
+
+
+def _codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode('utf-32-le', errors='surrogatepass'), dtype=np.uint32).astype(np.int64)
+
+
+class _GramPostings:
+    """Inverted index from a gram code to the names containing it, with per-name counts."""
+
+    def __init__(self, codes: np.ndarray, owner: np.ndarray, num_names: int):
+        self.num_names = num_names
+        # Count each (gram, name) pair, then group the pairs by gram
+        order = np.lexsort((owner, codes))
+        codes, owner = codes[order], owner[order]
+        first = np.ones(len(codes), dtype=bool)
+        first[1:] = (codes[1:] != codes[:-1]) | (owner[1:] != owner[:-1])
+        starts = np.flatnonzero(first)
+        self.counts = np.diff(np.append(starts, len(codes))).astype(np.int64)
+        pair_codes = codes[starts]
+        self.nodes = owner[starts]
+        key_first = np.ones(len(pair_codes), dtype=bool)
+        key_first[1:] = pair_codes[1:] != pair_codes[:-1]
+        key_starts = np.flatnonzero(key_first)
+        self.keys = pair_codes[key_starts]
+        self.indptr = np.append(key_starts, len(pair_codes))
+
+    def shared(self, query_codes: np.ndarray) -> np.ndarray:
+        """Size of the gram multiset intersection between the query's grams and every name's."""
+        if not len(query_codes) or not len(self.keys):
+            return np.zeros(self.num_names, dtype=np.int64)
+        query_codes, query_counts = np.unique(query_codes, return_counts=True)
+        positions = np.searchsorted(self.keys, query_codes)
+        nodes, weights = [], []
+        for position, code, count in zip(positions.tolist(), query_codes.tolist(), query_counts.tolist()):
+            if position < len(self.keys) and self.keys[position] == code:
+                lo, hi = self.indptr[position], self.indptr[position + 1]
+                nodes.append(self.nodes[lo:hi])
+                weights.append(np.minimum(self.counts[lo:hi], count))
+        if not nodes:
+            return np.zeros(self.num_names, dtype=np.int64)
+        return np.bincount(np.concatenate(nodes), weights=np.concatenate(weights),
+                           minlength=self.num_names).astype(np.int64)
+
+
+def _bigrams(chars: np.ndarray) -> np.ndarray:
+    return (chars[:-1] << _BITS) | chars[1:]
+
+
+class FuzzyNameIndex:
+    """
+    Character and bigram index over a fixed list of names, matched case-insensitively.
+
+    Attributes:
+        names (List[str]): The indexed names; results refer to positions in this list.
+    """
+
+    def __init__(self, names: List[str]):
+        self.names = list(names)
+        self._lowered = [name.lower() for name in self.names]
+        self.lengths = np.array([len(name) for name in self._lowered], dtype=np.int64)
+
+        chars = _codepoints(''.join(self._lowered))
+        owner = np.repeat(np.arange(len(self.names)), self.lengths)
+        self._chars = _GramPostings(chars, owner, len(self.names))
+        # Bigrams within one name: the next character belongs to the same owner
+        same = owner[1:] == owner[:-1]
+        self._bigrams = _GramPostings(_bigrams(chars)[same], owner[:-1][same], len(self.names))
+
+    def candidates(self, query: str, threshold: float = 0.8) -> np.ndarray:
+        """Positions of the names whose similarity to `query` may exceed `threshold`, ascending."""
+        query = query.lower()
+        chars = _codepoints(query)
+        total = self.lengths + len(query)
+        # Matched characters are bounded by the shorter length, the shared
+        # characters and, through the shared bigrams, the LCS
+        lcs_bound = np.minimum(np.minimum(self.lengths, len(query)), self._chars.shared(chars))
+        lcs_bound = np.minimum(lcs_bound, (self._bigrams.shared(_bigrams(chars)) + total + 1) // 3)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Same expression as SequenceMatcher.ratio(), which is 1.0 for two empty strings
+            bound = np.where(total > 0, 2.0 * lcs_bound / total, 1.0)
+        return np.flatnonzero(bound > threshold)
+
+    def matches(self, query: str, threshold: float = 0.8) -> List[Tuple[int, float]]:
+        """
+        Names more similar to `query` than `threshold`, ignoring case.
+
+        Args:
+            query (str): The name to look up.
+            threshold (float): Minimum SequenceMatcher ratio, exclusive.
+
+        Returns:
+            List[Tuple[int, float]]: (position in `names`, ratio) for every
+            match, in index order, exactly as a scan with
+            SequenceMatcher(None, query.lower(), name.lower()).ratio() finds them.
+        """
+        lowered = query.lower()
+        results = []
+        for position in self.candidates(query, threshold).tolist():
+            similarity = SequenceMatcher(None, lowered, self._lowered[position]).ratio()
+            if similarity > threshold:
+                results.append((position, similarity))
+        return results
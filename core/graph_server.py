@@ -0,0 +1,355 @@
+# File: core/graph_server.py
+#
+# A long-lived local query server for the repository graph. It loads a graph
+# once and answers RepoSearcher queries (dependencies, references, traversals,
+# node info, pattern search) as JSON over localhost HTTP, so scripts that query
+# thousands of nodes stop paying the load cost on every call.
+#
+# The server records its address in "<graph_path>.server.json". The CLI tools
+# use `get_client` to find it and fall back to loading the graph directly when
+# no server is running.
+#
+# Usage (from the repository root):
+#     python -m core.graph_server graph.store [--port 0]
+
+import os
+import sys
+import json
+import signal
+import socket
+import argparse
+import threading
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+if not __package__:
+    # Running as `python core/graph_server.py`: make the `core` package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.graph_store import load_graph
+from core.graph_searcher import RepoSearcher
+from core.text_index import TextIndex
+from core.source_store import get_node_source
+
+
+class GraphServerUnavailable(Exception):
+    """Raised when no query server is running for a graph."""
+
+
+class QueryError(Exception):
+    """Raised by the client when the server rejects or fails a query."""
+
+
+def state_file_path(graph_path: str) -> str:
+    """Path of the file a running server writes its address to."""
+    return f"{os.path.abspath(graph_path).rstrip(os.sep)}.server.json"
+
+
+def _node_info(searcher: RepoSearcher, node_name: str) -> Optional[Dict[str, Any]]:
+    """The node's attributes, source text and direct connections, as returned by get_node_info.py."""
+    if node_name not in searcher.graph:
+        return None
+    node_attributes = dict(searcher.graph.nodes[node_name])
+    node_attributes['info'] = get_node_source(node_attributes)
+    node_attributes['outgoing_connections'] = searcher.get_dependencies(node_name)
+    node_attributes['incoming_connections'] = searcher.get_references(node_name)
+    return node_attributes
+
+
+def _connections(searcher: RepoSearcher, node_name: str) -> Optional[Dict[str, List[str]]]:
+    if node_name not in searcher.graph:
+        return None
+    return {'incoming': searcher.get_references(node_name), 'outgoing': searcher.get_dependencies(node_name)}
+
+
+# Query name -> handler(searcher, **args). Only these can be called remotely.
+QUERY_HANDLERS = {
+    'nodes': lambda searcher: list(searcher.graph.nodes()),
+    'has_node': lambda searcher, node_name: node_name in searcher.graph,
+    'node_attributes': lambda searcher, node_name: searcher.get_node_info(node_name) or None,
+    'dependencies': lambda searcher, node_name: searcher.get_dependencies(node_name),
+    'references': lambda searcher, node_name: searcher.get_references(node_name),
+    'connections': _connections,
+    'node_info': _node_info,
+    'class_methods': lambda searcher, class_name: searcher.get_class_methods(class_name),
+    'function_calls': lambda searcher, node_name: searcher.get_function_calls(node_name),
+    'dfs': lambda searcher, start_node, depth_limit=5: searcher.dfs_traversal(start_node, depth_limit),
+    'bfs': lambda searcher, start_node, depth_limit=5: searcher.bfs_traversal(start_node, depth_limit),
+    'dependency_depth': lambda searcher, node_name, max_depth=10: searcher.get_dependency_depth(node_name, max_depth),
+    'shortest_path': lambda searcher, source, target: searcher.find_shortest_path(source, target),
+    'search': lambda searcher, pattern, search_in='name': searcher.search_nodes_by_pattern(pattern, search_in),
+    'search_prefix': lambda searcher, prefix, search_in='name': searcher.search_nodes_by_prefix(prefix, search_in),
+    'search_regex': lambda searcher, regex, search_in='name', flags=0: searcher.search_nodes_by_regex(
+        regex, search_in, flags),
+    'nodes_by_category': lambda searcher, category: searcher.get_nodes_by_category(category),
+    'statistics': lambda searcher: searcher.get_graph_statistics(),
+}
+
+
+class GraphQueryService:
+    """
+    Holds the loaded graph and runs queries against it. The graph is reloaded
+    automatically when the file or store at `graph_path` is replaced.
+    """
+
+    def __init__(self, graph_path: str):
+        self.graph_path = graph_path
+        self._lock = threading.Lock()
+        self._signature = None
+        self.searcher = None
+        self.queries_served = 0
+        self.refresh()
+
+    def _current_signature(self):
+        st = os.stat(self.graph_path)
+        return st.st_ino, st.st_mtime_ns
+
+    def refresh(self):
+        """Loads the graph if it has not been loaded yet or has changed on disk."""
+        try:
+            signature = self._current_signature()
+        except OSError:
+            if self.searcher is None:
+                raise
+            # The graph is being replaced; keep serving the loaded copy
+            return
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            print(f"Loading graph from '{self.graph_path}'...")
+            graph = load_graph(self.graph_path)
+            # Persisted next to the graph, so only the first server for a graph builds it
+            text_index = TextIndex(graph, self.graph_path)
+            text_index.build_all()
+            self.searcher = RepoSearcher(graph, text_index=text_index)
+            self._signature = signature
+            print(f"Graph loaded with {len(graph.nodes())} nodes and {len(graph.edges())} edges.")
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            'graph': os.path.abspath(self.graph_path),
+            'nodes': self.searcher.graph.number_of_nodes(),
+            'edges': self.searcher.graph.number_of_edges(),
+            'queries_served': self.queries_served,
+        }
+
+    def run(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Runs one query of the form {"op": name, "args": {...}}.
+
+        Returns:
+            Dict[str, Any]: {"ok": True, "result": ...} or {"ok": False, "error": message}.
+        """
+        op = query.get('op')
+        handler = QUERY_HANDLERS.get(op)
+        if handler is None:
+            return {'ok': False, 'error': f"Unknown query '{op}'"}
+        try:
+            result = handler(self.searcher, **(query.get('args') or {}))
+        except Exception as e:
+            return {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        self.queries_served += 1
+        return {'ok': True, 'result': result}
+
+
+class _QueryRequestHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps client connections open between queries
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY each
+    # response would wait out the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def _send_json(self, status: int, payload: Any):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.server.service.health())
+        else:
+            self._send_json(404, {'ok': False, 'error': f"Unknown path '{self.path}'"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self._send_json(400, {'ok': False, 'error': f"Invalid request body: {e}"})
+            return
+
+        service = self.server.service
+        service.refresh()
+        if self.path == "/query":
+            self._send_json(200, service.run(payload))
+        elif self.path == "/batch":
+            self._send_json(200, [service.run(query) for query in payload.get('queries', [])])
+        else:
+            self._send_json(404, {'ok': False, 'error': f"Unknown path '{self.path}'"})
+
+    def log_message(self, format, *args):
+        # One line per query would drown the console in batch runs
+        pass
+
+
+def serve(graph_path: str, host: str = "127.0.0.1", port: int = 0):
+    """
+    Loads the graph and serves queries until interrupted. The address is
+    written to the state file for clients and removed on shutdown.
+
+    Args:
+        graph_path (str): Graph store (or legacy pickle) to serve.
+        host (str): Interface to bind; keep the default to stay local-only.
+        port (int): TCP port; 0 lets the OS pick a free one.
+    """
+    service = GraphQueryService(graph_path)
+    httpd = ThreadingHTTPServer((host, port), _QueryRequestHandler)
+    httpd.daemon_threads = True
+    httpd.service = service
+    bound_host, bound_port = httpd.server_address[:2]
+
+    state_path = state_file_path(graph_path)
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump({'host': bound_host, 'port': bound_port, 'pid': os.getpid()}, f)
+    print(f"Serving graph queries for '{graph_path}' on http://{bound_host}:{bound_port} (Ctrl+C to stop)")
+
+    def _stop(signum, frame):
+        raise KeyboardInterrupt
+    # Also clean up on `kill`; background jobs may not receive Ctrl+C at all
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        try:
+            os.remove(state_path)
+        except OSError:
+            pass
+        print("Graph query server stopped.")
+
+
+class GraphClient:
+    """Client for a running graph query server, reusing one keep-alive connection."""
+
+    def __init__(self, host: str, port: int, timeout: float = 60.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._connection = None
+
+    @classmethod
+    def for_graph(cls, graph_path: str) -> "GraphClient":
+        """
+        Returns a client for the server of `graph_path`.
+
+        Raises:
+            GraphServerUnavailable: If no server has registered for this graph.
+        """
+        try:
+            with open(state_file_path(graph_path), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            raise GraphServerUnavailable(f"No graph query server running for '{graph_path}'")
+        return cls(state['host'], state['port'])
+
+    def _request(self, method: str, path: str, payload: Any = None) -> Any:
+        body = None if payload is None else json.dumps(payload).encode('utf-8')
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        # A kept-alive connection may have been closed by the server; retry once on a fresh one
+        for attempt in range(2):
+            try:
+                if self._connection is None:
+                    self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                    self._connection.connect()
+                    # http.client also writes headers and body separately
+                    self._connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self._connection.request(method, path, body=body, headers=headers)
+                response = self._connection.getresponse()
+                return json.loads(response.read())
+            except (OSError, http.client.HTTPException) as e:
+                self.close()
+                if attempt:
+                    raise GraphServerUnavailable(f"Graph query server at {self.host}:{self.port} is unreachable: {e}")
+
+    def health(self) -> Dict[str, Any]:
+        return self._request("GET", "/health")
+
+    def query(self, op: str, **args) -> Any:
+        """
+        Runs one query and returns its result.
+
+        Raises:
+            GraphServerUnavailable: If the server cannot be reached.
+            QueryError: If the server reports an error for the query.
+        """
+        response = self._request("POST", "/query", {'op': op, 'args': args})
+        if not response.get('ok'):
+            raise QueryError(response.get('error'))
+        return response['result']
+
+    def batch(self, queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Runs many queries in one round trip. Each query is {"op": ..., "args": {...}};
+        each response is {"ok": ..., "result"/"error": ...}, in the same order.
+        """
+        return self._request("POST", "/batch", {'queries': queries})
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+_clients = {}
+
+
+def get_client(graph_path: str) -> Optional[GraphClient]:
+    """
+    Returns a connected client for `graph_path`, or None if no server is
+    running for it. Clients are cached per graph, so repeated calls from the
+    CLI helpers share one connection.
+    """
+    key = os.path.abspath(graph_path)
+    client = _clients.get(key)
+    if client is None:
+        try:
+            client = GraphClient.for_graph(graph_path)
+            client.health()
+        except GraphServerUnavailable:
+            return None
+        _clients[key] = client
+    return client
+
+
+def query_or_none(graph_path: str, op: str, **args):
+    """
+    Runs a query on the server for `graph_path`.
+
+    Returns:
+        Tuple[bool, Any]: (True, result) if a server answered, (False, None)
+        if the caller should fall back to loading the graph itself.
+    """
+    client = get_client(graph_path)
+    if client is None:
+        return False, None
+    try:
+        return True, client.query(op, **args)
+    except GraphServerUnavailable:
+        _clients.pop(os.path.abspath(graph_path), None)
+        return False, None
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Serve repository graph queries over localhost HTTP.")
+    arg_parser.add_argument("graph_path", help="Graph store (or legacy pickle) to serve.")
+    arg_parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: localhost only).")
+    arg_parser.add_argument("--port", type=int, default=0, help="Port to listen on (0 = pick a free port).")
+    args = arg_parser.parse_args()
+    serve(args.graph_path, host=args.host, port=args.port)
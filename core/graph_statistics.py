@@ -0,0 +1,262 @@
+# File: core/graph_statistics.py
+#
+# Whole-graph statistics computed from the CSR adjacency arrays in linear
+# time, without copying the graph: edge-label histograms, degree
+# distributions, weakly and strongly connected components, and cycle
+# summaries. Cycle enumeration runs per strongly connected component and is
+# bounded by cycle length, cycle count and search steps, so it cannot blow up
+# on densely cyclic code.
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse import csgraph
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.csr_backend import CSRAdjacency
+
+# Default caps used by `cycle_summary`
+DEFAULT_MAX_CYCLE_LENGTH = 10
+DEFAULT_MAX_CYCLES_PER_SCC = 100
+DEFAULT_MAX_STEPS_PER_SCC = 100_000
+
+
+def _histogram(values: np.ndarray) -> Dict[int, int]:
+    """{value: count} for non-negative integer values, in ascending order of value."""
+    counts = np.bincount(values) if len(values) else np.zeros(0, dtype=np.int64)
+    return {value: int(counts[value]) for value in np.flatnonzero(counts).tolist()}
+
+
+def _distribution(values: np.ndarray) -> Dict[str, Any]:
+    return {
+        'histogram': _histogram(values),
+        'min': int(values.min()) if len(values) else 0,
+        'max': int(values.max()) if len(values) else 0,
+        'mean': float(values.mean()) if len(values) else 0.0,
+        'median': float(np.median(values)) if len(values) else 0.0,
+    }
+
+
+class GraphStatistics:
+    """
+    Linear-time statistics over a CSRAdjacency. Component labels are computed
+    once and cached.
+
+    Attributes:
+        csr (CSRAdjacency): The graph's adjacency arrays.
+    """
+
+    def __init__(self, csr: CSRAdjacency):
+        self.csr = csr
+        n = csr.num_nodes
+        self._adjacency = sp.csr_array((np.ones(len(csr.out_dst), dtype=np.int8), csr.out_dst, csr.out_indptr),
+                                       shape=(n, n))
+        self._weak = None
+        self._strong = None
+
+    def edge_label_histogram(self) -> Dict[str, int]:
+        """Number of edges per label, in order of first appearance; unlabeled edges count as 'unknown'."""
+        histogram = {}
+        for label, count in self.csr.edge_label_counts.items():
+            label = 'unknown' if label is None else label
+            histogram[label] = histogram.get(label, 0) + count
+        return histogram
+
+    def degree_distribution(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            Dict[str, Dict[str, Any]]: For 'in', 'out' and 'total' degree (parallel
+            edges counted), a {degree: node count} histogram and min/max/mean/median.
+        """
+        return {
+            'in': _distribution(self.csr.in_degree),
+            'out': _distribution(self.csr.out_degree),
+            'total': _distribution(self.csr.in_degree + self.csr.out_degree),
+        }
+
+    def weak_component_labels(self) -> np.ndarray:
+        """Weakly connected component of every node."""
+        if self._weak is None:
+            self._weak = csgraph.connected_components(self._adjacency, directed=True, connection='weak')[1]
+        return self._weak
+
+    def strong_component_labels(self) -> np.ndarray:
+        """Strongly connected component of every node."""
+        if self._strong is None:
+            self._strong = csgraph.connected_components(self._adjacency, directed=True, connection='strong')[1]
+        return self._strong
+
+    def weakly_connected_components(self) -> List[List[int]]:
+        """Node IDs of each weakly connected component, components in order of their first node."""
+        return self._group(self.weak_component_labels())
+
+    def cyclic_components(self) -> List[List[int]]:
+        """
+        Strongly connected components that contain a cycle: those with more
+        than one node, plus single nodes with a self-loop. Node IDs ascend
+        within a component; components are in order of their first node.
+        """
+        labels = self.strong_component_labels()
+        sizes = np.bincount(labels, minlength=1)
+        self_loops = self._self_loops()
+        cyclic = (sizes[labels] > 1) | self_loops
+        return self._group(labels, np.flatnonzero(cyclic))
+
+    def _self_loops(self) -> np.ndarray:
+        indptr, dst = self.csr.out_indptr, self.csr.out_dst
+        rows = np.repeat(np.arange(self.csr.num_nodes), np.diff(indptr))
+        loops = np.zeros(self.csr.num_nodes, dtype=bool)
+        loops[rows[rows == dst]] = True
+        return loops
+
+    @staticmethod
+    def _group(labels: np.ndarray, node_ids: Optional[np.ndarray] = None) -> List[List[int]]:
+        """Groups node IDs by label; groups in order of their first node, IDs ascending."""
+        if node_ids is None:
+            node_ids = np.arange(len(labels))
+        if not len(node_ids):
+            return []
+        node_labels = labels[node_ids]
+        order = np.argsort(node_labels, kind='stable')
+        sorted_ids = node_ids[order]
+        bounds = np.flatnonzero(np.diff(node_labels[order])) + 1
+        groups = np.split(sorted_ids, bounds)
+        groups.sort(key=lambda group: group[0])
+        return [group.tolist() for group in groups]
+
+    def iter_cycles(self, max_length: Optional[int] = DEFAULT_MAX_CYCLE_LENGTH,
+                    max_cycles_per_scc: Optional[int] = DEFAULT_MAX_CYCLES_PER_SCC,
+                    max_steps_per_scc: Optional[int] = DEFAULT_MAX_STEPS_PER_SCC,
+                    truncated: Optional[List[int]] = None) -> Iterator[List[int]]:
+        """
+        Yields elementary cycles as lists of node IDs, one strongly connected
+        component at a time. Each cycle is reported once, starting at its
+        lowest node ID. None for a cap means no limit.
+
+        Args:
+            max_length (int): Longest cycle, in nodes, to report.
+            max_cycles_per_scc (int): Stop a component after this many cycles.
+            max_steps_per_scc (int): Stop a component after this many edge expansions.
+            truncated (List[int]): If given, receives the index (in
+                `cyclic_components()` order) of every component that hit a cap.
+        """
+        out_indptr, out_dst = self.csr._out
+        labels = self.strong_component_labels().tolist()
+        for index, component in enumerate(self.cyclic_components()):
+            label = labels[component[0]]
+            found = steps = 0
+            capped = False
+            for start in component:
+                # Paths from `start` through higher IDs of the same component
+                path = [start]
+                on_path = {start}
+                stack = [iter(out_dst[out_indptr[start]:out_indptr[start + 1]])]
+                while stack:
+                    advanced = False
+                    for neighbor in stack[-1]:
+                        steps += 1
+                        if neighbor == start:
+                            yield list(path)
+                            found += 1
+                            if max_cycles_per_scc is not None and found >= max_cycles_per_scc:
+                                capped = True
+                                break
+                        elif (neighbor > start and neighbor not in on_path and labels[neighbor] == label
+                              and (max_length is None or len(path) < max_length)):
+                            path.append(neighbor)
+                            on_path.add(neighbor)
+                            stack.append(iter(out_dst[out_indptr[neighbor]:out_indptr[neighbor + 1]]))
+                            advanced = True
+                            break
+                        if max_steps_per_scc is not None and steps >= max_steps_per_scc:
+                            capped = True
+                            break
+                    if capped:
+                        break
+                    if not advanced:
+                        stack.pop()
+                        on_path.discard(path.pop())
+                if capped:
+                    break
+            if capped and truncated is not None:
+                truncated.append(index)
+
+    def witness_cycles(self) -> List[List[int]]:
+        """
+        One shortest cycle through the first node of every cyclic component,
+        found by a breadth-first search inside the component. The searches
+        touch each component once, so this is linear in the graph size and
+        reports every component even when enumeration hits its caps.
+        """
+        out_indptr, out_dst = self.csr._out
+        labels = self.strong_component_labels().tolist()
+        cycles = []
+        for component in self.cyclic_components():
+            start = component[0]
+            label = labels[start]
+            parents = {start: None}
+            frontier = [start]
+            closing = None
+            while frontier and closing is None:
+                next_frontier = []
+                for node in frontier:
+                    for neighbor in out_dst[out_indptr[node]:out_indptr[node + 1]]:
+                        if neighbor == start:
+                            closing = node
+                            break
+                        if neighbor not in parents and labels[neighbor] == label:
+                            parents[neighbor] = node
+                            next_frontier.append(neighbor)
+                    if closing is not None:
+                        break
+                frontier = next_frontier
+            cycle = []
+            while closing is not None:
+                cycle.append(closing)
+                closing = parents[closing]
+            cycles.append(cycle[::-1])
+        return cycles
+
+    def cycle_summary(self, max_length: Optional[int] = DEFAULT_MAX_CYCLE_LENGTH,
+                      max_cycles_per_scc: Optional[int] = DEFAULT_MAX_CYCLES_PER_SCC,
+                      max_steps_per_scc: Optional[int] = DEFAULT_MAX_STEPS_PER_SCC) -> Dict[str, Any]:
+        """
+        Summarizes circular dependencies. Component counts are exact; cycle
+        counts and lengths cover the cycles found within the caps.
+
+        Returns:
+            Dict[str, Any]: Counts of cyclic components, nodes on cycles and
+            self-loops, the largest cyclic component, the enumerated cycles'
+            count, length histogram and truncation, and the lengths of the
+            `witness_cycles`.
+        """
+        components = self.cyclic_components()
+        truncated = []
+        lengths = np.array([len(cycle) for cycle in self.iter_cycles(max_length, max_cycles_per_scc,
+                                                                     max_steps_per_scc, truncated)],
+                           dtype=np.int64)
+        return {
+            'cyclic_components': len(components),
+            'nodes_in_cycles': sum(len(component) for component in components),
+            'self_loops': int(self._self_loops().sum()),
+            'largest_cyclic_component': max((len(component) for component in components), default=0),
+            'cycles_found': len(lengths),
+            'cycle_length_histogram': _histogram(lengths),
+            'truncated_components': len(truncated),
+            'witness_cycle_length_histogram': _histogram(np.array([len(cycle) for cycle in self.witness_cycles()],
+                                                                  dtype=np.int64)),
+            'caps': {'max_length': max_length, 'max_cycles_per_scc': max_cycles_per_scc,
+                     'max_steps_per_scc': max_steps_per_scc},
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """All statistics in one dictionary, with the default cycle caps."""
+        strong = self.strong_component_labels()
+        return {
+            'total_nodes': self.csr.num_nodes,
+            'total_edges': int(self.csr.out_degree.sum()),
+            'edge_labels': self.edge_label_histogram(),
+            'degrees': self.degree_distribution(),
+            'weakly_connected_components': int(self.weak_component_labels().max(initial=-1) + 1),
+            'strongly_connected_components': int(strong.max(initial=-1) + 1),
+            'cycles': self.cycle_summary(),
+        }
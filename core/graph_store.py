@@ -0,0 +1,597 @@
+# File: core/graph_store.py
+#
+# A compact, versioned on-disk format for the repository code graph, used in
+# place of pickling the whole NetworkX MultiDiGraph. A store is a directory:
+#
+#   header.json      format name, version, counts and the interned string table
+#   *.npy            integer columns (node attributes, CSR edge arrays)
+#   names.bin        node names, NUL-separated
+#   docstrings.bin   docstring text blob, addressed by docstring_offsets.npy
+#   text.bin         inline 'info' text blob, addressed by text_offsets.npy
+#   extras.pkl       attributes of nodes/edges that do not fit the columns
+#
+# Columns are memory-mapped, so a reader only touches what it asks for: a
+# query about one node never decodes every docstring, and a graph can be
+# rebuilt with just the attributes a tool needs.
+
+import os
+import json
+import mmap
+import pickle
+import shutil
+import numpy as np
+import networkx as nx
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.source_store import register_source_files
+
+FORMAT_NAME = "documentation-agent-graph"
+FORMAT_VERSION = 1
+HEADER_FILE = "header.json"
+
+# Attributes of the nodes CodeGraph creates, in the order it sets them
+CODE_NODE_ATTRS = ('category', 'spans', 'docstring', 'fname', 'line', 'kind')
+
+
+def is_graph_store(path: str) -> bool:
+    """Returns True if `path` is a graph store directory."""
+    return os.path.isfile(os.path.join(path, HEADER_FILE))
+
+
+def _is_code_node(attrs: Dict[str, Any]) -> bool:
+    """True if a node's attributes fit the columnar code-node schema exactly."""
+    if attrs.keys() != set(CODE_NODE_ATTRS):
+        return False
+    if not all(isinstance(attrs[key], str) for key in ('category', 'docstring', 'fname', 'kind')):
+        return False
+    line, spans = attrs['line'], attrs['spans']
+    if type(line) is not tuple or len(line) != 2 or not all(type(v) is int for v in line):
+        return False
+    return type(spans) is tuple and all(
+        type(span) is tuple and len(span) == 3 and isinstance(span[0], str)
+        and type(span[1]) is int and type(span[2]) is int
+        for span in spans
+    )
+
+
+def _blob(texts: List[str]):
+    """Encodes texts into one UTF-8 blob and an array of N+1 byte offsets."""
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(chunk) for chunk in encoded], out=offsets[1:])
+    return b"".join(encoded), offsets
+
+
+def save_graph(G: nx.MultiDiGraph, path: str):
+    """
+    Writes a MultiDiGraph to a graph store at `path`, replacing any existing one.
+
+    Node and edge order, including the order of each node's predecessors, is
+    preserved, so `load_graph` returns a graph that iterates exactly like `G`.
+
+    Args:
+        G (nx.MultiDiGraph): The graph to save.
+        path (str): Directory to write the store to.
+    """
+    strings, string_ids = [], {}
+
+    def intern(value: str) -> int:
+        string_id = string_ids.get(value)
+        if string_id is None:
+            string_id = string_ids[value] = len(strings)
+            strings.append(value)
+        return string_id
+
+    names = list(G.nodes())
+    if any('\0' in str(name) for name in names) or not all(isinstance(name, str) for name in names):
+        raise ValueError("graph store node names must be strings without NUL characters")
+    node_ids = {name: i for i, name in enumerate(names)}
+    n = len(names)
+
+    code_node = np.zeros(n, dtype=np.uint8)
+    category = np.full(n, -1, dtype=np.int32)
+    kind = np.full(n, -1, dtype=np.int32)
+    fname = np.full(n, -1, dtype=np.int32)
+    line = np.zeros((n, 2), dtype=np.int64)
+    span_indptr = np.zeros(n + 1, dtype=np.int64)
+    span_path, span_offset, span_length = [], [], []
+    docstrings, texts = [""] * n, [""] * n
+    has_text = np.zeros(n, dtype=np.uint8)
+    node_extras = {}
+
+    for i, (name, attrs) in enumerate(G.nodes(data=True)):
+        if _is_code_node(attrs):
+            code_node[i] = 1
+            category[i] = intern(attrs['category'])
+            kind[i] = intern(attrs['kind'])
+            fname[i] = intern(attrs['fname'])
+            line[i] = attrs['line']
+            docstrings[i] = attrs['docstring']
+            for source_path, offset, length in attrs['spans']:
+                span_path.append(intern(source_path))
+                span_offset.append(offset)
+                span_length.append(length)
+        elif attrs:
+            extra = dict(attrs)
+            if isinstance(extra.get('info'), str):
+                # Keep the key's position; the text itself goes to the blob
+                texts[i], extra['info'] = extra['info'], None
+                has_text[i] = 1
+            node_extras[i] = extra
+        span_indptr[i + 1] = len(span_path)
+
+    edge_src, edge_dst, edge_key, edge_label = [], [], [], []
+    edge_extras = {}
+    out_indptr = np.zeros(n + 1, dtype=np.int64)
+    for i, (u, nbrs) in enumerate(G.adjacency()):
+        for v, keydict in nbrs.items():
+            for key, attrs in keydict.items():
+                if type(key) is int and attrs.keys() == {'label'} and isinstance(attrs['label'], str):
+                    edge_key.append(key)
+                    edge_label.append(intern(attrs['label']))
+                else:
+                    edge_extras[len(edge_src)] = (key, dict(attrs))
+                    edge_key.append(0)
+                    edge_label.append(-1)
+                edge_src.append(i)
+                edge_dst.append(node_ids[v])
+        out_indptr[i + 1] = len(edge_src)
+
+    # Predecessors in the graph's own order, so in-edge iteration survives a round trip
+    in_indptr = np.zeros(n + 1, dtype=np.int64)
+    in_nbr = []
+    for i, name in enumerate(names):
+        in_nbr.extend(node_ids[u] for u in G.pred[name])
+        in_indptr[i + 1] = len(in_nbr)
+
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    columns = {
+        'code_node': code_node, 'category': category, 'kind': kind, 'fname': fname, 'line': line,
+        'span_indptr': span_indptr,
+        'span_path': np.asarray(span_path, dtype=np.int32),
+        'span_offset': np.asarray(span_offset, dtype=np.int64),
+        'span_length': np.asarray(span_length, dtype=np.int64),
+        'has_text': has_text,
+        'out_indptr': out_indptr,
+        'edge_dst': np.asarray(edge_dst, dtype=np.int32),
+        'edge_key': np.asarray(edge_key, dtype=np.int64),
+        'edge_label': np.asarray(edge_label, dtype=np.int32),
+        'in_indptr': in_indptr,
+        'in_nbr': np.asarray(in_nbr, dtype=np.int32),
+    }
+    docstring_blob, columns['docstring_offsets'] = _blob(docstrings)
+    text_blob, columns['text_offsets'] = _blob(texts)
+    for column, values in columns.items():
+        np.save(os.path.join(tmp_path, f"{column}.npy"), values)
+    with open(os.path.join(tmp_path, "names.bin"), 'wb') as f:
+        f.write("\0".join(names).encode('utf-8'))
+    with open(os.path.join(tmp_path, "docstrings.bin"), 'wb') as f:
+        f.write(docstring_blob)
+    with open(os.path.join(tmp_path, "text.bin"), 'wb') as f:
+        f.write(text_blob)
+    with open(os.path.join(tmp_path, "extras.pkl"), 'wb') as f:
+        pickle.dump({'graph': dict(G.graph), 'nodes': node_extras, 'edges': edge_extras}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+
+    header = {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'num_nodes': n,
+        'num_edges': len(edge_src),
+        'strings': strings,
+    }
+    with open(os.path.join(tmp_path, HEADER_FILE), 'w', encoding='utf-8') as f:
+        json.dump(header, f)
+
+    # Swap the finished store into place so readers never see a partial one
+    old_path = f"{path}.old"
+    if os.path.exists(path):
+        if os.path.exists(old_path):
+            shutil.rmtree(old_path)
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    if os.path.exists(old_path):
+        shutil.rmtree(old_path)
+
+
+class GraphStore:
+    """
+    Read access to a graph store. Columns are memory-mapped and decoded on
+    demand; call `to_networkx` for a full graph or `view` for a lightweight
+    read-only graph that RepoSearcher and the graph tools can use directly.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Directory of the store.
+
+        Raises:
+            FileNotFoundError: If `path` is not a graph store.
+            ValueError: If the store was written by another format version.
+        """
+        header_path = os.path.join(path, HEADER_FILE)
+        if not os.path.isfile(header_path):
+            raise FileNotFoundError(f"No graph store at '{path}'")
+        with open(header_path, 'r', encoding='utf-8') as f:
+            header = json.load(f)
+        if header.get('format') != FORMAT_NAME or header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported graph store format {header.get('format')!r} "
+                             f"version {header.get('version')!r} at '{path}'")
+        self.path = path
+        self.num_nodes = header['num_nodes']
+        self.num_edges = header['num_edges']
+        self.strings = header['strings']
+        self._columns = {}
+        self._blobs = {}
+        self._names = None
+        self._ids = None
+        self._extras = None
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns one column as a read-only memory-mapped array."""
+        values = self._columns.get(name)
+        if values is None:
+            values = self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode='r')
+        return values
+
+    def _blob(self, name: str):
+        blob = self._blobs.get(name)
+        if blob is None:
+            with open(os.path.join(self.path, name), 'rb') as f:
+                blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+            self._blobs[name] = blob
+        return blob
+
+    @property
+    def names(self) -> List[str]:
+        """Node names in graph order."""
+        if self._names is None:
+            data = bytes(self._blob("names.bin")).decode('utf-8')
+            self._names = data.split("\0") if self.num_nodes else []
+        return self._names
+
+    @property
+    def ids(self) -> Dict[str, int]:
+        """Node name -> integer node ID."""
+        if self._ids is None:
+            self._ids = {name: i for i, name in enumerate(self.names)}
+        return self._ids
+
+    @property
+    def extras(self) -> Dict[str, Any]:
+        if self._extras is None:
+            with open(os.path.join(self.path, "extras.pkl"), 'rb') as f:
+                self._extras = pickle.load(f)
+        return self._extras
+
+    def _blob_text(self, blob_name: str, offsets_name: str, i: int) -> str:
+        offsets = self.column(offsets_name)
+        return self._blob(blob_name)[offsets[i]:offsets[i + 1]].decode('utf-8')
+
+    def node_attrs(self, i: int, attributes: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Returns the attribute dict of node `i`.
+
+        Args:
+            i (int): Node ID.
+            attributes (Iterable[str]): Only return these attributes. None returns all.
+        """
+        wanted = None if attributes is None else set(attributes)
+        if self.column('code_node')[i]:
+            attrs = {}
+            for key in CODE_NODE_ATTRS:
+                if wanted is not None and key not in wanted:
+                    continue
+                if key in ('category', 'kind', 'fname'):
+                    attrs[key] = self.strings[self.column(key)[i]]
+                elif key == 'docstring':
+                    attrs[key] = self._blob_text("docstrings.bin", 'docstring_offsets', i)
+                elif key == 'line':
+                    start, end = self.column('line')[i]
+                    attrs[key] = (int(start), int(end))
+                else:
+                    indptr = self.column('span_indptr')
+                    lo, hi = indptr[i], indptr[i + 1]
+                    attrs[key] = tuple(
+                        (self.strings[path_id], int(offset), int(length))
+                        for path_id, offset, length in zip(self.column('span_path')[lo:hi],
+                                                           self.column('span_offset')[lo:hi],
+                                                           self.column('span_length')[lo:hi])
+                    )
+            return attrs
+
+        extra = self.extras['nodes'].get(i)
+        if not extra:
+            return {}
+        attrs = {key: value for key, value in extra.items() if wanted is None or key in wanted}
+        if 'info' in attrs and self.column('has_text')[i]:
+            attrs['info'] = self._blob_text("text.bin", 'text_offsets', i)
+        return attrs
+
+    def out_edges(self, i: int):
+        """Yields (dst_id, key, attrs) for every edge leaving node `i`, in graph order."""
+        indptr = self.column('out_indptr')
+        dst, keys, labels = self.column('edge_dst'), self.column('edge_key'), self.column('edge_label')
+        edge_extras = None
+        for e in range(indptr[i], indptr[i + 1]):
+            label = labels[e]
+            if label >= 0:
+                yield int(dst[e]), int(keys[e]), {'label': self.strings[label]}
+            else:
+                if edge_extras is None:
+                    edge_extras = self.extras['edges']
+                key, attrs = edge_extras[e]
+                yield int(dst[e]), key, dict(attrs)
+
+    def successor_ids(self, i: int) -> List[int]:
+        """Distinct successors of node `i`, in graph order."""
+        indptr = self.column('out_indptr')
+        result = []
+        for v in self.column('edge_dst')[indptr[i]:indptr[i + 1]].tolist():
+            if not result or result[-1] != v:
+                result.append(v)
+        return result
+
+    def predecessor_ids(self, i: int) -> List[int]:
+        """Distinct predecessors of node `i`, in graph order."""
+        indptr = self.column('in_indptr')
+        return self.column('in_nbr')[indptr[i]:indptr[i + 1]].tolist()
+
+    def _bulk_node_attrs(self, wanted: Optional[tuple]) -> List[Dict[str, Any]]:
+        """Decodes the attributes of every node at once, column by column."""
+        n = self.num_nodes
+        strings = self.strings
+        keys = [key for key in CODE_NODE_ATTRS if wanted is None or key in wanted]
+        columns = {}
+        for key in keys:
+            if key in ('category', 'kind', 'fname'):
+                columns[key] = [strings[string_id] if string_id >= 0 else None
+                                for string_id in self.column(key).tolist()]
+            elif key == 'line':
+                columns[key] = [tuple(pair) for pair in self.column('line').tolist()]
+            elif key == 'docstring':
+                blob = bytes(self._blob("docstrings.bin"))
+                offsets = self.column('docstring_offsets').tolist()
+                columns[key] = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(n)]
+            else:
+                indptr = self.column('span_indptr').tolist()
+                spans = list(zip([strings[path_id] for path_id in self.column('span_path').tolist()],
+                                 self.column('span_offset').tolist(),
+                                 self.column('span_length').tolist()))
+                columns[key] = [tuple(spans[indptr[i]:indptr[i + 1]]) for i in range(n)]
+
+        code_node = self.column('code_node').tolist()
+        node_extras = self.extras['nodes']
+        result = []
+        for i in range(n):
+            if code_node[i]:
+                result.append({key: columns[key][i] for key in keys})
+            elif i in node_extras:
+                result.append(self.node_attrs(i, wanted))
+            else:
+                result.append({})
+        return result
+
+    def to_networkx(self, node_attributes: Optional[Iterable[str]] = None) -> nx.MultiDiGraph:
+        """
+        Rebuilds the full MultiDiGraph.
+
+        Args:
+            node_attributes (Iterable[str]): Only load these node attributes,
+                e.g. ('category', 'fname') to skip docstrings and spans. None loads all.
+        """
+        wanted = None if node_attributes is None else tuple(node_attributes)
+        names = self.names
+        G = nx.MultiDiGraph()
+        G.graph.update(self.extras['graph'])
+        G.add_nodes_from(zip(names, self._bulk_node_attrs(wanted)))
+
+        # Fill the adjacency dicts directly, in stored order; going through
+        # add_edge for every edge would dominate the load time.
+        strings = self.strings
+        out_indptr = self.column('out_indptr').tolist()
+        dst = self.column('edge_dst').tolist()
+        keys = self.column('edge_key').tolist()
+        labels = self.column('edge_label').tolist()
+        edge_extras = self.extras['edges']
+        succ, pred = G._succ, G._pred
+        for i, u in enumerate(names):
+            nbrs = succ[u]
+            for e in range(out_indptr[i], out_indptr[i + 1]):
+                v = names[dst[e]]
+                keydict = nbrs.get(v)
+                if keydict is None:
+                    keydict = nbrs[v] = G.edge_key_dict_factory()
+                if labels[e] >= 0:
+                    keydict[keys[e]] = {'label': strings[labels[e]]}
+                else:
+                    key, attrs = edge_extras[e]
+                    keydict[key] = dict(attrs)
+
+        # Predecessor dicts share the successor key dicts, in the stored order
+        in_indptr = self.column('in_indptr').tolist()
+        in_nbr = self.column('in_nbr').tolist()
+        for i, v in enumerate(names):
+            pred[v].update((names[u], succ[names[u]][v]) for u in in_nbr[in_indptr[i]:in_indptr[i + 1]])
+        return G
+
+    def view(self) -> "StoredGraphView":
+        """Returns a read-only, lazily decoded graph view over this store."""
+        return StoredGraphView(self)
+
+    def close(self):
+        """Releases the memory-mapped blobs and columns."""
+        for blob in self._blobs.values():
+            if isinstance(blob, mmap.mmap):
+                blob.close()
+        self._blobs.clear()
+        self._columns.clear()
+
+
+class _NodeAccessor:
+    """The `nodes` attribute of a StoredGraphView, mirroring NetworkX's NodeView."""
+
+    def __init__(self, store: GraphStore):
+        self._store = store
+
+    def __call__(self, data: bool = False):
+        if not data:
+            return list(self._store.names)
+        return [(name, self._store.node_attrs(i)) for i, name in enumerate(self._store.names)]
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        return self._store.node_attrs(self._store.ids[name])
+
+    def __iter__(self):
+        return iter(self._store.names)
+
+    def __len__(self):
+        return self._store.num_nodes
+
+    def __contains__(self, name) -> bool:
+        return name in self._store.ids
+
+
+class StoredGraphView:
+    """
+    A read-only stand-in for the MultiDiGraph, backed by a GraphStore.
+
+    It supports the graph API RepoSearcher and the graph tools use (membership,
+    successors/predecessors, node and edge data, degrees). Node attributes are
+    decoded per access instead of all at load time. Algorithms that need a
+    real NetworkX graph can call `to_networkx()`.
+    """
+
+    def __init__(self, store: GraphStore):
+        self.store = store
+        self.nodes = _NodeAccessor(store)
+        self._in_degree = None
+
+    def __contains__(self, name) -> bool:
+        return name in self.store.ids
+
+    def __iter__(self):
+        return iter(self.store.names)
+
+    def __len__(self):
+        return self.store.num_nodes
+
+    def __getitem__(self, name: str) -> Dict[str, Dict[Any, Dict[str, Any]]]:
+        """Returns {successor: {key: edge_attrs}} for one node, like G[name]."""
+        names = self.store.names
+        adjacency = {}
+        for v, key, attrs in self.store.out_edges(self.store.ids[name]):
+            adjacency.setdefault(names[v], {})[key] = attrs
+        return adjacency
+
+    def is_directed(self) -> bool:
+        return True
+
+    def is_multigraph(self) -> bool:
+        return True
+
+    def has_node(self, name) -> bool:
+        return name in self
+
+    def number_of_nodes(self) -> int:
+        return self.store.num_nodes
+
+    def number_of_edges(self) -> int:
+        return self.store.num_edges
+
+    def successors(self, name: str):
+        names = self.store.names
+        return iter([names[v] for v in self.store.successor_ids(self.store.ids[name])])
+
+    neighbors = successors
+
+    def predecessors(self, name: str):
+        names = self.store.names
+        return iter([names[u] for u in self.store.predecessor_ids(self.store.ids[name])])
+
+    def has_edge(self, u: str, v: str) -> bool:
+        ids = self.store.ids
+        return u in ids and v in ids and ids[v] in self.store.successor_ids(ids[u])
+
+    def get_edge_data(self, u: str, v: str, default=None):
+        if u not in self.store.ids:
+            return default
+        return self[u].get(v, default)
+
+    def edges(self, data: bool = False, keys: bool = False):
+        names = self.store.names
+        result = []
+        for i, u in enumerate(names):
+            for v, key, attrs in self.store.out_edges(i):
+                edge = (u, names[v]) + ((key,) if keys else ()) + ((attrs,) if data else ())
+                result.append(edge)
+        return result
+
+    def out_degree(self, name: str) -> int:
+        indptr = self.store.column('out_indptr')
+        i = self.store.ids[name]
+        return int(indptr[i + 1] - indptr[i])
+
+    def in_degree(self, name: str) -> int:
+        if self._in_degree is None:
+            self._in_degree = np.bincount(self.store.column('edge_dst'), minlength=self.store.num_nodes)
+        return int(self._in_degree[self.store.ids[name]])
+
+    def degree(self, name: str) -> int:
+        return self.in_degree(name) + self.out_degree(name)
+
+    def to_networkx(self, node_attributes: Optional[Iterable[str]] = None) -> nx.MultiDiGraph:
+        return self.store.to_networkx(node_attributes)
+
+    def to_undirected(self):
+        return self.to_networkx().to_undirected()
+
+
+def load_graph(path: str, node_attributes: Optional[Iterable[str]] = None) -> nx.MultiDiGraph:
+    """
+    Loads a graph saved with `save_graph`. A pickle file from before the graph
+    store existed is still accepted and unpickled as-is.
+
+    Args:
+        path (str): Graph store directory or legacy pickle file.
+        node_attributes (Iterable[str]): Only load these node attributes (store only).
+
+    Raises:
+        FileNotFoundError: If nothing exists at `path`.
+    """
+    if is_graph_store(path):
+        store = GraphStore(path)
+        try:
+            G = store.to_networkx(node_attributes)
+        finally:
+            store.close()
+    else:
+        with open(path, 'rb') as f:
+            G = pickle.load(f)
+    # Spans are only read while their files still match this build
+    register_source_files(getattr(G, 'graph', {}).get('source_files'))
+    return G
+
+
+def load_graph_view(path: str):
+    """
+    Opens a graph for querying. A graph store gives a StoredGraphView, which
+    decodes only what is accessed; a legacy pickle file is fully unpickled.
+
+    Raises:
+        FileNotFoundError: If nothing exists at `path`.
+    """
+    if is_graph_store(path):
+        store = GraphStore(path)
+        register_source_files(store.extras['graph'].get('source_files'))
+        return store.view()
+    with open(path, 'rb') as f:
+        G = pickle.load(f)
+    register_source_files(getattr(G, 'graph', {}).get('source_files'))
+    return G
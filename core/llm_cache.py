@@ -0,0 +1,134 @@
+# File: core/llm_cache.py
+#
+# A persistent, content-addressed cache of LLM responses in SQLite, so reruns
+# over unchanged code replay earlier answers instead of calling the model.
+#
+# The key is a SHA-256 over the prompt template, the variables it is rendered
+# with and the model settings that shape the answer (deployment, model,
+# temperature, max_tokens). Entries expire after a TTL. When the stored
+# responses exceed a size limit, the least recently used ones are evicted.
+# Hits and misses are counted per process; every entry also counts its own
+# hits across runs.
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed response cache, safe to share between threads.
+
+    Attributes:
+        path (str): The database file.
+        ttl_seconds (float): Age after which an entry is no longer served.
+        max_bytes (int): Upper bound on the total size of stored responses.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - ttl_seconds,))
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.hits = self.misses = self.expired = self.evicted = 0
+
+    @staticmethod
+    def make_key(template: str, variables: Dict[str, Any], model_settings: Dict[str, Any]) -> str:
+        """SHA-256 of the template, its variables and the model settings, independent of dict order."""
+        payload = json.dumps([template, variables, model_settings], sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """The stored response for `key`, or None if it is missing or has expired."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, size, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, size, created_at = row
+            if created_at < now - self.ttl_seconds:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._size -= size
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.hits += 1
+            return response
+
+    def put(self, key: str, response: str) -> None:
+        """Stores `response` under `key`, then evicts least recently used entries beyond max_bytes."""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO responses (key, response, size, created_at, last_used, hits) "
+                             "VALUES (?, ?, ?, ?, ?, 0)", (key, response, size, now, now))
+            self._size += size - (old[0] if old else 0)
+            if self._size > self.max_bytes:
+                self._evict(self._size - self.max_bytes)
+
+    def _evict(self, excess: int) -> None:
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            victims.append((key,))
+            excess -= size
+            self._size -= size
+            if excess <= 0:
+                break
+        self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evicted += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses, expirations and evictions in this process, plus the current contents."""
+        with self._lock:
+            entries, lifetime_hits = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'expired': self.expired,
+            'evicted': self.evicted,
+            'entries': entries,
+            'size_bytes': self._size,
+            'lifetime_hits': lifetime_hits,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
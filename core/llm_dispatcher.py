@@ -0,0 +1,334 @@
+# File: core/llm_dispatcher.py
+#
+# Rate-limit-aware dispatch of LLM requests, shared by every call site
+# through core.llm_provider. Azure OpenAI deployments have a requests-per-
+# minute and a tokens-per-minute quota and answer 429 once either runs out.
+# Retrying at once only adds to the overload, and failing over to fallbacks
+# wastes the work. The dispatcher:
+#
+# - meters requests and tokens (prompt estimate + max_tokens, which is what
+#   Azure reserves) through two token buckets refilled at the quota rates;
+# - adapts how many requests are in flight with AIMD: slow start doubles the
+#   limit until the first sign of overload, then it grows by about one per
+#   round of responses and halves on a 429 (or drops by a fifth when latency
+#   climbs well above the best seen);
+# - retries throttled and transient failures with jittered exponential
+#   backoff, and on a 429 holds back every request until the Retry-After the
+#   server sent has passed;
+# - admits requests first come, first served, a retry keeping its original
+#   place, so no request starves while others keep the quota busy.
+#
+# Both blocking (worker threads) and asyncio callers are supported.
+
+import time
+import heapq
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import openai
+
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_INITIAL_CONCURRENCY = 4
+MAX_ATTEMPTS = 6
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+DECREASE_FACTOR = 0.5
+# Back off when smoothed latency exceeds this multiple of the best seen
+LATENCY_TOLERANCE = 3.0
+LATENCY_DECREASE_FACTOR = 0.8
+# How often asyncio callers recheck for a free slot
+ASYNC_POLL_SECONDS = 0.02
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """The delay a failed response asks for (retry-after-ms or retry-after header), if any."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('retry-after-ms')
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def classify_error(error: BaseException) -> Optional[str]:
+    """'throttled' for a 429, 'overloaded' for timeouts, connection errors and 5xx, None otherwise."""
+    if isinstance(error, openai.RateLimitError):
+        return 'throttled'
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)):
+        return 'overloaded'
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    if status == 429:
+        return 'throttled'
+    if isinstance(status, int) and status >= 500:
+        return 'overloaded'
+    return None
+
+
+class TokenBucket:
+    """
+    Refills at `rate_per_minute` units up to `capacity`. A request larger than
+    the capacity is let through once the bucket is full and leaves it in debt.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        # Azure evaluates quotas over short windows, so allow bursts of ~10 seconds' worth
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_minute / 6.0)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken; 0 if it can be taken now."""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float):
+        self.level -= amount
+
+
+class LLMDispatcher:
+    """
+    Meters, limits and retries LLM calls for one deployment quota.
+
+    Attributes:
+        limit (float): Current concurrency limit, adjusted by AIMD.
+        max_concurrency (int): Upper bound for `limit`.
+        min_concurrency (int): Lower bound for `limit`.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, initial_concurrency: int = DEFAULT_INITIAL_CONCURRENCY,
+                 min_concurrency: int = 1, max_attempts: int = MAX_ATTEMPTS,
+                 latency_tolerance: Optional[float] = LATENCY_TOLERANCE):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = float(max(self.min_concurrency, min(initial_concurrency, self.max_concurrency)))
+        self.max_attempts = max(1, max_attempts)
+        self.latency_tolerance = latency_tolerance
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = []  # heap of tickets
+        self._next_ticket = 0
+        self._slow_start = True
+        self._last_decrease = float('-inf')
+        self._blocked_until = 0.0
+        self._latency = None
+        self._best_latency = None
+        self._stats = {'calls': 0, 'attempts': 0, 'retries': 0, 'throttled': 0, 'overloaded': 0,
+                       'failed': 0, 'tokens': 0, 'wait_seconds': 0.0, 'peak_in_flight': 0}
+
+    # --- admission ---
+
+    def _try_acquire(self, ticket: int, tokens: int) -> Optional[float]:
+        """
+        Takes a slot and quota for `ticket` if it is first in line and both are
+        available (returns 0). Otherwise returns the seconds to wait, or None
+        while the concurrency limit or an earlier ticket is the obstacle.
+        Called with the condition held.
+        """
+        if self._in_flight >= int(self.limit) or self._waiting[0] != ticket:
+            return None
+        now = time.monotonic()
+        wait = self._blocked_until - now
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        if wait > 0:
+            return wait
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+        heapq.heappop(self._waiting)
+        self._in_flight += 1
+        self._stats['attempts'] += 1
+        self._stats['peak_in_flight'] = max(self._stats['peak_in_flight'], self._in_flight)
+        return 0.0
+
+    def _leave_queue(self, ticket: int):
+        """Drops a ticket that gave up waiting (a cancelled task). Called with the condition held."""
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+            self._condition.notify_all()
+
+    def _acquire(self, ticket: int, tokens: int) -> float:
+        start = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    wait = self._try_acquire(ticket, tokens)
+                    if wait == 0.0:
+                        break
+                    self._condition.wait(timeout=wait)
+            except BaseException:
+                self._leave_queue(ticket)
+                raise
+            self._stats['wait_seconds'] += time.monotonic() - start
+            # The next ticket may go now
+            self._condition.notify_all()
+        return time.monotonic()
+
+    async def _acquire_async(self, ticket: int, tokens: int) -> float:
+        start = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_acquire(ticket, tokens)
+                    if wait == 0.0:
+                        self._stats['wait_seconds'] += time.monotonic() - start
+                        self._condition.notify_all()
+                        return time.monotonic()
+                await asyncio.sleep(min(wait, 1.0) if wait is not None else ASYNC_POLL_SECONDS)
+        except BaseException:
+            with self._condition:
+                self._leave_queue(ticket)
+            raise
+
+    # --- feedback ---
+
+    def _release(self, started: float, error: Optional[BaseException], kind: Optional[str], retry: bool = False):
+        """Frees the slot and feeds the outcome to AIMD; `retry` says whether the caller tries again."""
+        now = time.monotonic()
+        with self._condition:
+            self._in_flight -= 1
+            if error is not None:
+                self._stats['retries' if retry else 'failed'] += 1
+            if error is None:
+                self._on_success(now - started, now)
+            elif kind is not None:
+                self._stats[kind] += 1
+                # Requests sent before the last decrease saw the old limit; count one signal per round
+                if started >= self._last_decrease:
+                    self._decrease(DECREASE_FACTOR, now)
+                delay = retry_after_seconds(error)
+                if kind == 'throttled' and delay is not None:
+                    # The quota is the deployment's: hold every request back, not just this one
+                    jitter = random.uniform(0, 0.1 * delay + 0.05)
+                    self._blocked_until = max(self._blocked_until, now + delay + jitter)
+            self._condition.notify_all()
+
+    def _on_success(self, latency: float, now: float):
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        self._best_latency = self._latency if self._best_latency is None else min(self._best_latency, self._latency)
+        if (self.latency_tolerance and self._latency > self._best_latency * self.latency_tolerance
+                and now - self._last_decrease > self._latency):
+            self._decrease(LATENCY_DECREASE_FACTOR, now)
+        elif self._slow_start:
+            self.limit = min(self.max_concurrency, self.limit + 1)
+        else:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    def _decrease(self, factor: float, now: float):
+        self.limit = max(self.min_concurrency, self.limit * factor)
+        self._slow_start = False
+        self._last_decrease = now
+
+    def _backoff(self, error: BaseException, kind: str, attempt: int) -> float:
+        if kind == 'throttled' and retry_after_seconds(error) is not None:
+            return 0.0  # queue up again at once; admission waits out the Retry-After
+        delay = retry_after_seconds(error)
+        if delay is not None:
+            return delay + random.uniform(0, 0.1 * delay + 0.05)
+        return random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** (attempt - 1)))
+
+    def _settle(self, result: Any, estimated_tokens: int, actual_tokens: Optional[Callable[[Any], Optional[int]]]):
+        # Azure charges the quota with the estimate at admission, so usage only feeds the stats
+        used = actual_tokens(result) if actual_tokens is not None else None
+        with self._condition:
+            self._stats['calls'] += 1
+            self._stats['tokens'] += used if used is not None else estimated_tokens
+
+    # --- entry points ---
+
+    def call(self, func: Callable[[], Any], estimated_tokens: int = 0,
+             actual_tokens: Optional[Callable[[Any], Optional[int]]] = None) -> Any:
+        """
+        Runs `func` (one LLM request) when the quota and concurrency limit allow,
+        retrying throttled and transient failures.
+
+        Args:
+            func: Performs the request and returns its result.
+            estimated_tokens (int): Tokens to reserve from the tokens-per-minute bucket.
+            actual_tokens: Optional function reading the tokens really used from
+                the result, for stats().
+
+        Returns:
+            Any: What `func` returned. Other errors, and the last one after
+            MAX_ATTEMPTS attempts, are raised.
+        """
+        ticket = self._take_ticket()
+        for attempt in range(1, self.max_attempts + 1):
+            started = self._acquire(ticket, estimated_tokens)
+            try:
+                result = func()
+            except Exception as e:
+                kind = classify_error(e)
+                retry = kind is not None and attempt < self.max_attempts
+                self._release(started, e, kind, retry)
+                if not retry:
+                    raise
+                time.sleep(self._backoff(e, kind, attempt))
+                continue
+            self._release(started, None, None)
+            self._settle(result, estimated_tokens, actual_tokens)
+            return result
+
+    async def acall(self, func: Callable[[], Awaitable[Any]], estimated_tokens: int = 0,
+                    actual_tokens: Optional[Callable[[Any], Optional[int]]] = None) -> Any:
+        """The asyncio version of `call`; `func` returns an awaitable."""
+        ticket = self._take_ticket()
+        for attempt in range(1, self.max_attempts + 1):
+            started = await self._acquire_async(ticket, estimated_tokens)
+            try:
+                result = await func()
+            except Exception as e:
+                kind = classify_error(e)
+                retry = kind is not None and attempt < self.max_attempts
+                self._release(started, e, kind, retry)
+                if not retry:
+                    raise
+                await asyncio.sleep(self._backoff(e, kind, attempt))
+                continue
+            self._release(started, None, None)
+            self._settle(result, estimated_tokens, actual_tokens)
+            return result
+
+    def _take_ticket(self) -> int:
+        """A place in line, kept across retries so a retried request goes before newer ones."""
+        with self._condition:
+            self._next_ticket += 1
+            return self._next_ticket
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls, attempts, retries, 429s, failures, tokens, time spent waiting and the concurrency limit."""
+        with self._condition:
+            return {**self._stats, 'concurrency_limit': self.limit, 'in_flight': self._in_flight}
@@ -0,0 +1,303 @@
+# File: core/llm_provider.py
+#
+# One place to obtain Azure OpenAI chat models and prompt chains, shared by
+# the documentation agent and the section-writer scripts.
+#
+# Every AzureChatOpenAI instance creates its own HTTP connection pool, so a
+# model built per call opens (and TLS-handshakes) a new connection per call.
+# Here models are created once per distinct configuration and all of them send
+# synchronous requests through one keep-alive httpx client. Chains
+# (prompt | model | parser) are compiled once per template and reused.
+# Asynchronous calls keep each model's own client: an httpx.AsyncClient is
+# bound to the event loop it first ran on, and the scripts start a new loop
+# per step.
+#
+# Chains answer from the persistent response cache (core.llm_cache) when the
+# same template, variables and model settings were seen before. The cache is
+# configured from the environment on first use:
+#     LLM_CACHE_PATH       database file (default output/llm_cache.sqlite);
+#                          "off" disables caching
+#     LLM_CACHE_TTL_DAYS   entry lifetime (default 30)
+#     LLM_CACHE_MAX_MB     total response size before LRU eviction (default 512)
+# or explicitly with configure_cache().
+#
+# Requests that do reach the model go through one rate-limit-aware dispatcher
+# (core.llm_dispatcher), which keeps them under the deployment's quota,
+# adapts concurrency to 429s and latency, and owns retries (models are built
+# with max_retries=0 unless told otherwise). It is configured from:
+#     LLM_REQUESTS_PER_MINUTE   request quota (default: unmetered)
+#     LLM_TOKENS_PER_MINUTE     token quota (default: unmetered)
+#     LLM_MAX_CONCURRENCY       ceiling for the adaptive concurrency limit (default 64)
+# or explicitly with configure_dispatcher().
+
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+import httpx
+import openai
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_openai import AzureChatOpenAI
+
+from .llm_cache import LLMResponseCache, DEFAULT_MAX_BYTES, DEFAULT_TTL_SECONDS
+from .llm_dispatcher import LLMDispatcher, DEFAULT_MAX_CONCURRENCY
+from .token_budget import count_tokens
+
+# Room for the agent's concurrent workers plus the scripts' parallel section writers
+CONNECTION_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=120.0)
+MAX_CACHED_CHAINS = 256
+DEFAULT_CACHE_PATH = os.path.join("output", "llm_cache.sqlite")
+# Settings that change what the model answers; credentials and endpoints do not
+CACHE_KEY_SETTINGS = ('azure_deployment', 'model', 'temperature', 'max_tokens')
+# Completion tokens reserved against the token quota when max_tokens is not set
+DEFAULT_COMPLETION_TOKENS = 1024
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_models: Dict[Tuple, AzureChatOpenAI] = {}
+_chains: "OrderedDict[Tuple, Runnable]" = OrderedDict()
+_cache: Optional[LLMResponseCache] = None
+_cache_configured = False
+_dispatcher: Optional[LLMDispatcher] = None
+
+
+def _settings_key(settings: Dict[str, Any]) -> Tuple:
+    return tuple(sorted(settings.items(), key=lambda item: item[0]))
+
+
+def get_http_client() -> httpx.Client:
+    """The process-wide keep-alive client used for every synchronous LLM request."""
+    global _http_client
+    with _lock:
+        if _http_client is None or _http_client.is_closed:
+            # openai's wrapper keeps the SDK's default timeouts and redirects
+            _http_client = openai.DefaultHttpxClient(limits=CONNECTION_LIMITS)
+        return _http_client
+
+
+def get_llm(azure_deployment: Optional[str] = None, **settings) -> AzureChatOpenAI:
+    """
+    Returns the shared chat model for a configuration, creating it on first use.
+
+    Args:
+        azure_deployment (str): Deployment name; defaults to AZURE_OPENAI_DEPLOYMENT_NAME.
+        **settings: Further AzureChatOpenAI arguments (temperature, max_tokens,
+            api_version, ...). Values must be hashable. max_retries defaults
+            to 0: the dispatcher retries.
+
+    Returns:
+        AzureChatOpenAI: The same instance for every call with equal arguments.
+    """
+    settings['azure_deployment'] = azure_deployment or os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+    settings.setdefault('max_retries', 0)
+    key = _settings_key(settings)
+    model = _models.get(key)
+    if model is None:
+        http_client = get_http_client()
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = _models[key] = AzureChatOpenAI(http_client=http_client, **settings)
+    return model
+
+
+def configure_cache(path: Optional[str] = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                    max_bytes: int = DEFAULT_MAX_BYTES) -> Optional[LLMResponseCache]:
+    """
+    Sets the response cache used by every chain from get_chain(); `path=None` disables it.
+
+    Returns:
+        Optional[LLMResponseCache]: The new cache, or None when disabled.
+    """
+    global _cache, _cache_configured
+    with _lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = LLMResponseCache(path, ttl_seconds, max_bytes) if path else None
+        _cache_configured = True
+        return _cache
+
+
+def get_cache() -> Optional[LLMResponseCache]:
+    """The response cache, opened from the LLM_CACHE_* environment variables on first use."""
+    if not _cache_configured:
+        path = os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+        configure_cache(None if path.lower() == "off" else path,
+                        float(os.getenv("LLM_CACHE_TTL_DAYS", DEFAULT_TTL_SECONDS / 86400)) * 86400,
+                        int(float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2 ** 20)) * 2 ** 20))
+    return _cache
+
+
+def configure_dispatcher(requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                         max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> LLMDispatcher:
+    """
+    Sets the dispatcher every model request goes through.
+
+    Args:
+        requests_per_minute (float): The deployment's request quota; None leaves requests unmetered.
+        tokens_per_minute (float): The deployment's token quota; None leaves tokens unmetered.
+        max_concurrency (int): Ceiling for the adaptive concurrency limit.
+
+    Returns:
+        LLMDispatcher: The new dispatcher.
+    """
+    global _dispatcher
+    with _lock:
+        _dispatcher = LLMDispatcher(requests_per_minute, tokens_per_minute, max_concurrency)
+        return _dispatcher
+
+
+def get_dispatcher() -> LLMDispatcher:
+    """The dispatcher, configured from the LLM_* quota environment variables on first use."""
+    if _dispatcher is None:
+        rpm = os.getenv("LLM_REQUESTS_PER_MINUTE")
+        tpm = os.getenv("LLM_TOKENS_PER_MINUTE")
+        configure_dispatcher(float(rpm) if rpm else None, float(tpm) if tpm else None,
+                             int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)))
+    return _dispatcher
+
+
+def _used_tokens(message: Any) -> Optional[int]:
+    usage = getattr(message, 'usage_metadata', None)
+    return usage.get('total_tokens') if usage else None
+
+
+def _estimate_tokens(inputs: Any, template: str, max_tokens: Optional[int]) -> int:
+    """Prompt tokens (template plus variables) and the completion tokens the request reserves."""
+    text = template + (" ".join(str(value) for value in inputs.values()) if isinstance(inputs, dict) else str(inputs))
+    return count_tokens(text) + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def dispatched(runnable: Runnable, max_tokens: Optional[int] = None) -> Runnable:
+    """
+    Wraps a runnable that makes one model request (e.g. prompt | get_llm(...))
+    so its calls go through get_dispatcher().
+
+    Args:
+        runnable (Runnable): The runnable to wrap.
+        max_tokens (int): The model's max_tokens, for the token estimate.
+
+    Returns:
+        Runnable: A runnable with the same input and output.
+    """
+    def invoke(inputs, config):
+        return get_dispatcher().call(lambda: runnable.invoke(inputs, config),
+                                     _estimate_tokens(inputs, "", max_tokens), _used_tokens)
+
+    async def ainvoke(inputs, config):
+        return await get_dispatcher().acall(lambda: runnable.ainvoke(inputs, config),
+                                            _estimate_tokens(inputs, "", max_tokens), _used_tokens)
+
+    return RunnableLambda(invoke, afunc=ainvoke, name="dispatched_llm_call")
+
+
+def _cached(template: str, prompt_class: Type, model: Runnable, parser: Optional[Type],
+            llm_settings: Dict[str, Any], validate: Optional[Callable[[Any], None]] = None) -> Runnable:
+    """
+    prompt | model | parser that stores and replays the model's text through
+    get_cache(). Only answers that parse and pass `validate` are stored, and a
+    stored answer that no longer passes is treated as a miss.
+    """
+    prompt_model = prompt_class.from_template(template) | model
+    output = parser() if parser is not None else None
+    model_settings = {name: llm_settings.get(name) for name in CACHE_KEY_SETTINGS}
+    model_settings['azure_deployment'] = model_settings['azure_deployment'] or os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+    model_settings['prompt'] = prompt_class.__name__
+    max_tokens = llm_settings.get('max_tokens')
+
+    def finish(message):
+        result = output.invoke(message) if output is not None else message
+        if validate is not None:
+            validate(result)
+        return result
+
+    def replay(inputs):
+        """(cache, key, replayed result or None); cache and key are None while caching is off."""
+        cache = get_cache()
+        if cache is None:
+            return None, None, None
+        key = cache.make_key(template, inputs, model_settings)
+        text = cache.get(key)
+        if text is None:
+            return cache, key, None
+        try:
+            return cache, key, finish(AIMessage(content=text))
+        except Exception:
+            # Stored before it was validated: ask again and overwrite it
+            return cache, key, None
+
+    def store(cache, key, message):
+        # Parse and validate first: an answer they reject is not worth replaying
+        result = finish(message)
+        if cache is not None:
+            content = message.content
+            cache.put(key, content if isinstance(content, str) else json.dumps(content))
+        return result
+
+    def invoke(inputs, config):
+        cache, key, result = replay(inputs)
+        if result is not None:
+            return result
+        message = get_dispatcher().call(lambda: prompt_model.invoke(inputs, config),
+                                        _estimate_tokens(inputs, template, max_tokens), _used_tokens)
+        return store(cache, key, message)
+
+    async def ainvoke(inputs, config):
+        cache, key, result = replay(inputs)
+        if result is not None:
+            return result
+        message = await get_dispatcher().acall(lambda: prompt_model.ainvoke(inputs, config),
+                                               _estimate_tokens(inputs, template, max_tokens), _used_tokens)
+        return store(cache, key, message)
+
+    return RunnableLambda(invoke, afunc=ainvoke, name="cached_llm_chain")
+
+
+def get_chain(template: str, parser: Optional[Type] = None, prompt_class: Type = PromptTemplate,
+              validate: Optional[Callable[[Any], None]] = None, **llm_settings) -> Runnable:
+    """
+    Returns `prompt_class.from_template(template) | model | parser()`, compiled
+    once and answered from the response cache when possible.
+
+    Args:
+        template (str): The prompt template text.
+        parser (Type): Output parser class (e.g. StrOutputParser); None returns the model's message.
+        prompt_class (Type): PromptTemplate or ChatPromptTemplate.
+        validate (Callable): Raises if a parsed answer is unusable; such
+            answers are raised to the caller and never cached. Pass the same
+            function on every call so the chain is reused.
+        **llm_settings: Passed to get_llm() to select the model.
+
+    Returns:
+        Runnable: The compiled chain. The least recently used chains are
+        dropped beyond MAX_CACHED_CHAINS templates.
+    """
+    key = (template, parser, prompt_class, validate, _settings_key(llm_settings))
+    with _lock:
+        chain = _chains.get(key)
+        if chain is not None:
+            _chains.move_to_end(key)
+            return chain
+    chain = _cached(template, prompt_class, get_llm(**llm_settings), parser, llm_settings, validate)
+    with _lock:
+        chain = _chains.setdefault(key, chain)
+        _chains.move_to_end(key)
+        while len(_chains) > MAX_CACHED_CHAINS:
+            _chains.popitem(last=False)
+    return chain
+
+
+def reset() -> None:
+    """Drops the cached models, chains and dispatcher and closes the shared connection pool."""
+    global _http_client, _dispatcher
+    with _lock:
+        _dispatcher = None
+        _models.clear()
+        _chains.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
@@ -0,0 +1,76 @@
+# File: core/scope_index.py
+#
+# A per-file interval index over the scopes (functions, classes and their
+# methods) recorded in a CodeGraph structure record. Lookups bisect sorted
+# start lines instead of scanning every definition in the file, which keeps
+# edge construction fast on large generated modules.
+
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+
+class _IntervalLevel:
+    """One nesting level of non-overlapping [start, end] line intervals, sorted by start."""
+
+    def __init__(self, intervals: List[Tuple[int, int, str, Optional["_IntervalLevel"]]]):
+        intervals.sort(key=lambda interval: interval[0])
+        self.starts = [interval[0] for interval in intervals]
+        self.ends = [interval[1] for interval in intervals]
+        self.names = [interval[2] for interval in intervals]
+        self.children = [interval[3] for interval in intervals]
+
+    def find(self, line_number: int) -> Optional[str]:
+        """Returns the innermost scope name containing the line, or None."""
+        i = bisect_right(self.starts, line_number) - 1
+        if i < 0 or self.ends[i] < line_number:
+            return None
+        child = self.children[i]
+        if child is not None:
+            inner = child.find(line_number)
+            if inner is not None:
+                return inner
+        return self.names[i]
+
+
+class ScopeIndex:
+    """
+    Sorted interval index answering "which scope contains this line?" for one file.
+
+    Top-level functions and classes form the outer level, and each class holds
+    an inner level for its methods. Python statements never overlap, so each
+    level is a list of disjoint intervals and a lookup is one bisect per level.
+    Lines outside every function and class resolve to the file's module-level
+    code node when the file has one.
+    """
+
+    def __init__(self, file_path: str, structure: dict):
+        """
+        Args:
+            file_path (str): The relative file path used in node names.
+            structure (dict): The file's structure record from CodeGraph.
+        """
+        intervals = []
+        for func in structure.get('functions', []):
+            intervals.append((func['start_line'], func['end_line'], func['name'], None))
+        for cls in structure.get('classes', []):
+            methods = [
+                (meth['start_line'], meth['end_line'], f"{cls['name']}.{meth['name']}", None)
+                for meth in cls.get('methods', [])
+            ]
+            intervals.append((cls['start_line'], cls['end_line'], cls['name'], _IntervalLevel(methods) if methods else None))
+        self._top_level = _IntervalLevel(intervals)
+        self.module_scope = f"{file_path}::module_code" if structure.get('module_level_code') else None
+
+    def find(self, line_number: int) -> Optional[str]:
+        """
+        Finds the function, class, method or module-level scope containing a line.
+
+        Args:
+            line_number (int): 1-based line number.
+
+        Returns:
+            Optional[str]: The scope's node name, or None if the line is outside
+            every scope and the file has no module-level code.
+        """
+        scope = self._top_level.find(line_number)
+        return scope if scope is not None else self.module_scope
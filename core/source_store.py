@@ -0,0 +1,268 @@
+# File: core/source_store.py
+#
+# Graph nodes no longer carry a copy of their source text. Instead they hold
+# byte spans into the original files, and this module turns those spans back
+# into text on demand, memory-mapping each file the first time it is needed.
+# It also holds the bytes-first helpers the graph builder reads files with, so
+# both sides agree on what the span offsets point into.
+#
+# Spans are only valid for the file contents the graph was built from, and a
+# mapped file that shrinks under the map kills the process with SIGBUS on
+# the next read. So every read first stats the file: if it no longer matches
+# the (size, mtime) recorded at build time (see register_source_files) the
+# read fails with StaleSourceError, and if it changed since it was mapped the
+# map is dropped and the file mapped again.
+#
+# One store is shared by every thread (the agent's worker pool, the graph
+# server's request threads), so the map cache is guarded by a lock and span
+# bytes are copied out under it: a map is never closed, by eviction or
+# because its file changed, while another thread is slicing it.
+
+import io
+import os
+import re
+import mmap
+import codecs
+import textwrap
+import tokenize
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_LONE_CR_RE = re.compile(rb"\r(?!\n)")
+_NEWLINE_RE = re.compile(rb"\n")
+
+
+class StaleSourceError(OSError):
+    """A span file changed since the graph was built, so its spans no longer point at the right text."""
+
+    def __init__(self, file_path: str, message: str):
+        super().__init__(message)
+        self.file_path = file_path
+
+
+def file_signature(file_path: str) -> Tuple[int, int]:
+    """(size, mtime_ns) of a file, as recorded for span files when a graph is built."""
+    st = os.stat(file_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def stale_source_files(signatures: Optional[Dict[str, Tuple[int, int]]]) -> List[str]:
+    """
+    The span files whose (size, mtime_ns) no longer match `signatures` (a
+    graph's 'source_files' attribute), including files that no longer exist.
+    """
+    stale = []
+    for file_path, signature in (signatures or {}).items():
+        try:
+            if file_signature(file_path) != tuple(signature):
+                stale.append(file_path)
+        except OSError:
+            stale.append(file_path)
+    return sorted(stale)
+
+
+def sniff_encoding(buffer) -> str:
+    """
+    Detects a source file's encoding from its UTF-8 BOM or PEP 263 coding
+    cookie, looking only at the first two lines. Defaults to 'utf-8'.
+    """
+    head = buffer[:4096]
+    lines = io.BytesIO(bytes(head)).readlines()[:2]
+    try:
+        encoding, _ = tokenize.detect_encoding(iter(lines).__next__)
+    except (SyntaxError, StopIteration):
+        return "utf-8"
+    return encoding
+
+
+def source_view(raw):
+    """
+    Returns the bytes the graph builder parses and that span offsets refer to.
+
+    For UTF-8 files with '\n' or '\r\n' newlines, which is nearly all of them,
+    the raw buffer (bytes or mmap) is used as-is and nothing is decoded. Files
+    declaring another encoding, or using bare '\r' newlines, are transcoded
+    once: decoded with the sniffed encoding, newline-normalized and re-encoded
+    as UTF-8.
+
+    Returns:
+        Tuple[buffer, Optional[str]]: (code_bytes, text). text is None when
+        the raw buffer is used directly, otherwise the decoded source text.
+    """
+    encoding = sniff_encoding(raw)
+    lone_cr = raw.find(b"\r") != -1 and _LONE_CR_RE.search(raw) is not None
+    if encoding in ("utf-8", "utf-8-sig") and not lone_cr:
+        return raw, None
+    text = bytes(raw).decode(encoding, errors="ignore")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text.encode("utf-8"), text
+
+
+def line_offsets(code_bytes):
+    """
+    Byte offset at which each line of `code_bytes` starts. ast column offsets
+    on the first line do not count a UTF-8 BOM, so the first line starts
+    after it.
+    """
+    offsets = [0]
+    offsets.extend(match.end() for match in _NEWLINE_RE.finditer(code_bytes))
+    if code_bytes[:3] == codecs.BOM_UTF8:
+        offsets[0] = 3
+    return offsets
+
+
+class SourceStore:
+    """
+    Materializes node source text from (file, byte-offset, length) spans.
+
+    Files are memory-mapped lazily and kept in a small LRU of open maps.
+    Each file goes through the same `source_view` as in the graph builder, so
+    the (rare) transcoded files are decoded once and their UTF-8 bytes kept
+    instead, keeping span offsets valid.
+
+    Before a file is read it is checked against the signature registered for
+    it (the file as the graph saw it) and against the one it had when mapped.
+    Safe to share between threads.
+    """
+
+    def __init__(self, max_open_files: int = 128):
+        self.max_open_files = max_open_files
+        self._buffers = OrderedDict()  # file_path -> (signature, buffer)
+        self._expected: Dict[str, Tuple[int, int]] = {}
+        self._stale_reported = set()
+        # Held while the map cache changes and while bytes are copied out of a map
+        self._lock = threading.RLock()
+
+    def expect(self, signatures: Optional[Dict[str, Tuple[int, int]]]):
+        """Records the (size, mtime_ns) each span file had when a graph was built."""
+        if signatures:
+            with self._lock:
+                self._expected.update(signatures)
+
+    def _drop(self, file_path: str):
+        _, buffer = self._buffers.pop(file_path, (None, None))
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+    def _buffer(self, file_path: str):
+        """The file's bytes (an mmap or bytes); call with the lock held and copy out before releasing it."""
+        signature = file_signature(file_path)
+        expected = self._expected.get(file_path)
+        if expected is not None and expected != signature:
+            self._drop(file_path)
+            raise StaleSourceError(file_path, f"{file_path} changed since the graph was built")
+        cached = self._buffers.get(file_path)
+        if cached is not None:
+            if cached[0] == signature:
+                self._buffers.move_to_end(file_path)
+                return cached[1]
+            # Changed since it was mapped: never slice a map whose file may have shrunk
+            self._drop(file_path)
+
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                buffer = b""
+            else:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer:
+            code_bytes, _ = source_view(buffer)
+            if code_bytes is not buffer:
+                buffer.close()
+                buffer = code_bytes
+
+        self._buffers[file_path] = (signature, buffer)
+        if len(self._buffers) > self.max_open_files:
+            _, (_, evicted) = self._buffers.popitem(last=False)
+            if isinstance(evicted, mmap.mmap):
+                evicted.close()
+        return buffer
+
+    def read_span(self, file_path: str, offset: int, length: int) -> str:
+        """
+        Returns the text of one span. Indented spans (methods) are dedented so
+        they read like standalone code.
+        """
+        with self._lock:
+            buffer = self._buffer(file_path)
+            if offset + length > len(buffer):
+                raise StaleSourceError(file_path, f"span ({offset}, {length}) is past the end of {file_path}")
+            data = buffer[offset:offset + length]
+        text = data.decode("utf-8", errors="ignore")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        if text[:1] in (" ", "\t"):
+            text = textwrap.dedent(text)
+        return text
+
+    def node_text(self, attrs: Dict[str, Any], default: str = "") -> str:
+        """
+        Returns a node's source text: its inline 'info' if it has one (older
+        graphs, documentation graphs), otherwise the text of its spans.
+        """
+        if 'info' in attrs:
+            return attrs['info']
+        spans = attrs.get('spans')
+        if not spans:
+            return default
+        try:
+            return "\n".join(self.read_span(*span) for span in spans)
+        except StaleSourceError as e:
+            self._report_stale(e)
+            return default
+        except (OSError, ValueError):
+            return default
+
+    def file_text(self, file_path: str, default: str = "") -> str:
+        """Returns the text of a whole file, in the same view its spans point into."""
+        try:
+            with self._lock:
+                data = bytes(self._buffer(file_path))
+        except StaleSourceError as e:
+            self._report_stale(e)
+            return default
+        except (OSError, ValueError):
+            return default
+        return data.decode("utf-8", errors="ignore")
+
+    def _report_stale(self, error: StaleSourceError):
+        """Warns once per stale file that its nodes are read as missing."""
+        with self._lock:
+            if error.file_path in self._stale_reported:
+                return
+            self._stale_reported.add(error.file_path)
+        print(f"Warning: {error}; its nodes' source is treated as unavailable. Rebuild the graph to pick up the change.")
+
+    def close(self):
+        """Closes every open memory map."""
+        with self._lock:
+            for _, buffer in self._buffers.values():
+                if isinstance(buffer, mmap.mmap):
+                    buffer.close()
+            self._buffers.clear()
+
+
+_default_store = SourceStore()
+
+
+def get_node_source(attrs: Dict[str, Any], default: str = "") -> str:
+    """
+    Returns the source text for a graph node's attribute dict, loading it from
+    the shared SourceStore when the node only carries spans.
+    """
+    return _default_store.node_text(attrs, default)
+
+
+def get_file_source(file_path: str, default: str = "") -> str:
+    """Returns the text of a source file through the shared SourceStore."""
+    return _default_store.file_text(file_path, default)
+
+
+def register_source_files(signatures: Optional[Dict[str, Tuple[int, int]]]):
+    """
+    Tells the shared SourceStore which (size, mtime_ns) each span file had
+    when a graph was built (the graph's 'source_files' attribute), so spans
+    are never read from a file that has changed since.
+    """
+    _default_store.expect(signatures)
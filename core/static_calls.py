@@ -0,0 +1,206 @@
+# File: core/static_calls.py
+#
+# Static call analysis for dependency resolution. Parses a node's source with
+# the ast module and records what it calls, which names it binds itself
+# (parameters, assignments, nested definitions), what it imports, and the
+# class of local variables where the code states it (`x = Foo(...)`,
+# `x: Foo`, `self.x = Foo(...)`). summarize_module does the same for a
+# file's module level, where the imports live (the graph does not keep
+# import statements). The documentation agent resolves these call sites
+# against the code graph and only asks the LLM about the ones that stay
+# ambiguous.
+
+import ast
+import builtins
+from typing import Dict, List, NamedTuple, Optional, Set
+
+BUILTIN_NAMES = frozenset(dir(builtins))
+
+
+class CallSite(NamedTuple):
+    """
+    One called expression.
+
+    Attributes:
+        name (str): The dotted name as written ("helper", "self.run",
+            "os.path.join"). For calls on an expression result, such as
+            `load().items()` or `rows[0].save()`, only the attribute ("items").
+        chained (bool): True when the receiver is such an expression result.
+    """
+    name: str
+    chained: bool
+
+
+class SourceSummary(NamedTuple):
+    """
+    What summarize_source found in a piece of code.
+
+    Attributes:
+        calls (List[CallSite]): Distinct call sites in source order.
+        bound (Set[str]): Names the code binds: parameters, assignment and
+            loop targets, nested functions and classes, exception aliases.
+        imports (Dict[str, str]): Local name -> imported dotted path
+            ("np" -> "numpy", "join" -> "os.path.join").
+        local_types (Dict[str, str]): Variable -> the class name it is
+            constructed from or annotated with (last dotted component).
+        attribute_types (Dict[str, str]): The same for attributes assigned
+            on `self` (`self.graph = graph` with `graph: MultiDiGraph`).
+    """
+    calls: List[CallSite]
+    bound: Set[str]
+    imports: Dict[str, str]
+    local_types: Dict[str, str]
+    attribute_types: Dict[str, str]
+
+
+EMPTY_SUMMARY = SourceSummary([], set(), {}, {}, {})
+
+
+def _dotted(node: ast.AST) -> Optional[str]:
+    """'a.b.c' for a Name/Attribute chain, None for anything else."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def _annotation_class(node: Optional[ast.AST]) -> Optional[str]:
+    """The class an annotation names: `Foo`, `mod.Foo`, `"Foo"` or `Optional[Foo]`."""
+    if node is None:
+        return None
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value.rsplit(".", 1)[-1] or None
+    if isinstance(node, ast.Subscript):
+        if _dotted(node.value) in ("Optional", "typing.Optional"):
+            return _annotation_class(node.slice)
+        node = node.value  # List[int] is a list
+    name = _dotted(node)
+    return name.rsplit(".", 1)[-1] if name else None
+
+
+def _bind_target(target: ast.AST, bound: Set[str]):
+    for node in ast.walk(target):
+        if isinstance(node, ast.Name):
+            bound.add(node.id)
+
+
+def _value_class(value: ast.AST, local_types: Dict[str, str]) -> Optional[str]:
+    """The class of an assigned value: `Foo(...)`, or a variable whose class is known."""
+    if isinstance(value, ast.Call):
+        name = _dotted(value.func)
+        return name.rsplit(".", 1)[-1] if name else None
+    if isinstance(value, ast.Name):
+        return local_types.get(value.id)
+    return None
+
+
+def _self_attribute(target: ast.AST) -> Optional[str]:
+    if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == "self":
+        return target.attr
+    return None
+
+
+def _module_level(tree: ast.Module):
+    """Nodes at module level, including inside if/try/with blocks, but not inside definitions."""
+    stack = list(reversed(tree.body))
+    while stack:
+        node = stack.pop()
+        yield node
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            stack.extend(reversed(list(ast.iter_child_nodes(node))))
+
+
+def _summarize(nodes) -> SourceSummary:
+    calls: Dict[CallSite, None] = {}
+    bound: Set[str] = set()
+    imports: Dict[str, str] = {}
+    local_types: Dict[str, str] = {}
+    attribute_types: Dict[str, str] = {}
+    for node in nodes:
+        if isinstance(node, ast.Call):
+            name = _dotted(node.func)
+            if name is not None:
+                calls.setdefault(CallSite(name, False))
+            elif isinstance(node.func, ast.Attribute):
+                calls.setdefault(CallSite(node.func.attr, True))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            if not isinstance(node, ast.Lambda):
+                bound.add(node.name)
+            arguments = node.args
+            for arg in arguments.posonlyargs + arguments.args + arguments.kwonlyargs:
+                bound.add(arg.arg)
+                class_name = _annotation_class(arg.annotation)
+                if class_name:
+                    local_types[arg.arg] = class_name
+            for arg in (arguments.vararg, arguments.kwarg):
+                if arg is not None:
+                    bound.add(arg.arg)
+        elif isinstance(node, ast.ClassDef):
+            bound.add(node.name)
+        elif isinstance(node, ast.Import):
+            for alias in node.names:
+                local = alias.asname or alias.name.split(".")[0]
+                imports[local] = alias.name if alias.asname else local
+        elif isinstance(node, ast.ImportFrom):
+            module = "." * node.level + (node.module or "")
+            prefix = module if module.endswith(".") else module + "."
+            for alias in node.names:
+                if alias.name != "*":
+                    imports[alias.asname or alias.name] = prefix + alias.name
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                _bind_target(target, bound)
+            if len(node.targets) == 1:
+                class_name = _value_class(node.value, local_types)
+                target = node.targets[0]
+                if class_name and isinstance(target, ast.Name):
+                    local_types[target.id] = class_name
+                elif class_name and _self_attribute(target):
+                    attribute_types[_self_attribute(target)] = class_name
+        elif isinstance(node, ast.AnnAssign):
+            _bind_target(node.target, bound)
+            class_name = _annotation_class(node.annotation)
+            if class_name and isinstance(node.target, ast.Name):
+                local_types[node.target.id] = class_name
+            elif class_name and _self_attribute(node.target):
+                attribute_types[_self_attribute(node.target)] = class_name
+        elif isinstance(node, (ast.AugAssign, ast.For, ast.AsyncFor, ast.comprehension, ast.NamedExpr)):
+            _bind_target(node.target, bound)
+        elif isinstance(node, ast.withitem) and node.optional_vars is not None:
+            _bind_target(node.optional_vars, bound)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+    return SourceSummary(list(calls), bound, imports, local_types, attribute_types)
+
+
+def summarize_source(source: str) -> Optional[SourceSummary]:
+    """
+    Collects the call sites, bound names, imports and variable classes of `source`.
+
+    Args:
+        source (str): Python code, e.g. a graph node's source text.
+
+    Returns:
+        Optional[SourceSummary]: The summary, or None if the code does not parse.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    return _summarize(ast.walk(tree))
+
+
+def summarize_module(source: str) -> Optional[SourceSummary]:
+    """
+    Like summarize_source, but only for module-level statements: the file's
+    imports and global names, without the locals of its functions and classes.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    return _summarize(_module_level(tree))
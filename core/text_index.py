@@ -0,0 +1,409 @@
+# File: core/text_index.py
+#
+# A trigram inverted index over node names, docstrings and source text, so
+# RepoSearcher's pattern search stops lowercasing and scanning every node's
+# text on every query. Each field maps a trigram of its lowercased text to
+# the sorted IDs of the nodes containing it; a query intersects the postings
+# of its own trigrams and checks only the surviving candidates against the
+# real text, so results are exactly those of a full scan.
+#
+# Every text is padded with one sentinel before and two after, so each
+# position starts a trigram: 1- and 2-character patterns become a range of
+# keys, and a prefix is a trigram beginning with the sentinel.
+#
+# An index opened with a graph path is persisted next to the graph in
+# "<graph_path>.textindex/" and reused until the graph on disk is replaced.
+
+import os
+import re
+import json
+import shutil
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+from core.source_store import get_node_source
+
+FORMAT_NAME = "documentation-agent-text-index"
+FORMAT_VERSION = 1
+HEADER_FILE = "header.json"
+FIELDS = ('name', 'docstring', 'info')
+
+# Code points take 21 bits; the sentinel is the first value above Unicode
+_BITS = 21
+_SENTINEL = 0x110000
+_CHAR_MASK = (1 << _BITS) - 1
+
+# Characters of text indexed per build chunk, bounding the build temporaries
+_CHUNK_CHARS = 1 << 24
+
+_REPEATS = tuple(getattr(sre_constants, name) for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+                 if hasattr(sre_constants, name))
+
+
+def index_path(graph_path: str) -> str:
+    """Directory the text index of the graph at `graph_path` is persisted in."""
+    return f"{os.path.abspath(graph_path).rstrip(os.sep)}.textindex"
+
+
+def _graph_signature(graph_path: str) -> List[int]:
+    """Changes whenever the graph file or store at `graph_path` is replaced."""
+    st = os.stat(graph_path)
+    return [st.st_ino, st.st_mtime_ns]
+
+
+def _codepoints(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode('utf-32-le', errors='surrogatepass'), dtype=np.uint32)
+
+
+def _trigram_codes(chars: np.ndarray) -> np.ndarray:
+    """Key of every trigram of a code point array."""
+    chars = chars.astype(np.uint64)
+    return (chars[:-2] << np.uint64(2 * _BITS)) | (chars[1:-1] << np.uint64(_BITS)) | chars[2:]
+
+
+def _required_literals(regex: re.Pattern) -> List[str]:
+    """
+    Lowercased literal runs every match of `regex` must contain. Only
+    characters whose lowercase form is certain to appear in the lowercased
+    text are used, so the runs never rule out a real match.
+    """
+    parsed = sre_parse.parse(regex.pattern, regex.flags)
+    runs = []
+    _collect_literals(parsed, bool(parsed.state.flags & re.IGNORECASE), runs)
+    return [run for run in runs if run]
+
+
+def _collect_literals(sequence, ignorecase: bool, runs: List[str]):
+    run = []
+    for op, av in sequence:
+        char = chr(av) if op is sre_constants.LITERAL else None
+        if char is not None and (
+                (not ignorecase and (char.isascii() or char.lower() == char))
+                # Case-insensitive 'i' and 's' also match 'ı' and 'ſ', which lowercase to themselves
+                or (ignorecase and char.isascii() and char.lower() not in 'is')):
+            run.append(char)
+            continue
+        runs.append(''.join(run).lower())
+        run = []
+        if op is sre_constants.SUBPATTERN:
+            _, add_flags, del_flags, group = av
+            group_ignorecase = (ignorecase or bool(add_flags & re.IGNORECASE)) and not del_flags & re.IGNORECASE
+            _collect_literals(group, group_ignorecase, runs)
+        elif op in _REPEATS and av[0] >= 1:
+            _collect_literals(av[2], ignorecase, runs)
+    runs.append(''.join(run).lower())
+
+
+class _Postings:
+    """Sorted trigram keys of one field, with the node IDs containing each."""
+
+    def __init__(self, keys: np.ndarray, indptr: np.ndarray, nodes: np.ndarray):
+        self.keys = keys
+        self.indptr = indptr
+        self.nodes = nodes
+
+    def exact(self, key: int) -> np.ndarray:
+        i = int(np.searchsorted(self.keys, np.uint64(key)))
+        if i == len(self.keys) or int(self.keys[i]) != key:
+            return self.nodes[:0]
+        return self.nodes[self.indptr[i]:self.indptr[i + 1]]
+
+    def key_range(self, low: int, high: int) -> np.ndarray:
+        """Node IDs with any key in [low, high), sorted and unique."""
+        lo, hi = np.searchsorted(self.keys, np.array([low, high], dtype=np.uint64)).tolist()
+        return np.unique(self.nodes[self.indptr[lo]:self.indptr[hi]])
+
+
+class TextIndex:
+    """
+    Trigram index over the 'name', 'docstring' and 'info' (source text) of a
+    graph's nodes. Fields are built on first use, or loaded from disk when the
+    index was opened with a graph path and the graph has not changed since.
+    The index is a snapshot of the graph: build a new one after nodes change.
+
+    Attributes:
+        graph: The graph the index covers (MultiDiGraph or StoredGraphView).
+        names (List[str]): Node names; node IDs are positions in this list.
+        path (str): Directory the index is persisted in, or None.
+    """
+
+    def __init__(self, graph, graph_path: Optional[str] = None):
+        """
+        Args:
+            graph: The repository code graph (MultiDiGraph or StoredGraphView).
+            graph_path (str): Where `graph` was loaded from. When given, built
+                fields are saved next to it and loaded again by later runs.
+        """
+        self.graph = graph
+        self.names = list(graph.nodes())
+        self.path = index_path(graph_path) if graph_path else None
+        self._signature = _graph_signature(graph_path) if graph_path else None
+        self._fields = {}
+        self._lock = threading.Lock()
+        if self.path:
+            self._discard_if_stale()
+
+    # --- Building and persistence ---
+
+    def _field_text(self, field: str, node_id: int) -> str:
+        name = self.names[node_id]
+        if field == 'name':
+            return name
+        attrs = self.graph.nodes[name]
+        if field == 'docstring':
+            return attrs.get('docstring', '')
+        return get_node_source(attrs)
+
+    def _build(self, field: str) -> _Postings:
+        """Indexes one field, a chunk of nodes at a time."""
+        code_chunks, node_chunks = [], []
+        texts, first, chars = [], 0, 0
+        for node_id in range(len(self.names) + 1):
+            if node_id < len(self.names):
+                text = self._field_text(field, node_id).lower()
+                texts.append(text)
+                chars += len(text) + 3
+                if chars < _CHUNK_CHARS:
+                    continue
+            if texts:
+                codes, nodes = self._chunk_postings(texts, first)
+                code_chunks.append(codes)
+                node_chunks.append(nodes)
+            first, texts, chars = node_id + 1, [], 0
+
+        codes = np.concatenate(code_chunks) if code_chunks else np.zeros(0, dtype=np.uint64)
+        nodes = np.concatenate(node_chunks) if node_chunks else np.zeros(0, dtype=np.int32)
+        # Stable, so each key's node IDs stay ascending
+        order = np.argsort(codes, kind='stable')
+        codes, nodes = codes[order], nodes[order]
+        starts = np.flatnonzero(np.diff(codes)) + 1 if len(codes) else np.zeros(0, dtype=np.int64)
+        keys = codes[np.concatenate(([0], starts))] if len(codes) else codes
+        indptr = np.concatenate(([0], starts, [len(codes)])).astype(np.int64) if len(codes) else np.zeros(1, np.int64)
+        return _Postings(keys, indptr, nodes)
+
+    @staticmethod
+    def _chunk_postings(texts: List[str], first: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Unique (trigram key, node ID) pairs of consecutive texts, ordered by node."""
+        lengths = np.array([len(text) for text in texts], dtype=np.int64)
+        padded = lengths + 3
+        starts = np.concatenate(([0], np.cumsum(padded)[:-1]))
+        chars = np.full(int(padded.sum()), _SENTINEL, dtype=np.uint32)
+        text_chars = _codepoints(''.join(texts))
+        # Each text goes one position after its start: sentinel, text, sentinel, sentinel
+        positions = np.repeat(starts + 1 - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        chars[positions + np.arange(len(text_chars))] = text_chars
+        codes = _trigram_codes(chars)
+        # A text of length L has L + 1 trigrams; the last two positions would cross into the next text
+        owner = np.repeat(np.arange(len(texts)), padded)[:len(codes)]
+        keep = np.arange(len(codes)) - starts[owner] <= lengths[owner]
+        codes, owner = codes[keep], owner[keep]
+        order = np.lexsort((codes, owner))
+        codes, owner = codes[order], owner[order]
+        distinct = np.ones(len(codes), dtype=bool)
+        distinct[1:] = (codes[1:] != codes[:-1]) | (owner[1:] != owner[:-1])
+        return codes[distinct], (owner[distinct] + first).astype(np.int32)
+
+    def _read_header(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.path, HEADER_FILE), 'r', encoding='utf-8') as f:
+                header = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (header.get('format') != FORMAT_NAME or header.get('version') != FORMAT_VERSION
+                or header.get('signature') != self._signature or header.get('num_nodes') != len(self.names)):
+            return None
+        return header
+
+    def _discard_if_stale(self):
+        if os.path.isdir(self.path) and self._read_header() is None:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def _load(self, field: str) -> Optional[_Postings]:
+        header = self._read_header()
+        if header is None or field not in header.get('fields', []):
+            return None
+        arrays = [np.load(os.path.join(self.path, f"{field}.{part}.npy"), mmap_mode='r')
+                  for part in ('keys', 'indptr', 'nodes')]
+        return _Postings(*arrays)
+
+    def _save(self, field: str, postings: _Postings):
+        os.makedirs(self.path, exist_ok=True)
+        for part in ('keys', 'indptr', 'nodes'):
+            final = os.path.join(self.path, f"{field}.{part}.npy")
+            with open(f"{final}.tmp", 'wb') as f:
+                np.save(f, getattr(postings, part))
+            os.replace(f"{final}.tmp", final)
+        header = self._read_header() or {}
+        fields = [name for name in FIELDS if name == field or name in header.get('fields', [])]
+        header = {
+            'format': FORMAT_NAME,
+            'version': FORMAT_VERSION,
+            'signature': self._signature,
+            'num_nodes': len(self.names),
+            'fields': fields,
+        }
+        header_path = os.path.join(self.path, HEADER_FILE)
+        with open(f"{header_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(header, f)
+        os.replace(f"{header_path}.tmp", header_path)
+
+    def field(self, field: str) -> _Postings:
+        """Postings of one field, loaded or built (and saved) on first use."""
+        postings = self._fields.get(field)
+        if postings is not None:
+            return postings
+        with self._lock:
+            postings = self._fields.get(field)
+            if postings is None:
+                postings = self._load(field) if self.path else None
+                if postings is None:
+                    postings = self._build(field)
+                    if self.path:
+                        try:
+                            self._save(field, postings)
+                        except OSError as e:
+                            print(f"Warning: could not save the text index to '{self.path}': {e}")
+                self._fields[field] = postings
+        return postings
+
+    def build_all(self):
+        """Loads or builds every field up front, e.g. before serving queries."""
+        for field in FIELDS:
+            self.field(field)
+
+    # --- Candidates ---
+
+    def _substring_candidates(self, field: str, pattern: str) -> Tuple[Optional[np.ndarray], bool]:
+        """
+        Node IDs whose lowercased field may contain `pattern` (already
+        lowercased), and whether every candidate is a certain match.
+        None means every node.
+        """
+        if not pattern:
+            return None, True
+        postings = self.field(field)
+        chars = [int(c) for c in _codepoints(pattern)]
+        if len(chars) == 1:
+            low = chars[0] << (2 * _BITS)
+            return postings.key_range(low, low + (1 << (2 * _BITS))), True
+        if len(chars) == 2:
+            low = (chars[0] << (2 * _BITS)) | (chars[1] << _BITS)
+            return postings.key_range(low, low + (1 << _BITS)), True
+        keys = np.unique(_trigram_codes(np.array(chars, dtype=np.uint32))).tolist()
+        return self._intersect([postings.exact(key) for key in keys]), len(chars) == 3
+
+    def _prefix_candidates(self, field: str, prefix: str) -> Tuple[Optional[np.ndarray], bool]:
+        if not prefix:
+            return None, True
+        postings = self.field(field)
+        chars = [int(c) for c in _codepoints(prefix)]
+        start = _SENTINEL << (2 * _BITS)
+        if len(chars) == 1:
+            low = start | (chars[0] << _BITS)
+            return postings.key_range(low, low + (1 << _BITS)), True
+        lists = [postings.exact(start | (chars[0] << _BITS) | chars[1])]
+        if len(chars) > 2:
+            keys = np.unique(_trigram_codes(np.array(chars, dtype=np.uint32))).tolist()
+            lists.extend(postings.exact(key) for key in keys)
+        return self._intersect(lists), len(chars) == 2
+
+    @staticmethod
+    def _intersect(lists: List[np.ndarray]) -> np.ndarray:
+        lists = sorted(lists, key=len)
+        result = lists[0]
+        for nodes in lists[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, nodes, assume_unique=True)
+        return result
+
+    def _resolve(self, field: str, candidates: Optional[np.ndarray], exact: bool, matches) -> List[int]:
+        """Checks candidates that are not certain matches against their real text."""
+        node_ids = range(len(self.names)) if candidates is None else candidates.tolist()
+        if exact:
+            return list(node_ids)
+        return [node_id for node_id in node_ids if matches(self._field_text(field, node_id))]
+
+    @staticmethod
+    def _fields_for(search_in: str) -> Tuple[str, ...]:
+        return FIELDS if search_in == 'all' else tuple(field for field in FIELDS if field == search_in)
+
+    def _combine(self, matches_per_field: List[List[int]]) -> List[str]:
+        """Node names matching in any field, in graph order."""
+        if len(matches_per_field) == 1:
+            return [self.names[node_id] for node_id in matches_per_field[0]]
+        matched = set()
+        for node_ids in matches_per_field:
+            matched.update(node_ids)
+        return [self.names[node_id] for node_id in sorted(matched)]
+
+    # --- Queries ---
+
+    def search(self, pattern: str, search_in: str = 'name') -> List[str]:
+        """
+        Nodes whose lowercased field contains the lowercased `pattern`.
+
+        Args:
+            pattern (str): Substring to look for; matching ignores case.
+            search_in (str): 'name', 'docstring', 'info' or 'all'. Anything
+                else matches nothing.
+
+        Returns:
+            List[str]: Matching node names in graph order.
+        """
+        pattern = pattern.lower()
+        results = []
+        for field in self._fields_for(search_in):
+            candidates, exact = self._substring_candidates(field, pattern)
+            results.append(self._resolve(field, candidates, exact, lambda text: pattern in text.lower()))
+        return self._combine(results)
+
+    def search_prefix(self, prefix: str, search_in: str = 'name') -> List[str]:
+        """
+        Nodes whose lowercased field starts with the lowercased `prefix`.
+        Arguments and result are as for `search`.
+        """
+        prefix = prefix.lower()
+        results = []
+        for field in self._fields_for(search_in):
+            candidates, exact = self._prefix_candidates(field, prefix)
+            results.append(self._resolve(field, candidates, exact, lambda text: text.lower().startswith(prefix)))
+        return self._combine(results)
+
+    def search_regex(self, regex: str, search_in: str = 'name', flags: int = 0) -> List[str]:
+        """
+        Nodes where `re.search(regex, field)` finds a match. The literal runs
+        every match must contain narrow the candidates; only those are searched.
+
+        Args:
+            regex (str): Regular expression, matched against the original text.
+            search_in (str): 'name', 'docstring', 'info' or 'all'.
+            flags (int): `re` flags, e.g. re.IGNORECASE.
+
+        Returns:
+            List[str]: Matching node names in graph order.
+
+        Raises:
+            re.error: If `regex` is not a valid regular expression.
+        """
+        compiled = re.compile(regex, flags)
+        literals = _required_literals(compiled)
+        # Runs of at least 3 characters narrow well; shorter ones only when nothing else is available
+        long_literals = [literal for literal in literals if len(literal) >= 3]
+        literals = long_literals or sorted(literals, key=len)[-1:]
+        results = []
+        for field in self._fields_for(search_in):
+            candidates = None
+            for literal in literals:
+                literal_candidates, _ = self._substring_candidates(field, literal)
+                candidates = literal_candidates if candidates is None else self._intersect(
+                    [candidates, literal_candidates])
+            results.append(self._resolve(field, candidates, False, lambda text: compiled.search(text) is not None))
+        return self._combine(results)
@@ -0,0 +1,141 @@
+# File: core/token_budget.py
+#
+# Token counting and budgeted prompt assembly. Dependency context used to be
+# pasted in full, so hub nodes produced prompts of tens of thousands of
+# tokens. Here each piece of context comes with a full and a minimal
+# rendering; fit_to_budget keeps every piece at least minimal while the
+# budget allows, then spends what is left on full renderings in rank order,
+# truncating the one that no longer fits.
+#
+# Tokens are counted with tiktoken. Its encodings are downloaded on first
+# use; where that is impossible (offline machines without a tiktoken cache)
+# counts fall back to an estimate of four characters per token.
+
+import os
+import math
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import tiktoken
+
+DEFAULT_ENCODING = "o200k_base"  # gpt-4o
+DEFAULT_CONTEXT_TOKEN_BUDGET = 6000
+# Below this many tokens a truncated block says too little to be worth it
+MIN_TRUNCATED_TOKENS = 64
+CHARS_PER_TOKEN = 4
+TRUNCATION_NOTE = "\n... [truncated to fit the context budget]\n\n---\n\n"
+
+_lock = threading.Lock()
+_encoding = None
+_encoding_loaded = False
+
+
+def get_encoding() -> Optional["tiktoken.Encoding"]:
+    """The tiktoken encoding named by TIKTOKEN_ENCODING (default o200k_base), or None if it cannot be loaded."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _lock:
+            if not _encoding_loaded:
+                name = os.getenv("TIKTOKEN_ENCODING", DEFAULT_ENCODING)
+                try:
+                    _encoding = tiktoken.get_encoding(name)
+                except Exception as e:
+                    print(f"Warning: tiktoken encoding '{name}' unavailable ({e.__class__.__name__}); "
+                          f"estimating {CHARS_PER_TOKEN} characters per token.")
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in `text`."""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of `text` with at most `max_tokens` tokens."""
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+class ContextItem(NamedTuple):
+    """
+    One piece of prompt context.
+
+    Attributes:
+        name (str): What the item describes, for logs and metadata.
+        full (str): The complete rendering.
+        minimal (str): A one- or two-line rendering used when the full one does not fit.
+    """
+    name: str
+    full: str
+    minimal: str
+
+
+def fit_to_budget(items: List[ContextItem], budget: int) -> Tuple[str, Dict[str, Any]]:
+    """
+    Joins `items`, most important first, into at most `budget` tokens.
+
+    Every item gets its minimal rendering while those fit; items that do not
+    fit even so are left out, from the end of the list. The remaining budget
+    then upgrades items to their full rendering in order, and the first one
+    that does not fit is truncated if at least MIN_TRUNCATED_TOKENS remain.
+
+    Args:
+        items (List[ContextItem]): Context pieces in priority order.
+        budget (int): Token limit for the joined text.
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: The text and {'tokens', 'budget', 'full',
+        'truncated', 'minimal', 'omitted'}, the last four being item names.
+    """
+    minimal_tokens = [count_tokens(item.minimal) for item in items]
+    kept = 0
+    used = 0
+    while kept < len(items) and used + minimal_tokens[kept] <= budget:
+        used += minimal_tokens[kept]
+        kept += 1
+    omission_note = ""
+    if kept < len(items):
+        # Make room for the note saying how many were left out
+        while True:
+            omission_note = (f"({len(items) - kept} lower-priority dependencies omitted "
+                             f"to fit the context budget.)\n")
+            if kept == 0 or used + count_tokens(omission_note) <= budget:
+                break
+            kept -= 1
+            used -= minimal_tokens[kept]
+    stats = {'budget': budget, 'full': [], 'truncated': [], 'minimal': [],
+             'omitted': [item.name for item in items[kept:]]}
+    budget -= count_tokens(omission_note)
+
+    rendered = [item.minimal for item in items[:kept]]
+    for position, item in enumerate(items[:kept]):
+        full_tokens = count_tokens(item.full)
+        available = budget - used + minimal_tokens[position]
+        if full_tokens <= available:
+            rendered[position] = item.full
+            used += full_tokens - minimal_tokens[position]
+            stats['full'].append(item.name)
+            continue
+        room = available - count_tokens(TRUNCATION_NOTE)
+        if room >= MIN_TRUNCATED_TOKENS and room > minimal_tokens[position]:
+            rendered[position] = truncate_to_tokens(item.full, room) + TRUNCATION_NOTE
+            used += count_tokens(rendered[position]) - minimal_tokens[position]
+            stats['truncated'].append(item.name)
+        else:
+            stats['minimal'].append(item.name)
+
+    text = "".join(rendered) + omission_note
+    stats['tokens'] = count_tokens(text)
+    return text, stats
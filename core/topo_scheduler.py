@@ -0,0 +1,155 @@
+# File: core/topo_scheduler.py
+#
+# Decides the order in which the documentation agent documents nodes. A node
+# depends on its successors, so it is ready once every successor has been
+# documented. Everything is computed once from the CSR arrays: each node keeps
+# a counter of undocumented dependencies that is decremented as they are
+# documented. Ready nodes are released in waves; no node in a wave depends on
+# another node of the same wave.
+#
+# Strongly connected components with more than one node never become ready by
+# counting. Once all of a component's dependencies outside it are documented,
+# its lowest-ID undocumented node is released to break the cycle, and the
+# counters take over from there. If the component stalls again, the next
+# lowest node is released. Every break is logged. Self-loops are ignored.
+# Scheduling a whole run costs O(V + E), plus sorting each wave into graph
+# order.
+
+import numpy as np
+from typing import Dict, List, Tuple
+
+from .graph_statistics import GraphStatistics
+
+
+class TopologicalScheduler:
+    """
+    Releases the nodes of a graph in dependency order, one wave at a time.
+
+    Callers alternate next_wave() and mark_documented() for every node in the
+    wave. A node is released exactly once.
+
+    Attributes:
+        names (List[str]): Node names by ID, in graph order.
+        cycle_breaks (List[Tuple[str, int]]): (released node, cycle size) for
+            every node released before its dependencies were documented.
+        waves_released (int): Number of non-empty waves handed out so far.
+    """
+
+    def __init__(self, statistics: GraphStatistics):
+        csr = statistics.csr
+        n = csr.num_nodes
+        self.names = csr.names
+        self._ids = csr.ids
+        labels = statistics.strong_component_labels()
+        src = np.repeat(np.arange(n), np.diff(csr.out_indptr))
+        dst = csr.out_dst
+        not_self = src != dst
+        self.self_loops = int(np.count_nonzero(~not_self))
+
+        # Undocumented dependencies per node, and per component the
+        # dependencies that lie in other components
+        self._pending = np.bincount(src[not_self], minlength=n).tolist()
+        num_components = int(labels.max()) + 1 if n else 0
+        external = labels[src] != labels[dst]
+        self._blocking = np.bincount(labels[src[external]], minlength=num_components).tolist()
+        self._labels = labels.tolist()
+        self._in = (csr.in_indptr.tolist(), csr.in_src.tolist())
+
+        # Members of every cycle (component of two or more nodes), by ID
+        sizes = np.bincount(labels, minlength=num_components)
+        cyclic = np.flatnonzero(sizes > 1)
+        members = np.flatnonzero(sizes[labels] > 1)
+        members = members[np.argsort(labels[members], kind='stable')]
+        bounds = np.cumsum(sizes[cyclic]).tolist()
+        groups = np.split(members, bounds[:-1]) if len(cyclic) else []
+        self._members = {c: ids.tolist() for c, ids in zip(cyclic.tolist(), groups)}
+        self._cursor = dict.fromkeys(self._members, 0)
+
+        self._released = bytearray(n)
+        self._documented = bytearray(n)
+        self.num_documented = 0
+        self._ready = np.flatnonzero(np.array(self._pending, dtype=np.int64) == 0).tolist()
+        # Cycles whose outside dependencies are all documented, in the order they opened
+        self._open = {c: None for c in self._members if self._blocking[c] == 0}
+        self.cycle_breaks: List[Tuple[str, int]] = []
+        self.waves_released = 0
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.names)
+
+    @property
+    def num_cycles(self) -> int:
+        """Number of strongly connected components with two or more nodes."""
+        return len(self._members)
+
+    @property
+    def finished(self) -> bool:
+        return self.num_documented == self.num_nodes
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            'nodes': self.num_nodes,
+            'initially_ready': len(self._ready),
+            'cycles': self.num_cycles,
+            'nodes_in_cycles': sum(map(len, self._members.values())),
+            'largest_cycle': max(map(len, self._members.values()), default=0),
+            'self_loops': self.self_loops,
+        }
+
+    def next_wave(self) -> List[str]:
+        """
+        Releases every node that is ready now, plus one node of each open cycle
+        that has nothing else in the wave.
+
+        Returns:
+            List[str]: The released node names in graph order; empty once every
+            node has been released, or while released nodes are still waiting
+            for mark_documented().
+        """
+        wave, self._ready = self._ready, []
+        in_wave = {self._labels[i] for i in wave}
+        released = self._released
+        for component in list(self._open):
+            members = self._members[component]
+            cursor = self._cursor[component]
+            while cursor < len(members) and released[members[cursor]]:
+                cursor += 1
+            self._cursor[component] = cursor
+            if cursor == len(members):
+                del self._open[component]
+            elif component not in in_wave:
+                node = members[cursor]
+                wave.append(node)
+                self.cycle_breaks.append((self.names[node], len(members)))
+                print(f"Breaking a cycle of {len(members)} nodes: releasing '{self.names[node]}' "
+                      f"with {self._pending[node]} dependencies still undocumented.")
+
+        wave.sort()
+        for node in wave:
+            released[node] = 1
+        if wave:
+            self.waves_released += 1
+        return [self.names[node] for node in wave]
+
+    def mark_documented(self, node_name: str) -> None:
+        """Records that `node_name` is documented and updates the counters of the nodes depending on it."""
+        node = self._ids[node_name]
+        if self._documented[node]:
+            return
+        self._documented[node] = 1
+        self.num_documented += 1
+        pending, blocking, labels, released = self._pending, self._blocking, self._labels, self._released
+        component = labels[node]
+        indptr, in_src = self._in
+        for dependent in in_src[indptr[node]:indptr[node + 1]]:
+            if dependent == node:
+                continue
+            pending[dependent] -= 1
+            if pending[dependent] == 0 and not released[dependent]:
+                self._ready.append(dependent)
+            dependent_component = labels[dependent]
+            if dependent_component != component:
+                blocking[dependent_component] -= 1
+                if blocking[dependent_component] == 0 and dependent_component in self._members:
+                    self._open[dependent_component] = None
@@ -4,33 +4,64 @@
 # and incoming connections (e.g., functions that call the given node).
 #
 # The results are printed in a clean, indented format.
+#
+# If a graph query server (core/graph_server.py) is running for the graph,
+# the lookup is sent to it instead of opening the graph in this process.
 
-import pickle
 import networkx as nx
 import sys
+from core.graph_store import load_graph_view
+from core.graph_server import query_or_none
+from core.text_index import TextIndex
+
+def _connections_from_server(node_name: str, graph_path: str):
+    """
+    Asks a running query server for the node's connections.
 
-def find_direct_connections(node_name: str, graph_path: str = "graph.pkl"):
+    Returns:
+        Tuple[bool, Optional[dict], List[str]]: (served, connections, suggestions).
+        served is False when no server is running for `graph_path`.
+    """
+    served, connections = query_or_none(graph_path, 'connections', node_name=node_name)
+    if not served or connections is not None:
+        return served, connections, []
+    _, suggestions = query_or_none(graph_path, 'search', pattern=node_name, search_in='name')
+    return True, None, suggestions or []
+
+def _connections_from_graph(node_name: str, graph_path: str):
+    """Same as _connections_from_server, reading the graph store directly."""
+    repo_graph = load_graph_view(graph_path)
+    if node_name not in repo_graph:
+        suggestions = TextIndex(repo_graph, graph_path).search(node_name, 'name')
+        return True, None, suggestions
+    connections = {
+        'outgoing': list(repo_graph.successors(node_name)),
+        'incoming': list(repo_graph.predecessors(node_name)),
+    }
+    return True, connections, []
+
+def find_direct_connections(node_name: str, graph_path: str = "graph.store"):
     """
     Finds and prints all direct incoming and outgoing connections for a specific node.
 
     Args:
         node_name (str): The name of the node to find connections for.
-        graph_path (str): The path to the saved graph.pkl file.
+        graph_path (str): The path to the saved graph store.
     """
-    # --- Step 1: Load the graph from the file ---
-    try:
-        with open(graph_path, 'rb') as f:
-            repo_graph = pickle.load(f)
-    except FileNotFoundError:
-        print(f"Error: The graph file '{graph_path}' was not found.")
-        print("Please ensure you have run 'construct_graph.py' first.")
-        return
+    # --- Step 1: Ask the query server, or open the graph if none is running ---
+    served, connections, suggestions = _connections_from_server(node_name, graph_path)
+    if not served:
+        try:
+            served, connections, suggestions = _connections_from_graph(node_name, graph_path)
+        except FileNotFoundError:
+            print(f"Error: The graph file '{graph_path}' was not found.")
+            print("Please ensure you have run 'construct_graph.py' first.")
+            return
 
     # --- Step 2: Check if the requested node exists in the graph ---
-    if node_name not in repo_graph:
+    if connections is None:
         print(f"Error: Node '{node_name}' not found in the graph.")
         # Suggest similar nodes if any exist
-        suggestions = [n for n in repo_graph.nodes() if node_name.lower() in n.lower()]
         if suggestions:
             print("\nDid you mean one of these?")
             for s in suggestions[:10]: # Limit suggestions
@@ -43,7 +74,7 @@ def find_direct_connections(node_name: str, graph_path: str = "graph.pkl"):
     # --- Step 3: Find and print outgoing connections ---
     # In a directed graph, 'successors' are the nodes that the current node
     # has an edge pointing TO. This represents functions/classes it calls or invokes.
-    outgoing_nodes = list(repo_graph.successors(node_name))
+    outgoing_nodes = connections['outgoing']
 
     print("\n  Outgoing Connections (i.e., what '{0}' calls):".format(node_name))
     if outgoing_nodes:
@@ -55,7 +86,7 @@ def find_direct_connections(node_name: str, graph_path: str = "graph.pkl"):
     # --- Step 4: Find and print incoming connections ---
     # 'Predecessors' are the nodes that have an edge pointing FROM them
     # TO the current node. This represents functions/classes that call it.
-    incoming_nodes = list(repo_graph.predecessors(node_name))
+    incoming_nodes = connections['incoming']
 
     print("\n  Incoming Connections (i.e., what calls '{0}'):".format(node_name))
     if incoming_nodes:
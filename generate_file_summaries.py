@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import Dict, Any
 from langchain_core.runnables import Runnable
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import AzureChatOpenAI
+from core.llm_provider import get_llm, dispatched
 
 # Assumes file-level documentation will be generated from this base folder
 docs_base_dir = "output/{repo_name}/documentation"
@@ -38,14 +38,16 @@ Only use content present in the documentation snippets. Do not hallucinate missi
 """)
 ])
 
-# Use Azure OpenAI (adjust deployment name and model)
-lm = AzureChatOpenAI(
-    deployment_name="gpt-4o-mini",
+# Use Azure OpenAI (adjust deployment name and model); the shared client keeps
+# its connections open across files and the dispatcher keeps requests under
+# the deployment's quota
+lm = get_llm(
+    azure_deployment="gpt-4o-mini",
     model="gpt-4o-mini",
     temperature=0.3
 )
 
-summarizer: Runnable = file_summary_prompt | lm
+summarizer: Runnable = dispatched(file_summary_prompt | lm)
 
 def generate_file_level_doc(repo_name: str):
     repo_doc_dir = Path(f"output/{repo_name}/documentation")
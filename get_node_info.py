@@ -3,13 +3,18 @@
 # This script provides a function to retrieve all stored information for a
 # single node from the repository graph. It packages the node's attributes
 # and its direct connections into a clean, easy-to-use dictionary.
+#
+# If a graph query server (core/graph_server.py) is running for the graph,
+# the lookup is sent to it instead of opening the graph in this process.
 
-import pickle
 import networkx as nx
 import sys
 import json
+from core.source_store import get_node_source
+from core.graph_store import load_graph_view
+from core.graph_server import query_or_none
 
-def get_info_for_node(node_name: str, graph_path: str = "graph.pkl") -> dict:
+def get_info_for_node(node_name: str, graph_path: str = "graph.store") -> dict:
     """
     Loads the repository graph and returns a dictionary containing all
     available information for a specified node.
@@ -17,16 +22,19 @@ def get_info_for_node(node_name: str, graph_path: str = "graph.pkl") -> dict:
     Args:
         node_name (str): The name of the node (e.g., a function or class name)
                          to retrieve information for.
-        graph_path (str): The path to the saved graph.pkl file.
+        graph_path (str): The path to the saved graph store.
 
     Returns:
         dict: A dictionary containing the node's attributes and connections,
               or None if the node is not found.
     """
+    served, node_info = query_or_none(graph_path, 'node_info', node_name=node_name)
+    if served:
+        return node_info
+
     try:
-        # Step 1: Load the graph from the .pkl file
-        with open(graph_path, 'rb') as f:
-            repo_graph = pickle.load(f)
+        # Step 1: Open the graph store; only this node's data is decoded
+        repo_graph = load_graph_view(graph_path)
     except FileNotFoundError:
         print(f"Error: The graph file '{graph_path}' was not found.")
         return None
@@ -39,6 +47,8 @@ def get_info_for_node(node_name: str, graph_path: str = "graph.pkl") -> dict:
     # The attributes are already stored as a dictionary in networkx.
     # We make a copy to avoid modifying the original graph data.
     node_attributes = repo_graph.nodes[node_name].copy()
+    # Nodes keep only byte spans into the source files; load the text on demand.
+    node_attributes['info'] = get_node_source(node_attributes)
 
     # Step 4: Find the node's direct connections
     # Successors are nodes that `node_name` has an edge pointing TO.
@@ -74,4 +84,4 @@ def get_info_for_node(node_name: str, graph_path: str = "graph.pkl") -> dict:
 #         print(json.dumps(node_info_dict, indent=2))
 #     else:
 #         print(f"Could not retrieve information for node '{target_node}'.")
-#         print("Please make sure the node exists in your 'graph.pkl' file.")
\ No newline at end of file
+#         print("Please make sure the node exists in your 'graph.store' file.")
\ No newline at end of file
@@ -5,6 +5,7 @@
 
 import os
 import sys
+import argparse
 import pickle
 import json
 import networkx as nx
@@ -13,6 +14,12 @@ from dotenv import load_dotenv
 from datetime import datetime
 from typing import Dict, Any
 from core.construct_graph import CodeGraph
+from core.build_manifest import BuildManifest
+from core.file_discovery import FileDiscovery
+from core.graph_store import save_graph, load_graph
+from core.source_store import stale_source_files
+from core import llm_provider
+from core.token_budget import DEFAULT_CONTEXT_TOKEN_BUDGET
 from agent.agent_graph import create_agent_graph
 from pathlib import Path
 
@@ -29,10 +36,62 @@ def clone_repository(repo_url: str, destination_folder: str):
         print(f"Error cloning the repository: {e}")
         sys.exit(1)
 
-def run_documentation_agent(repo_path: str):
+def build_graph_incrementally(repo_path: str, graph_file: str, workers: int = 1, discovery: FileDiscovery = None):
+    """
+    Brings the saved code graph up to date with the repository.
+
+    A manifest of per-file fingerprints is kept next to the graph file. When
+    both exist for this repository, only added, changed or deleted files are
+    re-parsed and patched into the saved graph; otherwise the graph is rebuilt
+    from scratch. The graph and manifest are saved again afterwards. Files that
+    `discovery` now excludes are treated as deleted.
+    """
+    manifest_file = f"{os.path.splitext(graph_file)[0]}.manifest.pkl"
+    previous_manifest = None
+    if os.path.exists(graph_file):
+        previous_manifest = BuildManifest.load(manifest_file, repo_path)
+        if previous_manifest is None:
+            print(f"No usable manifest for '{graph_file}'. Rebuilding the graph from scratch.")
+
+    if previous_manifest is None:
+        print(f"Constructing new graph for '{repo_path}'...")
+        code_graph_builder = CodeGraph(root=repo_path, workers=workers, discovery=discovery)
+        repo_graph = code_graph_builder.build_graph()
+    else:
+        print(f"Found existing graph file: '{graph_file}'. Checking for changed files...")
+        code_graph_builder = CodeGraph(root=repo_path, workers=workers, previous_manifest=previous_manifest,
+                                       discovery=discovery)
+        repo_graph = load_graph(graph_file)
+        changes = code_graph_builder.changes
+        # A touched but identical file is not a change, but its new mtime must still be recorded
+        if not (changes.added or changes.modified or changes.deleted
+                or stale_source_files(repo_graph.graph.get('source_files'))):
+            print("Graph is up to date.")
+            return repo_graph
+        repo_graph = code_graph_builder.update_graph(repo_graph)
+
+    save_graph(repo_graph, graph_file)
+    code_graph_builder.manifest.save(manifest_file)
+    print(f"Successfully saved graph to '{graph_file}' and manifest to '{manifest_file}'.")
+    return repo_graph
+
+def run_documentation_agent(repo_path: str, incremental: bool = False, workers: int = 1,
+                            discovery: FileDiscovery = None, concurrency: int = 1, llm_cache: bool = True,
+                            fused: bool = False, context_token_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET):
     """
     Sets up and runs the entire documentation and conceptual graph generation process.
     ENHANCED: Now tracks quality metrics and provides detailed output metadata.
+
+    With `incremental`, the saved graph is patched for changed files instead of
+    being reused as-is or rebuilt from scratch. `discovery` selects the files
+    that go into the graph (see core.file_discovery). With `concurrency` above
+    1, every node whose dependencies are documented is documented in the same
+    step, with up to that many LLM pipelines in flight. Unless `llm_cache`
+    is False, LLM answers for prompts seen in earlier runs are replayed from
+    the response cache (see core.llm_provider). With `fused`, each node is
+    documented with one structured LLM call instead of one per step (see
+    agent.agent_nodes._document_node). Each node's dependency context is
+    limited to `context_token_budget` tokens (see core.token_budget).
     """
     print("--- AI Documentation Agent Initializing (Enhanced Version) ---")
     
@@ -46,19 +105,34 @@ def run_documentation_agent(repo_path: str):
         print(f"Error: Repository path '{repo_path}' not found.")
         sys.exit(1)
 
+    llm_cache = llm_provider.get_cache() if llm_cache else llm_provider.configure_cache(None)
+    if llm_cache is not None:
+        print(f"LLM response cache: '{llm_cache.path}' ({llm_cache.stats()['entries']} entries)")
+
     # --- Step 2: Construct or Load the AST Code Graph ---
-    graph_file = "rag.pkl"
-    if os.path.exists(graph_file):
+    graph_file = "rag.store"
+    repo_graph = None
+    if incremental:
+        repo_graph = build_graph_incrementally(repo_path, graph_file, workers=workers, discovery=discovery)
+    elif os.path.exists(graph_file):
         print(f"Found existing graph file: '{graph_file}'. Loading it.")
-        with open(graph_file, 'rb') as f:
-            repo_graph = pickle.load(f)
+        repo_graph = load_graph(graph_file)
+        # Nodes only hold spans into the source files, which must still match the build
+        stale = stale_source_files(repo_graph.graph.get('source_files'))
+        if stale:
+            for file_path in stale:
+                print(f"  - Changed since the graph was built: {file_path}")
+            print(f"{len(stale)} source files changed since '{graph_file}' was built. Rebuilding the graph "
+                  f"(use --incremental to patch only what changed).")
+            repo_graph = None
     else:
-        print(f"No graph file found. Constructing new graph for '{repo_path}'...")
-        code_graph_builder = CodeGraph(root=repo_path)
+        print("No graph file found.")
+    if repo_graph is None:
+        print(f"Constructing new graph for '{repo_path}'...")
+        code_graph_builder = CodeGraph(root=repo_path, workers=workers, discovery=discovery)
         repo_graph = code_graph_builder.build_graph()
         
-        with open(graph_file, 'wb') as f:
-            pickle.dump(repo_graph, f)
+        save_graph(repo_graph, graph_file)
         print(f"Successfully constructed and saved graph to '{graph_file}'.")
 
     if not repo_graph.nodes():
@@ -72,7 +146,7 @@ def run_documentation_agent(repo_path: str):
     print(f"Outputs will be saved in: '{output_dir}'")
     
     # --- Step 4: Create and Run the LangGraph Agent ---
-    agent_app = create_agent_graph()
+    agent_app = create_agent_graph(concurrency=concurrency, fused=fused)
     
     # Initialize the state with all required keys including enhanced metadata
     initial_state = {
@@ -80,7 +154,8 @@ def run_documentation_agent(repo_path: str):
         "conceptual_graph": nx.MultiDiGraph(),
         "documentation_graph": nx.MultiDiGraph(),  # Add this line
         "final_output_data": {},
-        "context_metadata": {}
+        "context_metadata": {},
+        "context_token_budget": context_token_budget
     }
     
     total_nodes = len(repo_graph.nodes())
@@ -127,6 +202,10 @@ def run_documentation_agent(repo_path: str):
             'total_nodes': total_nodes,
             'documented_nodes': len(final_state.get('documented_nodes', {})),
             'quality_metrics': quality_metrics,
+            'llm_cache': llm_cache.stats() if llm_cache is not None else None,
+            'llm_dispatch': llm_provider.get_dispatcher().stats(),
+            'fused_mode': calculate_fused_metrics(final_output_data) if fused else None,
+            'prompt_tokens': calculate_prompt_metrics(final_output_data),
             'enhanced_features': [
                 'fuzzy_dependency_matching',
                 'context_validation',
@@ -246,6 +325,21 @@ def run_documentation_agent(repo_path: str):
         print(f"Nodes with High Confidence (>90%): {quality_metrics['high_confidence_nodes']}")
         print(f"Nodes with Medium Confidence (70-90%): {quality_metrics['medium_confidence_nodes']}")
         print(f"Nodes with Low Confidence (<70%): {quality_metrics['low_confidence_nodes']}")
+        if llm_cache is not None:
+            cache_stats = llm_cache.stats()
+            print(f"LLM Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                  f"({cache_stats['hit_rate']:.0%} hit rate), {cache_stats['evicted']} evicted")
+        dispatch_stats = generation_metadata['llm_dispatch']
+        print(f"LLM Requests: {dispatch_stats['calls']} completed, {dispatch_stats['retries']} retried "
+              f"({dispatch_stats['throttled']} throttled), {dispatch_stats['failed']} failed; "
+              f"{dispatch_stats['wait_seconds']:.1f}s queued for quota")
+        prompt_metrics = generation_metadata['prompt_tokens']
+        print(f"Prompt Tokens: {prompt_metrics['total']} total, largest {prompt_metrics['largest']} "
+              f"({prompt_metrics['largest_node']}); context budget {context_token_budget}")
+        if fused:
+            fused_metrics = generation_metadata['fused_mode']
+            print(f"Fused Calls: {fused_metrics['fused_nodes']} nodes in one call, "
+                  f"{fused_metrics['fallback_nodes']} fell back to separate calls")
         print(f"{'='*60}\n")
 
     else:
@@ -285,13 +379,63 @@ def calculate_quality_metrics(final_output_data: Dict[str, Any]) -> Dict[str, An
     }
 
 
+def calculate_fused_metrics(final_output_data: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Count the nodes documented by a single fused call and those that fell back.
+    """
+    modes = [data.get('context_metadata', {}).get('mode') for data in final_output_data.values()]
+    return {
+        'fused_nodes': modes.count('fused'),
+        'fallback_nodes': modes.count('fused_fallback'),
+    }
+
+
+def calculate_prompt_metrics(final_output_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sum the prompt tokens sent per node and find the node with the largest prompt.
+    """
+    total = 0
+    largest, largest_node = 0, None
+    for node_name, data in final_output_data.items():
+        for tokens in data.get('context_metadata', {}).get('prompt_tokens', {}).values():
+            total += tokens
+            if tokens > largest:
+                largest, largest_node = tokens, node_name
+    return {
+        'total': total,
+        'largest': largest,
+        'largest_node': largest_node,
+    }
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <path_to_repository>")
-        sys.exit(1)
-        
-    repository_path = sys.argv[1]
-    run_documentation_agent(repository_path)
+    arg_parser = argparse.ArgumentParser(description="Run the AI Documentation Agent on a repository.")
+    arg_parser.add_argument("repository_path", help="Path to the repository to document.")
+    arg_parser.add_argument("--incremental", action="store_true",
+                            help="Re-parse only changed files and patch the saved graph.")
+    arg_parser.add_argument("--workers", type=int, default=1,
+                            help="Parse processes to use when building the graph (1 = serial, 0 = all CPUs).")
+    arg_parser.add_argument("--exclude", action="append", default=[], metavar="PATTERN",
+                            help="gitignore-style pattern to leave out of the graph; a leading / anchors it to the root (repeatable).")
+    arg_parser.add_argument("--no-gitignore", action="store_true",
+                            help="Do not honor .gitignore files when collecting source files.")
+    arg_parser.add_argument("--max-file-size", type=int, default=None, metavar="BYTES",
+                            help="Skip Python files larger than this.")
+    arg_parser.add_argument("--concurrency", type=int, default=1,
+                            help="Nodes documented at the same time (1 = one node at a time).")
+    arg_parser.add_argument("--no-llm-cache", action="store_true",
+                            help="Always call the LLM instead of replaying answers cached by earlier runs.")
+    arg_parser.add_argument("--context-tokens", type=int, default=DEFAULT_CONTEXT_TOKEN_BUDGET, metavar="TOKENS",
+                            help="Token budget for each node's dependency context.")
+    arg_parser.add_argument("--fused", action="store_true",
+                            help="Document each node with one structured LLM call instead of one per step.")
+    args = arg_parser.parse_args()
+
+    discovery = FileDiscovery(exclude=args.exclude, use_gitignore=not args.no_gitignore,
+                              max_file_size=args.max_file_size, workers=args.workers)
+    run_documentation_agent(args.repository_path, incremental=args.incremental, workers=args.workers,
+                            discovery=discovery, concurrency=args.concurrency, llm_cache=not args.no_llm_cache,
+                            fused=args.fused, context_token_budget=args.context_tokens)
 
     # if len(sys.argv) < 2:
     #     print("Usage: python main.py <repository_url>")
@@ -37,7 +37,8 @@ load_dotenv()
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers.string import StrOutputParser
 from langchain_core.output_parsers.json import JsonOutputParser
-from langchain_openai import AzureChatOpenAI
+from core.llm_provider import get_llm, get_chain, get_cache
+from core.token_budget import count_tokens
 from langgraph.graph import StateGraph, END
 
 # --- Configure logging ---
@@ -73,7 +74,7 @@ os.makedirs(INCREMENTAL_SAVE_DIR, exist_ok=True)
 progress_bar = None
 
 # --- 1. Environment Setup & Model Initialization ---
-llm = AzureChatOpenAI(
+LLM_SETTINGS = dict(
     azure_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o"),
     azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
     api_key=os.getenv("AZURE_OPENAI_API_KEY"),
@@ -81,6 +82,28 @@ llm = AzureChatOpenAI(
     temperature=0.1, # Increased for more creative and better-structured writing
     # max_tokens=40000
 )
+# Shared with every chain below: one client and one keep-alive connection pool per process
+llm = get_llm(**LLM_SETTINGS)
+
+# Prompt lines at least this long that every selected section repeats are
+# stated once in a batched call; shorter ones (headings, separators) stay put
+SHARED_RULE_MIN_CHARS = 40
+
+# Section writers: "batched" writes every selected section of a component with
+# one structured call (sections missing from its answer fall back to their own
+# call); "per_section" makes one call per section.
+SECTION_WRITER_MODE = os.getenv("SECTION_WRITER_MODE", "batched").lower()
+
+# A batched answer re-emits every section in full, so sections are grouped into
+# calls whose estimated output (each section's existing content plus a margin
+# for what the component adds) stays under this cap, which is also the call's
+# max_tokens; a section that does not fit alone gets its own call
+BATCHED_WRITER_MAX_OUTPUT_TOKENS = int(os.getenv("BATCHED_WRITER_MAX_OUTPUT_TOKENS", "12000"))
+BATCHED_SECTION_MARGIN_TOKENS = int(os.getenv("BATCHED_SECTION_MARGIN_TOKENS", "1000"))
+
+def compiled_chain(template: str, parser):
+    """Chat prompt | llm | parser for `template`, compiled on first use and reused afterwards."""
+    return get_chain(template, parser, ChatPromptTemplate, **LLM_SETTINGS)
 
 # --- 2. Define the Hierarchical Documentation Structure & Agent Prompts ---
 
@@ -570,6 +593,45 @@ AGENT_PROMPTS = {
     """
 }
 
+# Used for sections without a specialist prompt
+DEFAULT_WRITER_PROMPT = """You are a technical writer. Your task is to update the \"{section_name}\" section.
+            
+            **CRITICAL INFORMATION POLICY**:
+            - ONLY include information that is explicitly present in the provided documents
+            - DO NOT create, infer, or assume any information that is not directly stated
+            - If you are uncertain about any detail, it is better to OMIT it rather than include potentially incorrect information
+            - Base your documentation strictly on the factual content provided in the component documentation
+            
+            Analyze `{component_name}` and integrate any relevant information into the existing content.
+            Use rich markdown like code blocks, tables, and lists to format the information clearly.
+            EXISTING CONTENT: --- {existing_content} ---
+            NEW INFORMATION: --- {component_doc} ---
+            Respond with the complete, updated markdown for the \"{section_name}\" section. Do NOT wrap the entire output in triple backticks or code blocks. Only use code blocks for actual code, not for the whole section."""
+
+# One call for all selected sections: the component and the rules every
+# section prompt repeats are sent once, then each section's own instructions
+# (with its existing content) follow
+BATCHED_WRITER_PROMPT = """
+    You are an expert technical writer maintaining several sections of one technical document at once.
+    Integrate the component `{component_name}` into EACH of the sections below, following that section's own instructions.
+
+    **REFERENCE CONTEXT**: {component_context}
+
+    COMPONENT DOCUMENTATION (shared by all sections):
+    ---
+    {component_doc}
+    ---
+
+    RULES FOR EVERY SECTION:
+    {shared_rules}
+
+    {section_tasks}
+
+    Respond with a single JSON object with one key, "sections", mapping each of these section names, written exactly as here, to the complete, updated markdown for that section: {section_names}
+    Where a section's instructions say "Respond with the complete, updated markdown", that markdown is the section's value in the JSON object.
+    Example: {{"sections": {{"Project Introduction": "**Project** is ..."}}}}
+"""
+
 
 # --- 3. Define the Graph's State ---
 class DocumentationState(TypedDict):
@@ -590,6 +652,8 @@ class DocumentationState(TypedDict):
     architectural_relationships: List[Dict]  # Store relationships between components
     diagram_mermaid_code: str  # Current mermaid diagram code
     diagram_description: str  # Natural language description of architecture
+    # Section writer calls and tokens per component
+    token_usage: Dict[str, Dict]
 
 
 # --- Helper Functions for Incremental Saving ---
@@ -624,7 +688,8 @@ def save_incremental_progress(state: DocumentationState, operation: str):
         "architectural_components_count": len(state.get("architectural_components", {})),
         "architectural_relationships_count": len(state.get("architectural_relationships", [])),
         "diagram_mermaid_lines": len(state.get("diagram_mermaid_code", "").split('\n')),
-        "diagram_description_length": len(state.get("diagram_description", ""))
+        "diagram_description_length": len(state.get("diagram_description", "")),
+        "section_token_usage": state.get("token_usage", {}).get(current_component)
     }
     
     try:
@@ -816,7 +881,7 @@ def synthesize_architecture_model(analyzed_data: Dict[str, Any]) -> Dict[str, An
 
     # --- Step 1: Identify Components ---
     logger.info(" Step 1: Identifying high-level components...")
-    component_prompt = ChatPromptTemplate.from_template(
+    component_template = (
         """
         You are an expert System Architect. Your first task is to identify the primary, high-level components from the provided source code.
         Analyze the file contents and list all logical components. A component could be a user-facing API, a backend service, a data processing worker, or a database.
@@ -854,7 +919,7 @@ def synthesize_architecture_model(analyzed_data: Dict[str, Any]) -> Dict[str, An
         """
     )
     
-    component_chain = component_prompt | llm | JsonOutputParser()
+    component_chain = compiled_chain(component_template, JsonOutputParser)
     try:
         component_result = component_chain.invoke({"context": condensed_context})
         components = component_result.get("components", [])
@@ -868,7 +933,7 @@ def synthesize_architecture_model(analyzed_data: Dict[str, Any]) -> Dict[str, An
 
     # --- Step 2: Map Relationships ---
     logger.info(" Step 2: Mapping relationships between components...")
-    relationship_prompt = ChatPromptTemplate.from_template(
+    relationship_template = (
         """
         You are an expert System Architect. You have been given a list of identified system components and the full source code context.
         Your second task is to determine the relationships and data flow between these components.
@@ -901,7 +966,7 @@ def synthesize_architecture_model(analyzed_data: Dict[str, Any]) -> Dict[str, An
         """
     )
 
-    relationship_chain = relationship_prompt | llm | JsonOutputParser()
+    relationship_chain = compiled_chain(relationship_template, JsonOutputParser)
     try:
         relationship_result = relationship_chain.invoke({
             "context": condensed_context,
@@ -1160,7 +1225,7 @@ def scrapper_node(state: DocumentationState) -> dict:
     logger.info(f" Borderline case - consulting enhanced LLM for '{component_name}'")
     print(f"    - Borderline case: consulting LLM for final decision")
     
-    enhanced_prompt = ChatPromptTemplate.from_template(
+    enhanced_template = (
         """You are an expert code analyst tasked with determining if a component's documentation is substantial enough to include in technical documentation.
 
 Component Name: `{component_name}`
@@ -1195,7 +1260,7 @@ Respond with exactly one word: "Proceed" if the content is substantial and valua
 Decision:"""
     )
     
-    chain = enhanced_prompt | llm | StrOutputParser()
+    chain = compiled_chain(enhanced_template, StrOutputParser)
     
     try:
         logger.info(f" LLM call initiated | Component: '{component_name}' | Type: enhanced_scrapper")
@@ -1264,7 +1329,7 @@ def selector_node(state: DocumentationState) -> DocumentationState:
     logger.info(f" Consulting LLM for section selection for '{component_name}'")
     print(f"    - Consulting LLM for section selection")
     
-    prompt = ChatPromptTemplate.from_template(
+    selector_template = (
         """You are a document routing expert. Based on the documentation for component `{component_name}` and its connected components, select ALL sections where this information would be relevant.
         
         Component Documentation: --- {component_doc} ---
@@ -1281,7 +1346,7 @@ def selector_node(state: DocumentationState) -> DocumentationState:
     )
     
     section_list_str = "\n".join([f"- {s}" for s in ALL_SECTIONS])
-    chain = prompt | llm | JsonOutputParser()
+    chain = compiled_chain(selector_template, JsonOutputParser)
     
     try:
         response = chain.invoke({
@@ -1358,7 +1423,7 @@ async def architectural_diagram_node(state: DocumentationState) -> Documentation
     print(f"    - Current state: {existing_components} components, {existing_relationships} relationships")
     
     # Create architectural analysis prompt
-    architectural_prompt = ChatPromptTemplate.from_template(
+    architectural_template = (
         """You are a software architect analyzing components for architectural diagram generation.
 
 Component Name: `{component_name}`
@@ -1403,7 +1468,7 @@ Respond with a JSON object containing:
 Focus on architectural significance. Only include substantial components and meaningful relationships."""
     )
     
-    chain = architectural_prompt | llm | JsonOutputParser()
+    chain = compiled_chain(architectural_template, JsonOutputParser)
     
     try:
         logger.info(f" LLM call initiated | Component: '{component_name}' | Type: architectural_analyzer")
@@ -1491,7 +1556,7 @@ def system_synthesis_node(state: DocumentationState) -> DocumentationState:
     print("--- System Synthesizer: Creating high-level architectural model ---")
     all_components_summary = json.dumps(state.get('architectural_components', []), indent=2)
     all_relationships_summary = json.dumps(state.get('architectural_relationships', []), indent=2)
-    synthesis_prompt = ChatPromptTemplate.from_template(
+    synthesis_template = (
     """
     You are an expert System Architect. You have been provided with a list of all the code components (files) and their direct relationships from a codebase.
 
@@ -1536,7 +1601,7 @@ def system_synthesis_node(state: DocumentationState) -> DocumentationState:
     }}
     """
 )
-    chain = synthesis_prompt | llm | JsonOutputParser()
+    chain = compiled_chain(synthesis_template, JsonOutputParser)
     try:
         architectural_model = chain.invoke({
             "components": all_components_summary,
@@ -1690,8 +1755,7 @@ async def process_documentation_section(state: DocumentationState, section_name:
     
     logger.info(f" Section context | Component: '{component_name}' | Section: '{section_name}' | Existing content: {existing_length} chars")
     
-    prompt = ChatPromptTemplate.from_template(writer_prompt_template)
-    chain = prompt | llm | StrOutputParser()
+    chain = compiled_chain(writer_prompt_template, StrOutputParser)
     
     try:
         logger.info(f" LLM call initiated | Component: '{component_name}' | Section: '{section_name}' | Type: documentation_writer")
@@ -1740,12 +1804,125 @@ async def process_architectural_analysis(state: DocumentationState) -> Documenta
 #     """Synchronous wrapper for parallel processing."""
 #     return asyncio.run(parallel_processing_node(state))
 
+def writer_prompt_template(section_name: str) -> str:
+    """The writer prompt for a section: its specialist prompt, or the generic one."""
+    return AGENT_PROMPTS.get(section_name, DEFAULT_WRITER_PROMPT)
+
+def writer_inputs(state: DocumentationState, section_name: str) -> Dict[str, Any]:
+    """Prompt variables for writing `section_name` for the current component."""
+    existing_content = state["document_content"].get(section_name, "")
+    return {
+        "section_name": section_name,
+        "existing_content": existing_content or "This section is empty. Please start it.",
+        "component_name": state['current_component_name'],
+        "component_doc": state["current_component_doc"],
+        "component_context": state["current_component_context"]
+    }
+
+def record_tokens(usage: Dict[str, Any], prompt: str, completion: str):
+    """Adds one writer call to a component's token usage."""
+    usage["calls"] += 1
+    usage["prompt_tokens"] += count_tokens(prompt)
+    usage["completion_tokens"] += count_tokens(completion)
+
+def plan_batches(state: DocumentationState, section_names: List[str]) -> tuple[List[List[str]], List[str]]:
+    """
+    Groups sections into batched calls whose estimated output fits the output cap.
+
+    Returns:
+        The batches of two or more sections, in order, and the sections left
+        for their own calls: those over the cap alone and any that fit no batch.
+    """
+    batches, totals, unbatched = [], [], []
+    for name in section_names:
+        estimate = count_tokens(state["document_content"].get(name, "")) + BATCHED_SECTION_MARGIN_TOKENS
+        if estimate > BATCHED_WRITER_MAX_OUTPUT_TOKENS:
+            unbatched.append(name)
+            continue
+        # First batch with room for it
+        index = next((i for i, total in enumerate(totals)
+                      if total + estimate <= BATCHED_WRITER_MAX_OUTPUT_TOKENS), len(batches))
+        if index == len(batches):
+            batches.append([])
+            totals.append(0)
+        batches[index].append(name)
+        totals[index] += estimate
+    # A batch of one is just a per-section call with a longer prompt
+    unbatched += [batch[0] for batch in batches if len(batch) == 1]
+    return [batch for batch in batches if len(batch) > 1], [name for name in section_names if name in unbatched]
+
+async def batched_writer(state: DocumentationState, section_names: List[str], usage: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Writes all `section_names` for the current component with one structured LLM call.
+
+    Returns the updated markdown keyed by section name, for the sections the
+    answer covered; empty if the call failed or its answer was not valid JSON.
+    """
+    component_name = state['current_component_name']
+    # The shared component documentation and context are stated once, above the section tasks
+    shared = {"component_doc": "(see COMPONENT DOCUMENTATION above)",
+              "component_context": "(see REFERENCE CONTEXT above)"}
+    # Shared rules are found in the raw templates, before formatting, so text from a
+    # section's existing content is never mistaken for a rule and moved out of it.
+    # Lines with placeholders or braces are left in place.
+    templates = {name: writer_prompt_template(name) for name in section_names}
+    line_sets = [{line.strip() for line in template.splitlines()} for template in templates.values()]
+    shared_rules = [line.strip() for line in templates[section_names[0]].splitlines()
+                    if len(line.strip()) >= SHARED_RULE_MIN_CHARS and "{" not in line and "}" not in line
+                    and all(line.strip() in lines for lines in line_sets)]
+    section_tasks = "\n\n".join(
+        f"### SECTION: {name}\n" + "\n".join(line for line in template.splitlines() if line.strip() not in shared_rules)
+        .format(**{**writer_inputs(state, name), **shared}).strip()
+        for name, template in templates.items()
+    )
+    inputs = {
+        "component_name": component_name,
+        "component_doc": state["current_component_doc"] or "",
+        "component_context": state["current_component_context"] or "",
+        "shared_rules": "\n".join(shared_rules) or "(none)",
+        "section_tasks": section_tasks,
+        "section_names": json.dumps(section_names, ensure_ascii=False)
+    }
+    prompt = BATCHED_WRITER_PROMPT.format(**inputs)
+    chain = get_chain(BATCHED_WRITER_PROMPT, JsonOutputParser, ChatPromptTemplate,
+                      **{**LLM_SETTINGS, "max_tokens": BATCHED_WRITER_MAX_OUTPUT_TOKENS})
+
+    try:
+        logger.info(f" Calling LLM for {len(section_names)} sections at once in component '{component_name}'")
+        response = await chain.ainvoke(inputs)
+    except Exception as e:
+        logger.error(f" Batched writer failed for component '{component_name}': {e}")
+        print(f"    - Batched writer failed: {e}")
+        record_tokens(usage, prompt, "")
+        return {}
+    record_tokens(usage, prompt, json.dumps(response, ensure_ascii=False))
+
+    sections = response.get("sections") if isinstance(response, dict) else None
+    written = {}
+    for name in section_names:
+        content = sections.get(name) if isinstance(sections, dict) else None
+        if isinstance(content, str) and content.strip():
+            written[name] = content
+            save_section_content(component_name, name, content)
+    logger.info(f" Batched writer returned {len(written)}/{len(section_names)} sections for component '{component_name}'")
+    print(f"    - Batched writer returned {len(written)}/{len(section_names)} sections")
+    return written
+
 # Updated parallel_writer_node with integrated progress tracking
 async def parallel_writer_node(state: DocumentationState) -> DocumentationState:
-    """Invokes the specialist writer agents in parallel for the selected sections using async/await."""
+    """
+    Writes the selected sections for the current component, alongside the
+    architectural analysis. In batched mode the sections are written in as few
+    calls as fit the batched output cap (see plan_batches); sections that fit no
+    batch, or are missing from a batch's answer, get their own call, as in
+    per-section mode.
+    """
     component_name = state['current_component_name']
     total_sections = len(state["target_sections"])
-    logger.info(f" Parallel Writers: Starting for '{component_name}' with {total_sections} sections")
+    batched = SECTION_WRITER_MODE == "batched" and total_sections > 1
+    usage = {"mode": "batched" if batched else "per_section", "calls": 0, "prompt_tokens": 0,
+             "completion_tokens": 0, "fallback_sections": []}
+    logger.info(f" Parallel Writers: Starting for '{component_name}' with {total_sections} sections ({usage['mode']})")
     print(f"--- Parallel Writers: Starting for '{component_name}' ---")
     
     # Global progress tracking
@@ -1759,35 +1936,14 @@ async def parallel_writer_node(state: DocumentationState) -> DocumentationState:
         logger.info(f" Processing section: '{section_name}' for component '{component_name}' ({completed_sections}/{total_sections})")
         print(f"    - Invoking writer for section: '{section_name}' ({completed_sections}/{total_sections})")
         
-        writer_prompt_template = AGENT_PROMPTS.get(section_name, 
-            """You are a technical writer. Your task is to update the \"{section_name}\" section.
-            
-            **CRITICAL INFORMATION POLICY**:
-            - ONLY include information that is explicitly present in the provided documents
-            - DO NOT create, infer, or assume any information that is not directly stated
-            - If you are uncertain about any detail, it is better to OMIT it rather than include potentially incorrect information
-            - Base your documentation strictly on the factual content provided in the component documentation
-            
-            Analyze `{component_name}` and integrate any relevant information into the existing content.
-            Use rich markdown like code blocks, tables, and lists to format the information clearly.
-            EXISTING CONTENT: --- {existing_content} ---
-            NEW INFORMATION: --- {component_doc} ---
-            Respond with the complete, updated markdown for the \"{section_name}\" section. Do NOT wrap the entire output in triple backticks or code blocks. Only use code blocks for actual code, not for the whole section."""
-        )
-        
-        existing_content = state["document_content"].get(section_name, "")
-        prompt = ChatPromptTemplate.from_template(writer_prompt_template)
-        chain = prompt | llm | StrOutputParser()
+        writer_prompt = writer_prompt_template(section_name)
+        inputs = writer_inputs(state, section_name)
+        chain = compiled_chain(writer_prompt, StrOutputParser)
         
         try:
             logger.info(f" Calling LLM for section '{section_name}' in component '{component_name}'")
-            updated_section_content = await chain.ainvoke({
-                "section_name": section_name,
-                "existing_content": existing_content or "This section is empty. Please start it.",
-                "component_name": component_name,
-                "component_doc": state["current_component_doc"],
-                "component_context": state["current_component_context"]
-            })
+            updated_section_content = await chain.ainvoke(inputs)
+            record_tokens(usage, writer_prompt.format(**inputs), updated_section_content)
             
             # Save section content after LLM call
             save_section_content(component_name, section_name, updated_section_content)
@@ -1797,14 +1953,37 @@ async def parallel_writer_node(state: DocumentationState) -> DocumentationState:
             return section_name, updated_section_content
             
         except Exception as e:
+            record_tokens(usage, writer_prompt.format(**inputs), "")
             logger.error(f" Error processing section '{section_name}' for component '{component_name}': {e}")
             print(f"    - Error in writer for '{section_name}': {e}")
             return section_name, f"Error generating content for {section_name}: {str(e)}"
-    
-    # Use asyncio.gather for concurrent execution of all sections
+
+    async def write_sections() -> List[Any]:
+        """(section_name, content) pairs, or exceptions, for every target section."""
+        remaining = list(state["target_sections"])
+        written = []
+        if batched:
+            # What per-section mode would have sent, for comparison
+            usage["per_section_prompt_tokens"] = sum(
+                count_tokens(writer_prompt_template(name).format(**writer_inputs(state, name))) for name in remaining)
+            batches, usage["skipped_batching"] = plan_batches(state, remaining)
+            usage["batches"] = batches
+            if usage["skipped_batching"]:
+                logger.info(f" Sections over the batched output cap, written on their own, for '{component_name}': {usage['skipped_batching']}")
+            answers = await asyncio.gather(*(batched_writer(state, batch, usage) for batch in batches))
+            written = [item for answer in answers for item in answer.items()]
+            fallback = [name for batch in batches for name in batch if not any(name in answer for answer in answers)]
+            remaining = [name for name in remaining if name in fallback or name in usage["skipped_batching"]]
+            if fallback:
+                usage["fallback_sections"] = fallback
+                logger.warning(f" Falling back to per-section writers for '{component_name}': {fallback}")
+                print(f"    - Falling back to per-section writers for {len(fallback)} sections")
+        results = await asyncio.gather(*(process_section(name) for name in remaining), return_exceptions=True)
+        return written + list(results)
+    
+    # Use asyncio.gather to run the writers and the architectural analysis concurrently
     try:
-        # Create tasks for all sections
-        tasks = [process_section(section_name) for section_name in state["target_sections"]]
+        tasks = [write_sections()]
 
          # --- FIX: ADD THIS LINE ---
         # Add the architectural analysis task to run in parallel
@@ -1812,14 +1991,15 @@ async def parallel_writer_node(state: DocumentationState) -> DocumentationState:
         # -------------------------
         
         # Execute all tasks concurrently
-        logger.info(f" Executing {len(tasks)} LLM calls concurrently for '{component_name}'")
+        logger.info(f" Executing section writers and architectural analysis concurrently for '{component_name}'")
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # Process results and handle any exceptions
         successful_sections = 0
         failed_sections = 0
         
-        for result in results[:-1]:
+        section_results = results[0] if not isinstance(results[0], Exception) else [results[0]]
+        for result in section_results:
             if isinstance(result, Exception):
                 logger.error(f" Writer exception for '{component_name}': {result}")
                 print(f"    - Writer generated an exception: {result}")
@@ -1841,6 +2021,16 @@ async def parallel_writer_node(state: DocumentationState) -> DocumentationState:
         logger.error(f" Parallel writers failed for '{component_name}': {exc}")
         print(f"    - Parallel writers failed with exception: {exc}")
     
+    state.setdefault("token_usage", {})[component_name] = usage
+    comparison = (f" | Per-section prompt tokens would be: {usage['per_section_prompt_tokens']}"
+                  if "per_section_prompt_tokens" in usage else "")
+    logger.info(f" Token usage | Component: '{component_name}' | Mode: {usage['mode']} | Calls: {usage['calls']} | "
+                f"Prompt tokens: {usage['prompt_tokens']} | Completion tokens: {usage['completion_tokens']} | "
+                f"Fallback sections: {len(usage['fallback_sections'])} | "
+                f"Unbatched sections: {len(usage.get('skipped_batching', []))}{comparison}")
+    print(f"    - Tokens: {usage['prompt_tokens']} prompt + {usage['completion_tokens']} completion "
+          f"in {usage['calls']} calls ({usage['mode']})")
+
     # Save incremental progress
     save_incremental_progress(state, "parallel_writers_completed")
     
@@ -2334,7 +2524,8 @@ if __name__ == "__main__":
                 architectural_components={},
                 architectural_relationships=[],
                 diagram_mermaid_code="graph TD\n",
-                diagram_description="## System Architecture Overview\n\nThis diagram represents the architectural components and their relationships:\n\n"
+                diagram_description="## System Architecture Overview\n\nThis diagram represents the architectural components and their relationships:\n\n",
+                token_usage={}
             )
 
             config = {"recursion_limit": total_components * 4 + 15}
@@ -2396,6 +2587,18 @@ if __name__ == "__main__":
                 logger.info(f"   - Words: {word_count}")
                 logger.info(f"   - Lines: {line_count}")
                 logger.info(f" Incremental saves stored in: {INCREMENTAL_SAVE_DIR}")
+                llm_cache = get_cache()
+                if llm_cache is not None:
+                    cache_stats = llm_cache.stats()
+                    logger.info(f" LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                                f"({cache_stats['hit_rate']:.0%} hit rate) in {llm_cache.path}")
+                token_usage = final_state.get("token_usage", {}).values()
+                if token_usage:
+                    logger.info(f" Section writers ({SECTION_WRITER_MODE}): {sum(u['calls'] for u in token_usage)} calls, "
+                                f"{sum(u['prompt_tokens'] for u in token_usage)} prompt + "
+                                f"{sum(u['completion_tokens'] for u in token_usage)} completion tokens over "
+                                f"{len(token_usage)} components, {sum(len(u['fallback_sections']) for u in token_usage)} "
+                                f"sections fell back to their own call")
                 
                 # Log comprehensive processing summary
                 log_processing_summary()
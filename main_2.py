@@ -32,7 +32,7 @@ load_dotenv()
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers.string import StrOutputParser
 from langchain_core.output_parsers.json import JsonOutputParser
-from langchain_openai import AzureChatOpenAI
+from core.llm_provider import get_llm, get_chain
 from langgraph.graph import StateGraph, END
 
 # --- Configure logging ---
@@ -68,7 +68,7 @@ os.makedirs(INCREMENTAL_SAVE_DIR, exist_ok=True)
 progress_bar = None
 
 # --- 1. Environment Setup & Model Initialization ---
-llm = AzureChatOpenAI(
+LLM_SETTINGS = dict(
     azure_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o"),
     azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
     api_key=os.getenv("AZURE_OPENAI_API_KEY"),
@@ -76,6 +76,12 @@ llm = AzureChatOpenAI(
     temperature=0.1, # Increased for more creative and better-structured writing
     # max_tokens=40000
 )
+# Shared with every chain below: one client and one keep-alive connection pool per process
+llm = get_llm(**LLM_SETTINGS)
+
+def compiled_chain(template: str, parser):
+    """Chat prompt | llm | parser for `template`, compiled on first use and reused afterwards."""
+    return get_chain(template, parser, ChatPromptTemplate, **LLM_SETTINGS)
 
 # --- 2. Define the Hierarchical Documentation Structure & Agent Prompts ---
 
@@ -856,7 +862,7 @@ def scrapper_node(state: DocumentationState) -> dict:
     logger.info(f"🤖 Borderline case - consulting enhanced LLM for '{component_name}'")
     print(f"    - Borderline case: consulting LLM for final decision")
     
-    enhanced_prompt = ChatPromptTemplate.from_template(
+    enhanced_template = (
         """You are an expert code analyst tasked with determining if a component's documentation is substantial enough to include in technical documentation.
 
 Component Name: `{component_name}`
@@ -891,7 +897,7 @@ Respond with exactly one word: "Proceed" if the content is substantial and valua
 Decision:"""
     )
     
-    chain = enhanced_prompt | llm | StrOutputParser()
+    chain = compiled_chain(enhanced_template, StrOutputParser)
     
     try:
         logger.info(f"🤖 LLM call initiated | Component: '{component_name}' | Type: enhanced_scrapper")
@@ -960,7 +966,7 @@ def selector_node(state: DocumentationState) -> DocumentationState:
     logger.info(f"🤖 Consulting LLM for section selection for '{component_name}'")
     print(f"    - Consulting LLM for section selection")
     
-    prompt = ChatPromptTemplate.from_template(
+    selector_template = (
         """You are a document routing expert. Based on the documentation for component `{component_name}` and its connected components, select ALL sections where this information would be relevant.
         
         Component Documentation: --- {component_doc} ---
@@ -977,7 +983,7 @@ def selector_node(state: DocumentationState) -> DocumentationState:
     )
     
     section_list_str = "\n".join([f"- {s}" for s in ALL_SECTIONS])
-    chain = prompt | llm | JsonOutputParser()
+    chain = compiled_chain(selector_template, JsonOutputParser)
     
     try:
         response = chain.invoke({
@@ -1054,7 +1060,7 @@ async def architectural_diagram_node(state: DocumentationState) -> Documentation
     print(f"    - Current state: {existing_components} components, {existing_relationships} relationships")
     
     # Create architectural analysis prompt
-    architectural_prompt = ChatPromptTemplate.from_template(
+    architectural_template = (
         """You are a software architect analyzing components for architectural diagram generation.
 
 Component Name: `{component_name}`
@@ -1099,7 +1105,7 @@ Respond with a JSON object containing:
 Focus on architectural significance. Only include substantial components and meaningful relationships."""
     )
     
-    chain = architectural_prompt | llm | JsonOutputParser()
+    chain = compiled_chain(architectural_template, JsonOutputParser)
     
     try:
         logger.info(f"🤖 LLM call initiated | Component: '{component_name}' | Type: architectural_analyzer")
@@ -1319,8 +1325,7 @@ async def process_documentation_section(state: DocumentationState, section_name:
     
     logger.info(f"📄 Section context | Component: '{component_name}' | Section: '{section_name}' | Existing content: {existing_length} chars")
     
-    prompt = ChatPromptTemplate.from_template(writer_prompt_template)
-    chain = prompt | llm | StrOutputParser()
+    chain = compiled_chain(writer_prompt_template, StrOutputParser)
     
     try:
         logger.info(f"🤖 LLM call initiated | Component: '{component_name}' | Section: '{section_name}' | Type: documentation_writer")
@@ -1405,8 +1410,7 @@ async def parallel_writer_node(state: DocumentationState) -> DocumentationState:
         )
         
         existing_content = state["document_content"].get(section_name, "")
-        prompt = ChatPromptTemplate.from_template(writer_prompt_template)
-        chain = prompt | llm | StrOutputParser()
+        chain = compiled_chain(writer_prompt_template, StrOutputParser)
         
         try:
             logger.info(f"🤖 Calling LLM for section '{section_name}' in component '{component_name}'")
@@ -301,6 +301,58 @@ You are a senior software architect. Your task is to deeply analyze the provided
 Only output the JSON object. Do not include any other text or markdown formatting.
 """
 
+# Fused mode: dependencies, documentation and conceptual data in one response
+FUSED_NODE_PROMPT_TEMPLATE = """
+You are an expert Python code analyzer, technical writer and software architect. Analyze one code node and return its dependencies, its documentation and its conceptual graph data in a single JSON object.
+
+**Node:** `{node_name}`
+- **Category:** {node_category}
+- **File Path:** {node_fname}
+- **Lines:** {node_line_start} to {node_line_end}
+- **Existing Docstring:** {node_docstring}
+
+**Source Code:**
+```python
+{source_code}
+```
+
+**Context from Dependencies (what `{node_name}` uses):**
+{dependencies_context}
+
+---
+**Instructions:**
+
+1. **dependencies:** List every unique function, method or class that `{node_name}` calls or instantiates, as written in the code (e.g. "os.path.join", "self.helper_method"). Do NOT include `{node_name}` itself.
+2. **documentation:** Write Markdown documentation for `{node_name}` with these sections:
+    1.  **Function/Class Name and Signature:** The name, its arguments, and their types.
+    2.  **Description:** A high-level summary of what the function/class does.
+    3.  **Parameters/Attributes:** Each parameter or key attribute, its type and description, or "None".
+    4.  **Expected Input:** What data or objects are expected, including constraints or special cases.
+    5.  **Returns:** The return value, its type and meaning, or "None".
+    6.  **Detailed Logic:** The main steps, and which functions or objects are called and how they interact.
+3. **semantic_metadata:** A short descriptive "label", a conceptual "type" ("Data Model", "Business Logic", "Utility", "Configuration", "API Endpoint", or another concise category) and a one-sentence "summary" of the node's primary responsibility.
+4. **semantic_edges:** For each meaningful relationship supported by the code or context, the "target" node name and a "label" such as "USES", "MODIFIES", "CONFIGURES", "INHERITS_FROM" or "CREATES".
+
+**Output JSON Structure:**
+{{
+  "dependencies": ["os.path.join", "MyHelperClass"],
+  "documentation": "### name(args) -> type\n\n**Description:** ...",
+  "semantic_metadata": {{
+    "label": "User Data Processor",
+    "type": "Business Logic",
+    "summary": "Processes raw user input and prepares it for database insertion."
+  }},
+  "semantic_edges": [
+    {{
+      "target": "DatabaseConfig",
+      "label": "USES"
+    }}
+  ]
+}}
+
+Only output the JSON object. Escape newlines inside the documentation string. Do not include any other text or markdown formatting around the JSON.
+"""
+
 # ENHANCED: Conceptual graph prompt with confidence awareness
 ENHANCED_CONCEPTUAL_GRAPH_PROMPT_TEMPLATE = """
 You are a senior software architect analyzing code to build a high-level conceptual graph.
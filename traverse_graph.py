@@ -7,24 +7,27 @@
 #
 # This is the foundation for any advanced analysis you want to perform,
 # such as invoking an LLM for each node in a logical sequence.
+#
+# If a graph query server (core/graph_server.py) is running for the graph,
+# all lookups go to it and the graph is never loaded in this process.
 
-import pickle
 import networkx as nx
 import sys
+from core.graph_store import load_graph_view
+from core.graph_server import query_or_none
 
 # We import RepoSearcher from your file to use its helpful traversal methods.
-from RepoGraph.graph_searcher import RepoSearcher
+from core.graph_searcher import RepoSearcher
 from find_node_connections import find_direct_connections
 from get_node_info import get_info_for_node
 
-def load_graph(graph_path="graph.pkl"):
+def load_graph(graph_path="graph.store"):
         # --- Step 1: Load the Graph ---
     # First, we load the graph object that you created with construct_graph.py.
     # This object contains all the nodes and their connections.
     print(f"Loading graph from '{graph_path}'...")
     try:
-        with open(graph_path, 'rb') as f:
-            repo_graph = pickle.load(f)
+        repo_graph = load_graph_view(graph_path)
     except FileNotFoundError:
         print(f"ERROR: The file '{graph_path}' was not found.")
         print("Please make sure you have run construct_graph.py to create it first.")
@@ -35,15 +38,20 @@ def load_graph(graph_path="graph.pkl"):
     print(f"Graph loaded successfully with {len(repo_graph.nodes())} nodes.")
     return repo_graph
 
-def traverse_repository_graph_simple(graph_path="graph.pkl"):
+def traverse_repository_graph_simple(graph_path="graph.store"):
     """
     Loads and demonstrates various ways to traverse a repository graph.
 
     Args:
-        graph_path (str): The path to the graph.pkl file.
+        graph_path (str): The path to the graph store.
     """
 
-    repo_graph = load_graph(graph_path)
+    served, node_names = query_or_none(graph_path, 'nodes')
+    if not served:
+        repo_graph = load_graph(graph_path)
+        if repo_graph is None:
+            return
+        node_names = list(repo_graph.nodes())
 
     # --- Example 1: Simple Iteration Over ALL Nodes ---
     # This is the most basic way to "iterate through each and every node".
@@ -53,19 +61,22 @@ def traverse_repository_graph_simple(graph_path="graph.pkl"):
     print("\n" + "="*60)
     print("Example 1: Simple Iteration Over All Nodes")
     print("="*60)
-    for node_name in repo_graph.nodes():
+    for node_name in node_names:
         # For each node, you can access its attributes stored during creation.
-        node_attributes = repo_graph.nodes[node_name]
+        if served:
+            _, node_attributes = query_or_none(graph_path, 'node_attributes', node_name=node_name)
+        else:
+            node_attributes = repo_graph.nodes[node_name]
         print(f"- Visiting node: '{node_name}' (Type: {node_attributes.get('category', 'N/A')})")
-        incomming , outgoing = find_direct_connections(node_name)
+        incomming , outgoing = find_direct_connections(node_name, graph_path)
         for i in incomming:
-            print(f"Node Attributes for Node {i}",get_info_for_node(node_name= i))
+            print(f"Node Attributes for Node {i}",get_info_for_node(node_name= i, graph_path=graph_path))
         for o in outgoing:
-            print(f"Node Attributes for Node {o}",get_info_for_node(node_name= o))
+            print(f"Node Attributes for Node {o}",get_info_for_node(node_name= o, graph_path=graph_path))
         print("\nTraversal complete.")
         # Here you could invoke an LLM for each node individually.
         # llm.analyze(node_name, node_attributes)
-def traverse_repository_graph_dfs(graph_path="graph.pkl"):
+def traverse_repository_graph_dfs(graph_path="graph.store"):
     # --- Example 2: Traversal Following Connected Edges (DFS) ---
     # This method truly "walks" the graph by following the edges from a
     # starting point. We'll use a Depth-First Search (DFS) as an example.
@@ -73,24 +84,31 @@ def traverse_repository_graph_dfs(graph_path="graph.pkl"):
     # print("\n" + "="*60)
     # print("Example 2: Traversal from a Starting Node (Depth-First Search)")
     # print("="*60)
-    repo_graph = load_graph(graph_path)
+    served, node_names = query_or_none(graph_path, 'nodes')
+    if not served:
+        repo_graph = load_graph(graph_path)
+        if repo_graph is None:
+            return
+        node_names = list(repo_graph.nodes())
     # A traversal needs a starting point. Let's pick one from the graph.
     # If the graph is empty, we can't do this.
-    if not repo_graph.nodes():
+    if not node_names:
         print("Graph has no nodes. Cannot perform traversal.")
         return
 
     # Let's dynamically pick the first node in the graph as our start.
     # In a real scenario, you might choose a specific function like 'main'.
-    start_node = list(repo_graph.nodes())[0]
+    start_node = node_names[0]
     print(f"Starting traversal from node: '{start_node}'\n")
 
-    # We use the RepoSearcher class you created, which has a handy `dfs` method.
-    searcher = RepoSearcher(graph=repo_graph)
-    
     # We'll limit the depth to 5 to keep the output readable.
-    # The `dfs` function returns a list of nodes in the order they were visited.
-    visited_nodes_in_order = searcher.dfs(query=start_node, depth=5)
+    # The DFS returns a list of nodes in the order they were visited.
+    if served:
+        _, visited_nodes_in_order = query_or_none(graph_path, 'dfs', start_node=start_node, depth_limit=5)
+    else:
+        # We use the RepoSearcher class you created, which has a handy DFS method.
+        searcher = RepoSearcher(graph=repo_graph)
+        visited_nodes_in_order = searcher.dfs_traversal(start_node, depth_limit=5)
 
     # Now, let's iterate through the path the traversal took.
     for i, node_name in enumerate(visited_nodes_in_order):
@@ -98,7 +116,10 @@ def traverse_repository_graph_dfs(graph_path="graph.pkl"):
         
         # For each visited node, let's see its direct connections.
         # This shows how the traversal moves "through the connected edges".
-        direct_connections = list(repo_graph.neighbors(node_name))
+        if served:
+            _, direct_connections = query_or_none(graph_path, 'dependencies', node_name=node_name)
+        else:
+            direct_connections = list(repo_graph.neighbors(node_name))
     
         
         if direct_connections:
@@ -116,5 +137,5 @@ def traverse_repository_graph_dfs(graph_path="graph.pkl"):
 
 if __name__ == '__main__':
     # You can optionally pass the path to your graph file as a command-line argument.
-    graph_file_path = sys.argv[1] if len(sys.argv) > 1 else "graph.pkl"
+    graph_file_path = sys.argv[1] if len(sys.argv) > 1 else "graph.store"
     traverse_repository_graph_simple(graph_file_path)
\ No newline at end of file
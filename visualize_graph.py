@@ -1,24 +1,24 @@
 # visualize_graph.py
 
-import pickle
 import networkx as nx
 from pyvis.network import Network
 import os
 import sys
+from core.graph_store import load_graph
 
-def create_graph_visualization(graph_path="graph.pkl", output_filename="graph_visualization.html"):
+def create_graph_visualization(graph_path="graph.store", output_filename="graph_visualization.html"):
     """
-    Loads a networkx graph from a pickle file and creates an interactive
-    HTML visualization using pyvis.
+    Loads a networkx graph from a graph store (or a legacy pickle file) and
+    creates an interactive HTML visualization using pyvis.
 
     Args:
-        graph_path (str): The path to the input graph.pkl file.
+        graph_path (str): The path to the input graph store or .pkl file.
         output_filename (str): The name of the output HTML file.
     """
     print(f"Attempting to load graph from '{graph_path}'...")
     try:
-        with open(graph_path, 'rb') as f:
-            G = pickle.load(f)
+        # Only the attributes shown in the tooltips are loaded; spans are skipped
+        G = load_graph(graph_path, node_attributes=('category', 'kind', 'fname', 'docstring'))
     except FileNotFoundError:
         print(f"ERROR: The file '{graph_path}' was not found.")
         print("Please make sure you have run the graph construction script first.")